@@ -1,2 +1,3 @@
 from . import api
-from . import csv_reader_writer
\ No newline at end of file
+from . import csv_reader_writer
+from . import image_fetcher
\ No newline at end of file
@@ -0,0 +1,113 @@
+import base64
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class FetchedImage(object):
+    """
+    Result of an image request.
+    image: base64 encoded image, False when the server answered 304 Not Modified.
+    md5: md5 of the base64 encoded image, like the duplicate checks of the connectors.
+    """
+
+    def __init__(self, url, image, md5, content_type, not_modified=False):
+        self.url = url
+        self.image = image
+        self.md5 = md5
+        self.content_type = content_type
+        self.not_modified = not_modified
+
+
+class ImageFetcher(object):
+    """
+    Downloads product images with a bounded thread pool and keep-alive sessions.
+
+    The ETag and Last-Modified of every downloaded url are kept with the md5 of the image, so the
+    next request of the same url is conditional. When the server answers 304 the image is taken
+    from the record already holding that md5 instead of being downloaded again.
+
+    No ORM call is made from here, the threads only do HTTP requests.
+    """
+
+    max_workers = 4
+    timeout = 10
+    max_validators = 10000
+
+    _validators = OrderedDict()
+    _lock = threading.Lock()
+    _local = threading.local()
+
+    @classmethod
+    def get_validator(cls, url):
+        """
+        Returns (etag, last_modified, md5, content_type) of the last download of the url or None.
+        """
+        with cls._lock:
+            return cls._validators.get(url)
+
+    @classmethod
+    def _remember(cls, url, etag, last_modified, md5, content_type):
+        with cls._lock:
+            cls._validators.pop(url, None)
+            cls._validators[url] = (etag, last_modified, md5, content_type)
+            while len(cls._validators) > cls.max_validators:
+                cls._validators.popitem(last=False)
+
+    @classmethod
+    def _session(cls):
+        session = getattr(cls._local, "session", None)
+        if session is None:
+            session = cls._local.session = requests.Session()
+        return session
+
+    @classmethod
+    def fetch(cls, url, conditional=False):
+        """
+        Download one image.
+        @param url: URL of the image.
+        @param conditional: Send the validators of the last download of the url.
+        @return: FetchedImage or None when the image can not be downloaded.
+        """
+        headers = {}
+        validator = cls.get_validator(url) if conditional else None
+        if validator:
+            etag, last_modified = validator[0], validator[1]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        try:
+            response = cls._session().get(url, headers=headers, verify=False, timeout=cls.timeout)
+        except requests.exceptions.RequestException:
+            return None
+        if response.status_code == 304 and validator:
+            return FetchedImage(url, False, validator[2], validator[3], not_modified=True)
+        if response.status_code != 200:
+            return None
+        image = base64.b64encode(response.content)
+        md5 = hashlib.md5(image).hexdigest()
+        content_type = response.headers.get("Content-Type")
+        cls._remember(url, response.headers.get("ETag"), response.headers.get("Last-Modified"), md5,
+                      content_type)
+        return FetchedImage(url, image, md5, content_type)
+
+    @classmethod
+    def fetch_all(cls, urls, conditional_urls=()):
+        """
+        Download the images concurrently, every url is requested once.
+        @param urls: URLs of the images.
+        @param conditional_urls: URLs whose last download is still held and can be requested with
+        the validators.
+        @return: Dictionary of {url: FetchedImage or None}.
+        """
+        urls = list(OrderedDict.fromkeys(url for url in urls if url))
+        conditional_urls = set(conditional_urls)
+        if len(urls) <= 1:
+            return {url: cls.fetch(url, url in conditional_urls) for url in urls}
+        with ThreadPoolExecutor(max_workers=min(cls.max_workers, len(urls))) as executor:
+            results = executor.map(lambda url: cls.fetch(url, url in conditional_urls), urls)
+            return dict(zip(urls, results))
@@ -1,8 +1,8 @@
 import base64
-import requests
 import hashlib
 from odoo import models, fields, api
 from odoo.exceptions import Warning
+from ..api.image_fetcher import ImageFetcher
 
 
 class ProductImageEpt(models.Model):
@@ -17,6 +17,48 @@ class ProductImageEpt(models.Model):
     url = fields.Char(string="Image URL", help="External URL of image")
     sequence = fields.Integer(help="Sequence of images.", index=True, default=10)
     image_binary = fields.Binary('Image Binary', help='Binary Image', attachment=True)
+    image_md5 = fields.Char(compute="_compute_image_md5", store=True, index=True,
+                            help="MD5 of the image, used to find an image already held.")
+
+    @api.depends('image')
+    def _compute_image_md5(self):
+        for record in self:
+            record.image_md5 = hashlib.md5(record.image).hexdigest() if record.image else False
+
+    @api.model
+    def fetch_images(self, urls):
+        """
+        Downloads the images of the urls concurrently. A url downloaded before is requested with
+        its ETag/Last-Modified when its image is still held by an image record, and the image of
+        that record is used when the server answers 304 Not Modified.
+        @param urls: List of image URLs.
+        @return: Dictionary of {url: FetchedImage or None}.
+        """
+        known_md5 = {}
+        for url in set(urls):
+            validator = ImageFetcher.get_validator(url)
+            if validator:
+                known_md5[url] = validator[2]
+        held_md5 = set()
+        if known_md5:
+            held_md5 = {image['image_md5'] for image in self.search_read(
+                [('image_md5', 'in', list(set(known_md5.values())))], ['image_md5'])}
+        conditional_urls = [url for url, md5 in known_md5.items() if md5 in held_md5]
+        results = ImageFetcher.fetch_all(urls, conditional_urls)
+        for result in results.values():
+            if result and result.not_modified:
+                result.image = self.search([('image_md5', '=', result.md5)], limit=1).image
+        return results
+
+    @api.model
+    def get_image_ids_by_md5(self, domain):
+        """
+        Finds the images matching the domain by their stored md5, the images are not read.
+        @param domain: Domain of the images, like the images of a template.
+        @return: Dictionary of {md5: image id}.
+        """
+        return {image['image_md5']: image['id'] for image in self.search_read(
+            domain + [('image_md5', '!=', False)], ['image_md5'], order='sequence, id')}
 
     @api.model
     def get_image(self, url):
@@ -28,12 +70,9 @@ class ProductImageEpt(models.Model):
         """
         image_types = ["image/jpeg", "image/png", "image/tiff", "image/vnd.microsoft.icon", "image/x-icon",
                        "image/vnd.djvu", "image/svg+xml", "image/gif"]
-        response = requests.get(url, stream=True, verify=False, timeout=10)
-        if response.status_code == 200:
-            if response.headers["Content-Type"] in image_types:
-                image = base64.b64encode(response.content)
-                if image:
-                    return image
+        result = self.fetch_images([url]).get(url)
+        if result and result.content_type in image_types and result.image:
+            return result.image
         raise Warning("Can't find image.\nPlease provide valid Image URL.")
 
     @api.model
@@ -56,8 +56,7 @@ class StockInventory(models.Model):
                                                        product_data.get('product_qty'),
                                                        location_id)
                 vals_list.append(val)
-        for record in vals_list:
-            inventory_line_obj.create(record)
+        inventory_line_obj.create(vals_list)
         return True
 
     def prepare_inventory_line_vals(self, product, qty, location):
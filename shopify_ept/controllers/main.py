@@ -53,17 +53,7 @@ class Main(http.Controller):
                 "".format(instance.name, odoo_webhook.webhook_name))
             return
         _logger.info("UPDATE ORDER WEBHOOK call for order: {0}".format(res.get('name')))
-
-        if request.env["sale.order"].sudo().search_read([
-                ("shopify_instance_id", "=", instance.id),
-                ("shopify_order_id", "=", res.get("id")),
-                ("shopify_order_number", "=", res.get("order_number"))], ["id"]):
-            request.env["sale.order"].sudo().process_shopify_order_via_webhook(res, instance, True)
-        elif not res.get("fulfillment_status"):
-            res.update({'fulfillment_status': 'unshipped'})
-            if res.get("fulfillment_status") in instance.import_shopify_order_status_ids.mapped(
-                    "status"):
-                request.env["sale.order"].sudo().process_shopify_order_via_webhook(res, instance)
+        self.add_order_webhook_to_inbox(res, instance, "orders/updated")
         return
 
     @http.route("/shopify_odoo_webhook_for_orders_partially_cancelled", csrf=False, auth="public",
@@ -82,13 +72,8 @@ class Main(http.Controller):
                 "webhook{1} is not active."
                 "".format(instance.name, odoo_webhook.webhook_name))
             return
-        _logger.info("CANCEL ORDER WEBHOOK call for order: {0}".format(res))
-
-        if request.env["sale.order"].sudo().search_read([
-                ("shopify_instance_id", "=", instance.id),
-                ("shopify_order_id", "=", res.get("id")),
-                ("shopify_order_number", "=", res.get("order_number"))], ["id"]):
-            request.env["sale.order"].sudo().process_shopify_order_via_webhook(res, instance, True)
+        _logger.info("CANCEL ORDER WEBHOOK call for order: {0}".format(res.get('name')))
+        self.add_order_webhook_to_inbox(res, instance, "orders/cancelled")
         return
 
     @http.route("/shopify_odoo_webhook_for_product", csrf=False, auth="public", type="json")
@@ -163,19 +148,26 @@ class Main(http.Controller):
 
         return
 
+    def add_order_webhook_to_inbox(self, res, instance, topic):
+        """
+        This method is used to store the order webhook in the inbox, the order is processed by the
+        cron so the webhook is answered at once.
+        @param res: Data of the order received in the webhook.
+        @param instance: Record of the Shopify instance.
+        @param topic: Topic used when the header of Shopify is missing.
+        """
+        topic = request.httprequest.headers.get("X-Shopify-Topic") or topic
+        if not request.env["shopify.webhook.inbox.ept"].sudo().add_webhook_payload(instance, topic, res):
+            _logger.info("Order webhook {0} of {1} is skipped, it is invalid or already received.".format(
+                res.get("id") if isinstance(res, dict) else res, instance.name))
+        return True
+
     def get_basic_info(self, route):
         """
         This method is used return basic info. It will return res and instance.
         @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 10-Jan-2020..
         """
         res = request.jsonrequest
-        host = "https://" + request.httprequest.headers.get('X-Shopify-Shop-Domain')
-        instance = request.env["shopify.instance.ept"].sudo().with_context(
-            active_test=False).search([("shopify_host", 'ilike', host)], limit=1)
-#         instance = request.env["shopify.instance.ept"].sudo().with_context(
-#             active_test=False).search([]).filtered(lambda x:x.shopify_host == host)
-
-        webhook = request.env['shopify.webhook.ept'].sudo().search([
-            ('delivery_url', 'ilike', route), ('instance_id', '=', instance.id)], limit=1)
-
+        host = request.httprequest.headers.get('X-Shopify-Shop-Domain')
+        instance, webhook = request.env['shopify.webhook.ept'].sudo().get_webhook_for_route(host, route)
         return res, instance, webhook
@@ -13,6 +13,7 @@ from . import res_partner
 from . import payment_gateway
 from . import sale_order
 from . import location_ept
+from . import stock_ledger_ept
 from . import order_risk
 from . import sale_auto_workflow_configuration
 from . import stock_inventory
@@ -25,6 +26,7 @@ from . import global_channel_ept
 from . import product
 from . import shopify_product_image_ept
 from . import webhook_ept
+from . import webhook_inbox_ept
 from . import shopify_payout_reconciliation_log_ept
 from . import shopify_payout_report_line_ept
 from . import shopify_payout_report_ept
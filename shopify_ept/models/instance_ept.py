@@ -188,6 +188,13 @@ class ShopifyInstanceEpt(models.Model):
                                                  string='Fiscal Position')
     shopify_stock_field = fields.Many2one('ir.model.fields', string='Stock Field',
                                           default=_default_stock_field)
+    shopify_stock_export_api = fields.Selection([('graphql', 'GraphQL (Bulk)'), ('rest', 'REST')],
+                                                string="Export Stock With", default='graphql',
+                                                help="GraphQL exports the stock of many products in one request, "
+                                                     "REST exports the stock of one product per request.")
+    shopify_stock_export_chunk_size = fields.Integer(string="Export Stock Chunk Size", default=100,
+                                                     help="Number of products exported in one GraphQL "
+                                                          "request, maximum 250.")
     shopify_country_id = fields.Many2one("res.country", "Country")
     shopify_api_key = fields.Char("API Key", required=True)
     shopify_password = fields.Char("Password", required=True)
@@ -203,6 +210,12 @@ class ShopifyInstanceEpt(models.Model):
                                                      help="it is used to store last update inventory stock date")
     shopify_last_date_product_import = fields.Datetime(string="Last Date Of Product Import",
                                                        help="it is used to store last import product date")
+    shopify_product_import_page_info = fields.Char(string="Product Import Cursor", copy=False,
+                                                   help="it is used to store the page_info of the next page to "
+                                                        "import when a product import is interrupted")
+    shopify_product_import_start_date = fields.Datetime(string="Product Import Start Date", copy=False,
+                                                        help="it is used to store the start date of the product "
+                                                             "import whose cursor is stored")
     # is_bom_type_product = fields.Boolean(string="Manage BOM/Kit type products?",help="Manage BOM/Kit type product stock")
     auto_import_product = fields.Boolean(string="Auto Create Product if not found?")
     shopify_sync_product_with = fields.Selection([('sku', 'Internal Reference(SKU)'),
@@ -354,7 +367,26 @@ class ShopifyInstanceEpt(models.Model):
         customer_vals = {"name": "POS Customer(%s)" % vals.get("name"), "customer_rank": 1}
         customer = self.env["res.partner"].create(customer_vals)
         vals.update({"shopify_default_pos_customer_id": customer.id})
-        return super(ShopifyInstanceEpt, self).create(vals)
+        instance = super(ShopifyInstanceEpt, self).create(vals)
+        self.clear_caches()
+        return instance
+
+    def write(self, vals):
+        """
+        Inherited for clearing the cached instances of the webhook routes when the host is changed.
+        """
+        res = super(ShopifyInstanceEpt, self).write(vals)
+        if "shopify_host" in vals:
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        """
+        Inherited for clearing the cached instances of the webhook routes.
+        """
+        res = super(ShopifyInstanceEpt, self).unlink()
+        self.clear_caches()
+        return res
 
     @api.onchange('default_active_instance')
     def _onchange_default_active_insatnce(self):
@@ -48,6 +48,7 @@ class ShopifyOrderDataQueueEpt(models.Model):
     queue_process_count = fields.Integer(string="Queue Process Times",
                                          help="it is used know queue how many time processed")
     is_action_require = fields.Boolean(default=False, help="it is used  to find the action require queue")
+    locked_until = fields.Datetime(copy=False, help="The queue is claimed by a worker until this time.")
 
     @api.depends('order_data_queue_line_ids.state')
     def _compute_queue_state(self):
@@ -118,7 +119,7 @@ class ShopifyOrderDataQueueEpt(models.Model):
             _logger.info("order_status_id %s"%(order_status_id.status))
             shopify_fulfillment_status = order_status_id.status
             if shopify_fulfillment_status == 'any' or shopify_fulfillment_status == 'shipped':
-                order_ids = shopify.Order().find(status='any',
+                order_ids = shopify.Order.find_data(status='any',
                                                   fulfillment_status=shopify_fulfillment_status,
                                                   updated_at_min=from_date,
                                                   updated_at_max=to_date, limit=250)                    
@@ -130,7 +131,7 @@ class ShopifyOrderDataQueueEpt(models.Model):
                 if len(order_ids) >= 50:
                     order_ids = self.list_all_orders(order_ids,instance,created_by)
             else:
-                order_ids = shopify.Order().find(fulfillment_status=shopify_fulfillment_status,
+                order_ids = shopify.Order.find_data(fulfillment_status=shopify_fulfillment_status,
                                                   updated_at_min=from_date,
                                                   updated_at_max=to_date, limit=250)
 
@@ -164,13 +165,13 @@ class ShopifyOrderDataQueueEpt(models.Model):
                 if page_link.find('next') > 0:
                     page_info = page_link.split(';')[0].strip('<>').split('page_info=')[1]
                     try:
-                        result = shopify.Order().find(limit=250, page_info=page_info)
+                        result = shopify.Order.find_data(limit=250, page_info=page_info)
                         order_data_queue_line_boj.create_order_data_queue_line(result,instance, created_by=created_by)
                         self._cr.commit()
                     except Exception as e:
                         if e.response.code == 429 and e.response.msg == "Too Many Requests":
                             time.sleep(int(float(e.response.headers.get('Retry-After', 5))))
-                            result = shopify.Order().find(limit=250, page_info=page_info)
+                            result = shopify.Order.find_data(limit=250, page_info=page_info)
                             order_data_queue_line_boj.create_order_data_queue_line(result,instance, created_by=created_by)
                             self._cr.commit()
 
@@ -237,13 +238,13 @@ class ShopifyOrderDataQueueEpt(models.Model):
             if len(order_ids.split(',')) <= 50:
                 # order_ids_list is a list of all order ids which response did not given by shopify.
                 order_ids_list = list(set(re.findall(re.compile(r"(\d+)"), order_ids)))
-                results = shopify.Order().find(ids=','.join(order_ids_list), status='any')
+                results = shopify.Order.find_data(ids=','.join(order_ids_list), status='any')
                 if results:
                     _logger.info('Length of Shopify orders %s import from instance name: %s' % (
                         len(results), instance.name))
                     order_ids_list = [order_id.strip() for order_id in order_ids_list]
                     # Below process to identify which id response did not give by Shopify.
-                    [order_ids_list.remove(str(result.id)) for result in results if str(result.id) in order_ids_list]
+                    [order_ids_list.remove(str(result.get('id'))) for result in results if str(result.get('id')) in order_ids_list]
             else:
                 raise Warning(_('Please enter the Order ids 50 or less'))
             if results:
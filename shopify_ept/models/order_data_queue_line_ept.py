@@ -1,9 +1,13 @@
 from datetime import datetime, timedelta
 import logging
-from odoo import models, fields
-from odoo.addons.shopify_ept.shopify.pyactiveresource.util import xml_to_dict
+from odoo import models, fields, api
+from odoo.tools.misc import split_every
+from .. import shopify
+from .order_import_cache import ShopifyOrderImportCache
 import json
 import time
+import threading
+import psycopg2.extensions
 
 _logger = logging.getLogger("Shopify_queue_process===(Emipro): ")
 
@@ -36,20 +40,37 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
 
     def create_order_data_queue_line(self, order_ids, instance, created_by='import', process_immediately = False):
         """This method used to create order data queue lines. it's split the queue after 50 order queue lines
+            The already imported orders are found with one query and the lines of each queue are created
+            with one create call.
             @param : order_ids, instance
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 06/11/2019.
             Task Id : 157350
         """
-        count = 0
-        one_time_create = True
         order_ids.reverse()
         order_queue_list = []
 
-        for order_id in order_ids:
+        """We got the order response from webhook then that response formate is JSON,
+           so we did not require to convert it."""
+        if not created_by == 'webhook':
+            # Orders are fetched with find_data, to_xml_dict gives the same data as the former
+            # xml_to_dict(order.to_xml()) without building the resource objects and the xml.
+            results = [shopify.Order.to_xml_dict(order_id) for order_id in order_ids]
+            shopify_order_ids = [str(result.get('order').get('id')) for result in results if result.get('order')]
+            existing_order_ids = {order.get('shopify_order_id') for order in self.env['sale.order'].search_read([
+                ('shopify_order_id', 'in', shopify_order_ids),
+                ('shopify_instance_id', '=', instance and instance.id or False)], ['shopify_order_id'])}
+            results = [result for result in results if not result.get('order') or
+                       str(result.get('order').get('id')) not in existing_order_ids]
+        else:
+            # We we got response from webhook
+            results = [{'order': order_id} for order_id in order_ids]
 
+        order_queue_line_vals_list = [self.prepare_order_data_queue_line_vals(result, instance) for result in results]
+        for order_queue_line_vals_chunk in split_every(50, order_queue_line_vals_list):
+            one_time_create = True
             if created_by == "webhook" and not process_immediately:
                 order_queue_id, one_time_create = self.search_webhook_order_queue(
-                    created_by, instance, order_id, one_time_create)
+                    created_by, instance, results[0].get('order'), one_time_create)
                 if len(order_queue_id.order_data_queue_line_ids) > 50:
                     one_time_create = True
                 order_queue_list.append(order_queue_id.id)
@@ -59,51 +80,39 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
                 order_queue_list.append(order_queue_id.id)
                 _logger.info('Shopify Order Queue created. Queue name is  {}'.format(
                     order_queue_id.name))
-                one_time_create = False
-
-            """We got the order response from webhook then that response formate is JSON,
-               so we did not require to convert it."""
-            if not created_by == 'webhook':
-                result = xml_to_dict(order_id.to_xml())
-                shopify_sale_order_id = self.env['sale.order'].search([
-                    ('shopify_order_id', '=', result.get('order').get('id') if result.get('order') else False),
-                    ('shopify_instance_id', '=', instance and instance.id or False)])
-                if shopify_sale_order_id:
-                    continue
-            else:
-                # We we got response from webhook
-                result = order_id
-                result = {'order': result}
 
-            try:
-                customer_name = "%s %s" % (result.get('order').get('customer').get('first_name'),
-                                           result.get('order').get('customer').get('last_name'))
-                customer_email = result.get('order').get('customer').get('email')
-                if customer_name == 'None None':
-                    customer_name = result.get('order').get('customer').get('default_address').get(
-                        'name')
-            except:
-                customer_name = False
-                customer_email = False
-
-            data = json.dumps(result)
-            order_queue_line_vals = {
-                'shopify_order_id': result.get('order').get('id') if result.get('order') else False,
-                'shopify_instance_id': instance and instance.id or False,
-                'order_data': data,
-                'name': result.get('order').get('name') or '',
-                'customer_name': customer_name,
-                'customer_email': customer_email,
-                'shopify_order_data_queue_id': order_queue_id and order_queue_id.id or False,
-                'state': 'draft'
-            }
-            self.create(order_queue_line_vals)
-            count += 1
-            if count == 50:
-                count = 0
-                one_time_create = True
+            for order_queue_line_vals in order_queue_line_vals_chunk:
+                order_queue_line_vals.update({
+                    'shopify_order_data_queue_id': order_queue_id and order_queue_id.id or False})
+            self.create(list(order_queue_line_vals_chunk))
         return order_queue_list
 
+    def prepare_order_data_queue_line_vals(self, result, instance):
+        """This method used to prepare the values of an order data queue line.
+            @param : result, instance
+        """
+        try:
+            customer_name = "%s %s" % (result.get('order').get('customer').get('first_name'),
+                                       result.get('order').get('customer').get('last_name'))
+            customer_email = result.get('order').get('customer').get('email')
+            if customer_name == 'None None':
+                customer_name = result.get('order').get('customer').get('default_address').get(
+                    'name')
+        except:
+            customer_name = False
+            customer_email = False
+
+        data = json.dumps(result)
+        return {
+            'shopify_order_id': result.get('order').get('id') if result.get('order') else False,
+            'shopify_instance_id': instance and instance.id or False,
+            'order_data': data,
+            'name': result.get('order').get('name') or '',
+            'customer_name': customer_name,
+            'customer_email': customer_email,
+            'state': 'draft'
+        }
+
     def search_webhook_order_queue(self, created_by, instance, order, one_time_create):
         shopify_order_queue_obj = self.env["shopify.order.data.queue.ept"]
 
@@ -132,53 +141,125 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
 
         return order_queue_data_id
 
-    def auto_start_child_process_for_order_queue(self):
+    def auto_start_child_process_for_order_queue(self, workers=None):
         """This method used to start the child process cron for process the order queue line data.
-            @param : self
+            @param : self, workers: Number of threads draining the order queues at the same time,
+            each thread works on its own cursor and claims its own queues. The system parameter
+            shopify_ept.order_queue_workers is used when it is not given, like from the cron.
             @return: True
             @author: Haresh Mori @Emipro Technologies Pvt.Ltd on date 07/10/2019.
         """
-        self.auto_import_order_queue_data()
+        if workers is None:
+            workers = self.get_order_queue_workers()
+        if workers <= 1:
+            self.auto_import_order_queue_data()
+            return True
+        threads = [threading.Thread(target=self._order_queue_worker_thread) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
         return True
 
+    def get_order_queue_workers(self):
+        """
+        Returns the number of order queue workers set in the system parameter
+        shopify_ept.order_queue_workers, 1 when it is not set or not a number.
+        """
+        workers = self.env['ir.config_parameter'].sudo().get_param('shopify_ept.order_queue_workers', 1)
+        try:
+            return max(int(workers), 1)
+        except (TypeError, ValueError):
+            _logger.warning("Invalid number of order queue workers: %s", workers)
+            return 1
+
+    def _order_queue_worker_thread(self):
+        """
+        Runs auto_import_order_queue_data in a thread with a new cursor.
+        """
+        with api.Environment.manage(), self.pool.cursor() as new_cr:
+            try:
+                self.with_env(self.env(cr=new_cr)).auto_import_order_queue_data()
+            except Exception as error:
+                _logger.exception("Order queue worker stopped: %s", error)
+
+    def claim_order_queue(self, lease_seconds, handled_queue_ids=()):
+        """
+        Claims the oldest order queue of an active instance having draft lines which is not claimed
+        by another worker. The row lock is skipped by the concurrent workers and the claim is kept in
+        locked_until, so a queue is processed by one worker only. The claim is committed
+        at once and expires by itself when the worker crashes.
+        @param lease_seconds: Number of seconds the queue stays claimed.
+        @param handled_queue_ids: Ids of the queues already handled in this run, they are not claimed again.
+        @return: Order queue record or False.
+        """
+        query = """update shopify_order_data_queue_ept
+                set locked_until = (now() at time zone 'UTC') + %s * interval '1 second'
+                where id = (select queue.id from shopify_order_data_queue_ept as queue
+                    where queue.is_action_require = False
+                    and not (queue.id = any(%s::integer[]))
+                    and exists (select 1 from shopify_instance_ept as instance
+                        where instance.id = queue.shopify_instance_id and instance.active = True)
+                    and (queue.locked_until is null or queue.locked_until < (now() at time zone 'UTC'))
+                    and exists (select 1 from shopify_order_data_queue_line_ept as queue_line
+                        where queue_line.shopify_order_data_queue_id = queue.id and queue_line.state = 'draft')
+                    order by (select min(queue_line.create_date) from shopify_order_data_queue_line_ept as queue_line
+                        where queue_line.shopify_order_data_queue_id = queue.id and queue_line.state = 'draft') asc
+                    limit 1
+                    for update of queue skip locked)
+                returning id"""
+        for attempt in range(3):
+            # Commit before claiming, so the claim works on a fresh snapshot.
+            self._cr.commit()
+            try:
+                self._cr.execute(query, (lease_seconds, list(handled_queue_ids)))
+                result = self._cr.fetchone()
+                self._cr.commit()
+            except psycopg2.extensions.TransactionRollbackError:
+                # Another worker claimed or updated the same queue after our snapshot.
+                self._cr.rollback()
+                continue
+            return self.env['shopify.order.data.queue.ept'].browse(result[0]) if result else False
+        return False
+
+    def release_order_queue(self, queue):
+        """
+        Releases the claim of the order queue, so the remaining draft lines can be processed by
+        any worker.
+        @param queue: Record of the order queue.
+        """
+        self._cr.execute("""update shopify_order_data_queue_ept set locked_until = null where id = %s""",
+                         (queue.id,))
+        self._cr.commit()
+
     def auto_import_order_queue_data(self):
         """- This method used to process synced shopify order data in batch of 50 queue lines.
            - This method is called from cron job.
+           - Each queue is claimed before processing, so several workers can run this method at
+             the same time without processing the same queue.
             @param : self
             @author: Haresh Mori @Emipro Technologies Pvt.Ltd on date 07/10/2019.
             Task Id : 157350
         """
         common_log_book_obj = self.env["common.log.book.ept"]
-        order_data_queue_obj = self.env['shopify.order.data.queue.ept']
-        # below two line add by Dipak Gogiya on date 15/01/2020, this is used to update
-        # is_process_queue as False.
+        # Only reset the flag of the queues whose claim is expired, the other queues are being
+        # processed by another worker.
         self.env.cr.execute(
-            """update shopify_order_data_queue_ept set is_process_queue = False where is_process_queue = True""")
+            """update shopify_order_data_queue_ept set is_process_queue = False where is_process_queue = True
+            and (locked_until is null or locked_until < (now() at time zone 'UTC'))""")
         self._cr.commit()
-        # change by bhavesh jadav 02/12/2019 for process  only one queue data at a time
         # change by Nilesh Parmar 01/02/2020 for add the functionality of queue is crash 3 time
         # than create a schedule acitvity.
-
-        query = """select queue.id
-                from shopify_order_data_queue_line_ept as queue_line
-                inner join shopify_order_data_queue_ept as queue on queue_line.shopify_order_data_queue_id = queue.id
-                where queue_line.state='draft' and queue.is_action_require = 'False'
-                ORDER BY queue_line.create_date ASC"""
-        self._cr.execute(query)
-        order_queue_ids = []
-        order_queue_list = self._cr.fetchall()
-        if not order_queue_list:
-            return
-        for result in order_queue_list:
-            if result[0] not in order_queue_ids:
-                order_queue_ids.append(result[0])
-
         start = time.time()
-        queue = order_data_queue_obj.browse(order_queue_ids[0])
-        order_queue_process_cron_time = queue.shopify_instance_id.get_shopify_cron_execution_time(
+        order_queue_process_cron_time = self.env['shopify.instance.ept'].get_shopify_cron_execution_time(
             "shopify_ept.ir_cron_parent_to_process_order_queue_data")
-        for order_queue_id in order_queue_ids:
-            queue = order_data_queue_obj.browse(order_queue_id)
+        # A queue is handled once per run, like when the queues were searched before the loop.
+        handled_queue_ids = []
+        while time.time() - start <= order_queue_process_cron_time - 60:
+            queue = self.claim_order_queue(order_queue_process_cron_time, handled_queue_ids)
+            if not queue:
+                return True
+            handled_queue_ids.append(queue.id)
             order_data_queue_line_ids = queue.order_data_queue_line_ids.filtered(lambda x:x.state == 'draft')
             # For counting the queue crashes and creating schedule activity for the queue.
             queue.queue_process_count += 1
@@ -189,15 +270,15 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
                 if queue.shopify_instance_id.is_shopify_create_schedule:
                     model_id = self.env['ir.model'].search([('model', '=', 'shopify.order.data.queue.ept')]).id
                     common_log_book_obj.create_crash_queue_schedule_activity(queue, model_id, note)
+                self.release_order_queue(queue)
                 continue
             self._cr.commit()
             if queue.created_by == 'webhook':
                 order_data_queue_line_ids.process_import_order_queue_data(update_order = True)
             else:
                 order_data_queue_line_ids.process_import_order_queue_data()
-            if time.time() - start > order_queue_process_cron_time - 60:
-                return True
-
+            self.release_order_queue(queue)
+        return True
 
     def process_import_order_queue_data(self, update_order=False):
         """
@@ -206,7 +287,9 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
             @author: Haresh Mori @Emipro Technologies Pvt.Ltd on date 07/10/2019.
             Task Id : 157350
         """
-        sale_order_obj = self.env['sale.order']
+        # Reference records searched once for all orders of this batch.
+        order_cache = ShopifyOrderImportCache(self.env)
+        sale_order_obj = self.env['sale.order'].with_context(shopify_order_cache=order_cache)
         comman_log_obj = self.env["common.log.book.ept"]
         queue_id = self.shopify_order_data_queue_id if len(
             self.shopify_order_data_queue_id) == 1 else False
@@ -223,6 +306,8 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
                                                      'module':'shopify_ept',
                                                      'shopify_instance_id':queue_id.shopify_instance_id.id,
                                                      'active':True})
+            if not update_order:
+                sale_order_obj.prefetch_shopify_order_details(queue_id.shopify_instance_id, self)
             commit_count = 0
             for order_queue_line in self:
                 commit_count += 1
@@ -235,7 +320,7 @@ class ShopifyOrderDataQueueLineEpt(models.Model):
                     commit_count = 0
                 # Below two line used for When the update order webhook calls.
                 if update_order:
-                    orders = self.env["sale.order"].update_shopify_order(order_queue_line,
+                    orders = sale_order_obj.update_shopify_order(order_queue_line,
                                                                        log_book_id)
                 else:
                     sale_order_obj.import_shopify_orders(order_queue_line, log_book_id)
@@ -0,0 +1,62 @@
+class ShopifyOrderImportCache(object):
+    """
+    Reference records used while importing one batch of Shopify orders, like the customer
+    location, the Shopify locations, pricelists and taxes. The records are searched once per
+    batch instead of once per order.
+
+    The values of an instance are dropped when the instance is written, so a configuration
+    change is used by the next order of the batch.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        self._values = {}
+        self._instance_values = {}
+
+    def _get_store(self, instance):
+        if not instance:
+            return self._values
+        write_date, store = self._instance_values.get(instance.id, (None, None))
+        if store is None or write_date != instance.write_date:
+            store = {}
+            self._instance_values[instance.id] = (instance.write_date, store)
+        return store
+
+    def get(self, key, compute, instance=False):
+        """
+        Return the cached value of the key, the value is computed by calling compute() when
+        it is not cached yet.
+        @param key: Hashable key of the value.
+        @param compute: Function returning the value.
+        @param instance: Record of the Shopify instance, when the value depends on its configuration.
+        """
+        store = self._get_store(instance)
+        if key not in store:
+            store[key] = compute()
+        return store[key]
+
+    def set(self, key, value, instance=False):
+        self._get_store(instance)[key] = value
+        return value
+
+    def clear(self):
+        self._values.clear()
+        self._instance_values.clear()
+
+    def get_model_id(self, model_name):
+        return self.get(("ir.model", model_name),
+                        lambda: self.env["common.log.lines.ept"].get_model_id(model_name))
+
+    def get_customer_location(self):
+        return self.get("customer_location", lambda: self.env["stock.location"].search(
+            [("usage", "=", "customer")], limit=1))
+
+    def is_mrp_installed(self):
+        return self.get("mrp_installed", lambda: bool(self.env["ir.module.module"].sudo().search(
+            [("name", "=", "mrp"), ("state", "=", "installed")])))
+
+    def get_shopify_location(self, instance, shopify_location_id):
+        return self.get(("shopify.location.ept", str(shopify_location_id)),
+                        lambda: self.env["shopify.location.ept"].search(
+                            [("shopify_location_id", "=", shopify_location_id),
+                             ("instance_id", "=", instance.id)], limit=1), instance)
@@ -27,7 +27,7 @@ class ShopifyOrderRisk(models.Model):
         """
         flag = True
         for risk_id in risk_result:
-            risk = risk_id.to_dict()
+            risk = risk_id.to_dict() if hasattr(risk_id, 'to_dict') else risk_id
             if risk.get('recommendation') != 'accept':
                 flag = False
             self.create({'name':risk.get('order_id'), 'risk_id':risk.get('id'),
@@ -119,48 +119,56 @@ class ShopifyProductDataqueue(models.Model):
             else:
                 raise Warning(_('Please enter the product template ids 50 or less'))
         else:
-            if not instance.shopify_last_date_product_import:
+            import_start_date = datetime.now()
+            if instance.shopify_product_import_page_info:
+                # Resume the interrupted import from the cursor of the last page written in the queues.
+                # The products updated after the start of the interrupted import are imported by the next
+                # import, so its start date is kept.
+                import_start_date = instance.shopify_product_import_start_date or import_start_date
+                results = shopify.Product().find(page_info=instance.shopify_product_import_page_info, limit=250)
+            elif not instance.shopify_last_date_product_import:
                 results = shopify.Product().find(status='active', limit=250)
-                if len(results) >= 250:
-                    results = self.shopify_list_all_products(results)
-                    #results = self.get_product(results)
             else:
                 # updated_at_min =datetime.strptime(pytz.utc.localize(instance.shopify_last_date_product_import).astimezone(
                 # pytz.timezone(instance.shopify_store_time_zone[12:] or 'UTC')).strftime(
                 # '%Y-%m-%d %H:%M:%S'), "%Y-%m-%d %H:%M:%S")
                 results = shopify.Product().find(status='active',
                                                  updated_at_min=instance.shopify_last_date_product_import,limit=250) # Change by bhavesh jadav 13/12/2019 limit=250
-                if len(results) >= 250:
-                    results=self.shopify_list_all_products(results)
-            if results:
-                instance.shopify_last_date_product_import = datetime.now()
-                without_gift_card_products = []
-                for result in results:
-                    if result.to_dict().get('variants')[0].get('fulfillment_service') != 'gift_card':
-                        without_gift_card_products.append(result)
-                results = without_gift_card_products
         if not results:
             _logger.info(
                     'No Products found to be imported from Shopify.')
             return False
-        _logger.info('Total synced products - {}'.format(len(results)))
         count = 0
+        total_count = 0
         one_time_create = True
         product_queue_list = []
-        for result in results:
-            if one_time_create:
-                product_queue_id = self.shopify_create_product_queue(instance)
-                product_queue_list.append(product_queue_id.id)
-                _logger.info('Shopify Product Queue created. Queue name is  {}'.format(
-                        product_queue_id.name))
-                one_time_create = False
-                if template_ids or only_alphabets:
-                    product_queue_id.message_post(body="%s products are not imported" %(','.join(template_ids+only_alphabets)))
-            self.shopify_create_product_data_queue_line(result, instance, product_queue_id)
-            count = count + 1
-            if count == 100:
-                count = 0
-                one_time_create = True
+        # Pages are written and committed one by one, so only the current page is kept in memory.
+        for page in self.shopify_list_all_products(results):
+            for result in page:
+                if not template_ids and result.to_dict().get('variants')[0].get('fulfillment_service') == 'gift_card':
+                    continue
+                if one_time_create:
+                    product_queue_id = self.shopify_create_product_queue(instance)
+                    product_queue_list.append(product_queue_id.id)
+                    _logger.info('Shopify Product Queue created. Queue name is  {}'.format(
+                            product_queue_id.name))
+                    one_time_create = False
+                    if template_ids or only_alphabets:
+                        product_queue_id.message_post(body="%s products are not imported" %(','.join(template_ids+only_alphabets)))
+                self.shopify_create_product_data_queue_line(result, instance, product_queue_id)
+                count = count + 1
+                total_count = total_count + 1
+                if count == 100:
+                    count = 0
+                    one_time_create = True
+            if not template_ids:
+                instance.write({'shopify_product_import_page_info': page.next_page_info or False,
+                                'shopify_product_import_start_date': page.next_page_info and import_start_date
+                                                                     or False})
+                self._cr.commit()
+        if not template_ids:
+            instance.shopify_last_date_product_import = import_start_date
+        _logger.info('Total synced products - {}'.format(total_count))
         return product_queue_list
 
     def shopify_list_all_updated_products(self,result,updated_at_min):
@@ -196,32 +204,16 @@ class ShopifyProductDataqueue(models.Model):
 
     def shopify_list_all_products(self, result):
         """This method used to call the page wise data of product to import from Shopify to Odoo.
+            It yields one page at a time, so the products of the previous pages are not kept in memory.
             @param : self,result
             @author: Haresh Mori @Emipro Technologies Pvt. Ltd on date 14/10/2019.
             Modify on date 27/12/2019 Taken pagination changes.
         """
-        sum_product_list = []
-        catch = ""
-        while result:
-            page_info = ""
-            sum_product_list += result
-            link = shopify.ShopifyResource.connection.response.headers.get('Link')
-            if not link or not isinstance(link, str):
-                return sum_product_list
-            for page_link in link.split(','):
-                if page_link.find('next') > 0:
-                    page_info = page_link.split(';')[0].strip('<>').split('page_info=')[1]
-                    try:
-                        result = shopify.Product().find(page_info=page_info, limit=250)
-                    except Exception as e:
-                        if e.response.code == 429 and e.response.msg == "Too Many Requests":
-                            time.sleep(int(float(e.response.headers.get('Retry-After', 5))))
-                            result = shopify.Product().find(page_info=page_info, limit=250)
-                        else:
-                            raise Warning(e)
-            if catch == page_info:
-                break
-        return sum_product_list
+        try:
+            for page in shopify.PaginatedIterator(result):
+                yield page
+        except Exception as e:
+            raise Warning(e)
 
     def shopify_create_product_queue(self, instance, created_by='import'):
         """This method used to create a product queue as per the split requirement of the
@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 
 from odoo import models, fields
 from .. import shopify
+from .variant_matcher import ShopifyVariantMatcher
 
 _logger = logging.getLogger("Shopify queue logger===(Emipro): ")
 
@@ -149,6 +150,8 @@ class ShopifyProductDataqueueLineEpt(models.Model):
             self.env.cr.execute(
                 """update shopify_product_data_queue_ept set is_process_queue = False where is_process_queue = True""")
             self._cr.commit()
+            shopify_product_template_obj = shopify_product_template_obj.with_context(
+                shopify_variant_matcher=self.prepare_shopify_variant_matcher(queue_id.shopify_instance_id))
             commit_count = 0
             for product_queue_line in self:
                 commit_count += 1
@@ -173,6 +176,25 @@ class ShopifyProductDataqueueLineEpt(models.Model):
                 queue_id.common_log_book_id.unlink()
             return True
 
+    def prepare_shopify_variant_matcher(self, instance):
+        """
+        This method is used to prepare the variant matcher of the queue lines, it reads the Shopify
+        products of the instance and the Odoo products having the SKUs and barcodes of the lines once.
+        @param instance: Record of the instance.
+        @return: ShopifyVariantMatcher object.
+        """
+        skus = set()
+        barcodes = set()
+        for product_queue_line in self:
+            try:
+                product_data = json.loads(product_queue_line.synced_product_data or '{}')
+            except ValueError:
+                continue
+            for variant in product_data.get('variants') or []:
+                skus.add(variant.get('sku'))
+                barcodes.add(variant.get('barcode'))
+        return ShopifyVariantMatcher(self.env, instance, skus, barcodes)
+
     def replace_product_response(self):
         """ -This method used to replace the product data response in the failed queue line.It will
         call from the product queue line button.
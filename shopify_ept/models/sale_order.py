@@ -1,4 +1,5 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
 from odoo import models, fields, api, _
 from datetime import datetime
 from dateutil import parser
@@ -9,8 +10,10 @@ utc = pytz.utc
 import time
 import logging
 from odoo.exceptions import UserError
+from odoo.tools.misc import split_every
 from ..shopify.pyactiveresource.connection import ClientError
 from odoo.addons.shopify_ept.shopify.pyactiveresource.util import xml_to_dict
+from .order_import_cache import ShopifyOrderImportCache
 
 _logger = logging.getLogger("shopify_order_process===(Emipro):")
 
@@ -101,6 +104,71 @@ class SaleOrder(models.Model):
                          'unique(shopify_instance_id,shopify_order_id,shopify_order_number)',
                          "Shopify order must be Unique.")]
 
+    def get_shopify_order_cache(self):
+        """
+        Returns the reference data cache of the running batch of orders, it is passed with the
+        context key shopify_order_cache. A new cache is returned when the order is not imported
+        from a batch.
+        @return: ShopifyOrderImportCache object.
+        """
+        return self._context.get("shopify_order_cache") or ShopifyOrderImportCache(self.env)
+
+    def prefetch_shopify_order_details(self, instance, order_data_queue_lines, max_workers=4):
+        """
+        This method is used to fetch the risks and the transactions of the orders of a queue batch before
+        the orders are imported, the calls are made concurrently and paced by the rate limit of the shop.
+        The results are kept in the order cache of the batch, so import_shopify_orders and
+        prepare_vals_shopify_multi_payment do not call Shopify for each order. The orders already imported
+        are skipped and an order whose details can not be fetched is requested again by the importer.
+        @param instance: Record of the instance.
+        @param order_data_queue_lines: Records of the order queue lines of the batch.
+        @param max_workers: Number of concurrent requests.
+        """
+        order_cache = self.get_shopify_order_cache()
+        orders = {}
+        for queue_line in order_data_queue_lines:
+            order_response = json.loads(queue_line.order_data or '{}').get('order') or {}
+            if order_response.get('id'):
+                orders[str(order_response.get('id'))] = order_response
+        if not orders:
+            return True
+        existing_order_ids = {str(order.get('shopify_order_id')) for order in self.search_read(
+            [('shopify_instance_id', '=', instance.id), ('shopify_order_id', 'in', list(orders))],
+            ['shopify_order_id'])}
+
+        instance.connect_in_shopify()
+        # The site of the instance is set in each worker thread, the global site can be replaced by
+        # another thread connecting to another shop during the prefetch.
+        site = shopify.ShopifyResource.get_site()
+        user = shopify.ShopifyResource.get_user()
+        password = shopify.ShopifyResource.get_password()
+
+        def fetch_details(order_id, fetch_transactions):
+            shopify.ShopifyResource.set_site(site)
+            shopify.ShopifyResource.set_user(user)
+            shopify.ShopifyResource.set_password(password)
+            details = {"shopify.order.risks": shopify.OrderRisk.find_data(order_id=order_id)}
+            if fetch_transactions:
+                details["shopify.order.transactions"] = shopify.Transaction.find_data(order_id=order_id)
+            return details
+
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for order_id, order_response in orders.items():
+                if order_id in existing_order_ids:
+                    continue
+                fetch_transactions = len(order_response.get('payment_gateway_names') or []) > 1
+                futures[order_id] = executor.submit(fetch_details, order_id, fetch_transactions)
+        for order_id, future in futures.items():
+            try:
+                details = future.result()
+            except Exception as error:
+                _logger.info("Risks and transactions of Shopify order %s are not prefetched: %s" % (order_id, error))
+                continue
+            for key, records in details.items():
+                order_cache.set((key, order_id), list(records))
+        return True
+
     def update_warehouse_shopify_order(self, shopify_location, warehouse_id, pos_order):
         return {'shopify_location_id': shopify_location and shopify_location.id or False,
                 "warehouse_id": warehouse_id,
@@ -115,13 +183,14 @@ class SaleOrder(models.Model):
         """
         comman_log_line_obj = self.env["common.log.lines.ept"]
         res_partner_obj = self.env["res.partner"]
-        shopify_location = shopify_location_obj = self.env["shopify.location.ept"]
+        shopify_location = self.env["shopify.location.ept"]
+        order_cache = self.get_shopify_order_cache()
         instance = order_data_queue_line.shopify_instance_id
         order_data = order_data_queue_line.order_data
         order_response = json.loads(order_data)
         order_response = order_response.get('order')
         model = "sale.order"
-        model_id = comman_log_line_obj.get_model_id(model)
+        model_id = order_cache.get_model_id(model)
         instance.connect_in_shopify()
         shopify_financial_status = order_response.get("financial_status")
         _logger.info('Start process of shopify order(%s) and order id is(%s) '
@@ -207,10 +276,7 @@ class SaleOrder(models.Model):
             return False
         shopify_location_id = order_response.get('location_id') or False
         if shopify_location_id:
-            shopify_location = shopify_location_obj.search(
-                [('shopify_location_id', '=', shopify_location_id),
-                 ('instance_id', '=', instance.id)],
-                limit=1)
+            shopify_location = order_cache.get_shopify_location(instance, shopify_location_id)
         order_id = self.shopify_create_order(instance, partner, shipping_address, invoice_address,
                                              order_data_queue_line, order_response, log_book_id)
         if not order_id:
@@ -227,7 +293,8 @@ class SaleOrder(models.Model):
             warehouse_id = instance.shopify_warehouse_id.id
         order_id.write(order_id.update_warehouse_shopify_order(shopify_location, warehouse_id, pos_order))
 
-        risk_result = shopify.OrderRisk().find(order_id=order_response.get('id'))
+        risk_result = order_cache.get(("shopify.order.risks", str(order_response.get('id'))),
+                                      lambda: shopify.OrderRisk().find(order_id=order_response.get('id')))
         if risk_result:
             self.env["shopify.order.risk"].shopify_create_risk_in_order(risk_result, order_id)
         _logger.info('Creating order line for Odoo order(%s) and Shopify order is (%s)' % (
@@ -268,7 +335,7 @@ class SaleOrder(models.Model):
         # if order:
         #     order.fulfilled_shopify_order()
         message = ""
-        customer_loc = self.env['stock.location'].search([('usage', '=', 'customer')], limit=1)
+        customer_loc = order_cache.get_customer_location()
         if order_response.get('fulfillment_status') == 'fulfilled':
             order_id.auto_workflow_process_id.shipped_order_workflow(order_id, customer_loc)
             # Below code add for create partially/fully refund
@@ -279,7 +346,7 @@ class SaleOrder(models.Model):
         _logger.info('Done auto workflow process for Odoo order(%s) and Shopify order is (%s)'
                      % (order_id.name, order_response.get('order_number')))
         if message and order_data_queue_line:
-            model_id = comman_log_line_obj.get_model_id(self._name)
+            model_id = order_cache.get_model_id(self._name)
             comman_log_line_obj.shopify_create_order_log_line(message, model_id,
                                                               order_data_queue_line, log_book_id)
             order_data_queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
@@ -339,7 +406,7 @@ class SaleOrder(models.Model):
         @author: Nimesh Jethva @Emipro Technologies Pvt. Ltd on date 30/12/2020.
         Task Id : 169363
         """
-        is_mrp_install = self.env['ir.module.module'].sudo().search([('name', '=', 'mrp'), ('state', '=', 'installed')])
+        is_mrp_install = self.get_shopify_order_cache().is_mrp_installed()
         picking_obj = self.env['stock.picking']
 
         for line in order_id.order_line.filtered(
@@ -354,7 +421,7 @@ class SaleOrder(models.Model):
 
     def shopify_create_and_done_stock_move_ept(self, line, order_id, bom_line=False):
         """prepare and create values for stock move"""
-        customer_loc = self.env['stock.location'].search([('usage', '=', 'customer')], limit=1)
+        customer_loc = self.get_shopify_order_cache().get_customer_location()
 
         product_qty = line.product_uom_qty - line.shopify_fulfillable_quantity
         product_id = bom_line[0].product_id.id if bom_line else line.product_id.id
@@ -433,7 +500,7 @@ class SaleOrder(models.Model):
         shopify_product_template_obj = self.env['shopify.product.template.ept']
         comman_log_line_obj = self.env["common.log.lines.ept"]
         model = "sale.order"
-        model_id = comman_log_line_obj.get_model_id(model)
+        model_id = self.get_shopify_order_cache().get_model_id(model)
         mismatch = False
         for line in lines:
             if line.get('fulfillment_service') == 'gift_card' or line.get('name') == 'Tip':
@@ -594,9 +661,25 @@ class SaleOrder(models.Model):
         order currency different then the erp currency so we need to set proper pricelist for that sale order
         otherwise set pricelist  based on instance configurations
         """
+        order_currency = order_response.get('currency') or False
+        if order_currency:
+            return self.get_shopify_order_cache().get(
+                ("product.pricelist", order_currency),
+                lambda: self.shopify_search_pricelist_by_currency(instance, order_currency), instance)
+        else:
+            pricelist = instance.shopify_pricelist_id if instance.shopify_pricelist_id else False
+            return pricelist
+
+    def shopify_search_pricelist_by_currency(self, instance, order_currency):
+        """
+        This method is used to search the pricelist of the order currency, the archived currency is
+        activated and its pricelist is created when needed.
+        @param instance: Record of the instance.
+        @param order_currency: Currency code of the order.
+        @return: Record of pricelist or False.
+        """
         currency_obj = self.env['res.currency']
         pricelist_obj = self.env['product.pricelist']
-        order_currency = order_response.get('currency') or False
         if order_currency:
             currency = currency_obj.search([('name', '=', order_currency)])
             if not currency:
@@ -726,6 +809,7 @@ class SaleOrder(models.Model):
         """
         tax_id = []
         taxes = []
+        order_cache = self.get_shopify_order_cache()
         company = instance.shopify_warehouse_id.company_id
         for tax in tax_lines:
             rate = float(tax.get('rate', 0.0))
@@ -739,13 +823,15 @@ class SaleOrder(models.Model):
                     name = '%s_(%s %s included)_%s' % (title, str(rate), '%', company.name)
                 else:
                     name = '%s_(%s %s excluded)_%s' % (title, str(rate), '%', company.name)
-                acctax_id = self.env['account.tax'].search(
+                tax_key = ("account.tax", name, tax_included, rate)
+                acctax_id = order_cache.get(tax_key, lambda: self.env['account.tax'].search(
                     [('price_include', '=', tax_included), ('type_tax_use', '=', 'sale'),
                      ('amount', '=', rate), ('name', '=', name),
-                     ('company_id', '=', instance.shopify_warehouse_id.company_id.id)], limit=1)
+                     ('company_id', '=', instance.shopify_warehouse_id.company_id.id)], limit=1), instance)
                 if not acctax_id:
                     acctax_id = self.shopify_create_account_tax(instance, rate, tax_included,
                                                                 company, name)
+                    order_cache.set(tax_key, acctax_id, instance)
                 if acctax_id:
                     taxes.append(acctax_id.id)
         if taxes:
@@ -780,10 +866,12 @@ class SaleOrder(models.Model):
             Task_id: 181893 - Shopify fixes as per the new version.
         """
         payment_gateway_obj = self.env["shopify.payment.gateway.ept"]
-        transactions = shopify.Transaction().find(order_id=order_response.get('id'))
+        transactions = self.get_shopify_order_cache().get(
+            ("shopify.order.transactions", str(order_response.get('id'))),
+            lambda: shopify.Transaction().find(order_id=order_response.get('id')))
         payment_list_vals = []
         for transaction in transactions:
-            result = transaction.to_dict()
+            result = transaction.to_dict() if hasattr(transaction, 'to_dict') else transaction
             if result.get('kind') in ['capture', 'sale'] and result.get('status') == 'success':
                 payment_transaction_id = result.get('id')
                 gateway = result.get('gateway')
@@ -834,6 +922,27 @@ class SaleOrder(models.Model):
             return carrier_name
         return ''
 
+    def get_shopify_order_states(self, shopify_order_ids):
+        """
+        This method is used to get the fulfillment and cancel status of many Shopify orders, the orders
+        are requested by 250 ids in one call instead of one call per order.
+        The orders of a failed request are not in the result, so they can be requested one by one.
+        @param shopify_order_ids: List of Shopify order ids.
+        @return: Dictionary of {shopify order id: order data}.
+        """
+        order_states = {}
+        shopify_order_ids = list({str(order_id) for order_id in shopify_order_ids if order_id})
+        for order_ids in split_every(250, shopify_order_ids, list):
+            try:
+                orders = shopify.Order.find_data(ids=",".join(order_ids), status="any", limit=250,
+                                                 fields="id,fulfillment_status,cancelled_at,cancel_reason")
+            except Exception as error:
+                _logger.info("Order status could not be fetched for %s orders: %s" % (len(order_ids), error))
+                continue
+            for order in orders:
+                order_states[str(order.get('id'))] = order
+        return order_states
+
     def update_order_status_in_shopify(self, instance):
         log_line_array = []
         comman_log_line_obj = self.env["common.log.lines.ept"]
@@ -854,6 +963,8 @@ class SaleOrder(models.Model):
                 , ('is_manually_action_shopify_fulfillment', '=', False)],
             order='id desc').ids
         gift_card_product_id = instance.gift_card_product_id
+        shopify_order_states = self.get_shopify_order_states(
+            stock_picking_obj.browse(picking_ids).mapped('sale_id.shopify_order_id'))
         picking_count = 0
         for picking_id in picking_ids:
             picking = stock_picking_obj.browse(picking_id)
@@ -870,8 +981,10 @@ class SaleOrder(models.Model):
             carrier_name = self.get_shopify_carrier_code(picking)
             sale_order = picking.sale_id
             try:
-                order = shopify.Order.find(sale_order.shopify_order_id)
-                order_data = order.to_dict()
+                order_data = shopify_order_states.get(str(sale_order.shopify_order_id))
+                if order_data is None:
+                    order = shopify.Order.find(sale_order.shopify_order_id)
+                    order_data = order.to_dict()
                 _logger.info(order_data.get('fulfillment_status'))
 
                 if order_data.get('fulfillment_status') == 'fulfilled':
@@ -1047,6 +1160,9 @@ class SaleOrder(models.Model):
                 if shopify_fullment_result:
                     fulfillment_id = shopify_fullment_result.get('fulfillment').get('id') or ''
             picking.write({'updated_in_shopify': True, 'shopify_fulfillment_id': fulfillment_id})
+            # The fetched state is outdated by the new fulfillment, the next picking of the order fetches
+            # the order again.
+            shopify_order_states.pop(str(sale_order.shopify_order_id), None)
 
         if len(log_line_array) > 0:
             shopify_product_obj.create_log(log_line_array, "export", instance)
@@ -1136,7 +1252,7 @@ class SaleOrder(models.Model):
         if message:
             comman_log_line_obj = self.env["common.log.lines.ept"]
             model = "sale.order"
-            model_id = comman_log_line_obj.get_model_id(model)
+            model_id = self.get_shopify_order_cache().get_model_id(model)
             comman_log_line_obj.shopify_create_order_log_line(message, model_id,
                                                               queue_line, log_book)
             queue_line.write({'state': 'failed', 'processed_at': datetime.now()})
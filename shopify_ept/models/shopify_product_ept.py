@@ -3,6 +3,8 @@ import time
 from datetime import datetime
 from odoo.exceptions import Warning
 from .. import shopify
+from ..shopify import pyactiveresource
+from ..shopify.inventory import InventoryBulkSetter, GraphQLUnavailable
 
 _logger = logging.getLogger(__name__)
 
@@ -14,6 +16,9 @@ class ShopifyProductProductEpt(models.Model):
     _description = 'Shopify Product Product Ept'
     _order = 'sequence'
 
+    # Number of imported stock lines added to the inventory adjustment at once.
+    shopify_stock_import_chunk_size = 1000
+
     producturl = fields.Text("Product URL")
     sequence = fields.Integer("Position", default=1)
     name = fields.Char("Title")
@@ -763,6 +768,7 @@ class ShopifyProductProductEpt(models.Model):
         comman_log_line_obj = self.env["common.log.lines.ept"]
         model = "shopify.product.product.ept"
         product_obj = self.env['product.product']
+        stock_ledger_obj = self.env['shopify.stock.ledger.ept']
         model_id = comman_log_line_obj.get_model_id(model)
         all_products = self.search([('shopify_instance_id', '=', instance.id), ('exported_in_shopify', '=', True),
                                     ('product_id', 'in', products)], order='last_stock_update_date')
@@ -794,12 +800,8 @@ class ShopifyProductProductEpt(models.Model):
             product_ids = shopify_products.mapped('product_id')
             export_product_stock = self.check_stock_type(instance, product_ids, product_obj,
                                                          location_id.export_stock_warehouse_ids)
-            commit_count = 0
+            stock_rows = []
             for shopify_product in shopify_products:
-                if commit_count == 50:
-                    self._cr.commit()
-                    commit_count = 0
-                commit_count += 1
                 odoo_product = shopify_product.product_id
                 if odoo_product.type == 'product':
                     if not shopify_product.inventory_item_id:
@@ -808,34 +810,54 @@ class ShopifyProductProductEpt(models.Model):
                                       shopify_product.id, shopify_product.name, instance.name)
                         log_line_array = self.shopify_create_log(message, model_id, odoo_product, log_line_array)
                         continue
-                    quantity = export_product_stock.get(odoo_product.id, 0.0)
-                    try:
-                        _logger.info('Exporting product stock: %s of shopify product default code:%s' % (str(quantity),
-                                                                                                         shopify_product.default_code))
-                        shopify.InventoryLevel.set(location_id.shopify_location_id, shopify_product.inventory_item_id,
-                                                   int(quantity))
-                    except Exception as e:
-                        if e.response.code == 429 and e.response.msg == "Too Many Requests":
-                            time.sleep(int(float(e.response.headers.get('Retry-After', 5))))
-                            try:
-                                shopify.InventoryLevel.set(location_id.shopify_location_id,
-                                                           shopify_product.inventory_item_id,
-                                                           int(quantity))
-                            except Exception as error:
-                                message = "Error while Export stock for Product ID: %s & Product Name: '%s' for instance: '%s'\nError: %s" % (
-                                    odoo_product.id, odoo_product.name, instance.name,
-                                    str(error.response.code) + " " + error.response.msg)
-                                log_line_array = self.shopify_create_log(message, model_id, odoo_product, log_line_array)
-                            continue
-                        else:
+                    stock_rows.append({'inventory_item_id': shopify_product.inventory_item_id,
+                                       'location_id': location_id.shopify_location_id,
+                                       'quantity': int(export_product_stock.get(odoo_product.id, 0.0)),
+                                       'shopify_product': shopify_product})
+            stock_rows = self.shopify_filter_unchanged_stock_rows(location_id, stock_rows, last_export_date)
+            if instance.shopify_stock_export_api == 'graphql':
+                stock_rows, log_line_array = self.shopify_export_stock_graphql(instance, location_id, stock_rows,
+                                                                               model_id, log_line_array,
+                                                                               last_export_date)
+            commit_count = 0
+            exported_quantities = {}
+            for stock_row in stock_rows:
+                if commit_count == 50:
+                    stock_ledger_obj.set_last_exported_quantities(location_id, exported_quantities)
+                    exported_quantities = {}
+                    self._cr.commit()
+                    commit_count = 0
+                commit_count += 1
+                shopify_product = stock_row['shopify_product']
+                odoo_product = shopify_product.product_id
+                quantity = stock_row['quantity']
+                try:
+                    _logger.info('Exporting product stock: %s of shopify product default code:%s' % (str(quantity),
+                                                                                                     shopify_product.default_code))
+                    shopify.InventoryLevel.set(location_id.shopify_location_id, shopify_product.inventory_item_id,
+                                               int(quantity))
+                except Exception as e:
+                    if e.response.code == 429 and e.response.msg == "Too Many Requests":
+                        time.sleep(int(float(e.response.headers.get('Retry-After', 5))))
+                        try:
+                            shopify.InventoryLevel.set(location_id.shopify_location_id,
+                                                       shopify_product.inventory_item_id,
+                                                       int(quantity))
+                        except Exception as error:
                             message = "Error while Export stock for Product ID: %s & Product Name: '%s' for instance: '%s'\nError: %s" % (
                                 odoo_product.id, odoo_product.name, instance.name,
-                                str(e.response.code) + " " + e.response.msg)
+                                str(error.response.code) + " " + error.response.msg)
                             log_line_array = self.shopify_create_log(message, model_id, odoo_product, log_line_array)
-                            continue
-                    if not self._context.get('is_process_from_selected_product'):
-                        shopify_product.write({
-                            'last_stock_update_date': last_export_date if not shopify_product.last_stock_update_date else datetime.now()})
+                        continue
+                    else:
+                        message = "Error while Export stock for Product ID: %s & Product Name: '%s' for instance: '%s'\nError: %s" % (
+                            odoo_product.id, odoo_product.name, instance.name,
+                            str(e.response.code) + " " + e.response.msg)
+                        log_line_array = self.shopify_create_log(message, model_id, odoo_product, log_line_array)
+                        continue
+                exported_quantities[stock_row['inventory_item_id']] = quantity
+                self.shopify_update_last_stock_update_date(shopify_product, last_export_date)
+            stock_ledger_obj.set_last_exported_quantities(location_id, exported_quantities)
 
         if len(log_line_array) > 0:
             self.create_log(log_line_array, "export", instance)
@@ -846,6 +868,88 @@ class ShopifyProductProductEpt(models.Model):
             return False
         return all_products
 
+    def shopify_update_last_stock_update_date(self, shopify_product, last_export_date):
+        """
+        Write the last stock update date of the exported Shopify product, it is not written when
+        the stock is exported for the selected products only.
+        """
+        if not self._context.get('is_process_from_selected_product'):
+            shopify_product.write({
+                'last_stock_update_date': last_export_date if not shopify_product.last_stock_update_date else datetime.now()})
+        return True
+
+    def shopify_filter_unchanged_stock_rows(self, location, stock_rows, last_export_date):
+        """
+        Remove the stock rows having the same quantity as the last export to the location, their
+        last stock update date is written as they are up to date in Shopify.
+        All rows are kept when the stock is exported for the selected products, so the user can
+        send the stock again.
+        :param location: Record of the Shopify location.
+        :param stock_rows: List of dict with inventory_item_id, location_id, quantity and shopify_product.
+        :param last_export_date: Date written in the last stock update date of the skipped products.
+        :return: Stock rows to export.
+        """
+        if self._context.get('is_process_from_selected_product'):
+            return stock_rows
+        last_quantities = self.env['shopify.stock.ledger.ept'].get_last_exported_quantities(location)
+        changed_rows = []
+        for stock_row in stock_rows:
+            last_quantity = last_quantities.get(str(stock_row['inventory_item_id']))
+            if last_quantity is not None and int(last_quantity) == stock_row['quantity']:
+                self.shopify_update_last_stock_update_date(stock_row['shopify_product'], last_export_date)
+                continue
+            changed_rows.append(stock_row)
+        _logger.info("Stock of %s products is changed for Shopify location %s, %s products are skipped" % (
+            len(changed_rows), location.name, len(stock_rows) - len(changed_rows)))
+        return changed_rows
+
+    def shopify_export_stock_graphql(self, instance, location, stock_rows, model_id, log_line_array,
+                                     last_export_date):
+        """
+        Export the stock rows with bulk GraphQL inventory mutations, the chunk size is taken
+        from the instance. The errors of the rows are added in the log lines.
+        When the shop can not be updated with GraphQL, the rows which are not sent yet are returned
+        so they are exported with the REST API.
+        :param instance: Record of the instance.
+        :param location: Record of the Shopify location.
+        :param stock_rows: List of dict with inventory_item_id, location_id, quantity and shopify_product.
+        :param model_id: Id of the model for the log lines.
+        :param log_line_array: List of the log line vals.
+        :param last_export_date: Date written in the last stock update date of the exported products.
+        :return: Rows to export with REST, log_line_array
+        """
+        try:
+            stock_setter = InventoryBulkSetter(instance.shopify_stock_export_chunk_size)
+        except Exception as error:
+            _logger.info("GraphQL is not available for instance %s, stock is exported with REST: %s" % (
+                instance.name, error))
+            return stock_rows, log_line_array
+        chunk_size = stock_setter.chunk_size
+        for start in range(0, len(stock_rows), chunk_size):
+            chunk = stock_rows[start:start + chunk_size]
+            try:
+                errors = stock_setter.set_quantities(chunk)
+            except GraphQLUnavailable as error:
+                _logger.info("GraphQL stock export failed for instance %s, remaining stock is exported with "
+                             "REST: %s" % (instance.name, error))
+                return stock_rows[start:], log_line_array
+            exported_quantities = {}
+            for index, stock_row in enumerate(chunk):
+                shopify_product = stock_row['shopify_product']
+                if index in errors:
+                    odoo_product = shopify_product.product_id
+                    message = "Error while Export stock for Product ID: %s & Product Name: '%s' for instance: '%s'\nError: %s" % (
+                        odoo_product.id, odoo_product.name, instance.name, errors[index])
+                    log_line_array = self.shopify_create_log(message, model_id, odoo_product, log_line_array)
+                    continue
+                exported_quantities[stock_row['inventory_item_id']] = stock_row['quantity']
+                self.shopify_update_last_stock_update_date(shopify_product, last_export_date)
+            self.env['shopify.stock.ledger.ept'].set_last_exported_quantities(location, exported_quantities)
+            _logger.info("Exported stock of %s Shopify products with GraphQL for instance %s" % (
+                len(chunk) - len(errors), instance.name))
+            self._cr.commit()
+        return [], log_line_array
+
     def check_stock_type(self, instance, product_ids, prod_obj, warehouse):
         """
         This Method relocates check type of stock.
@@ -881,10 +985,12 @@ class ShopifyProductProductEpt(models.Model):
         @author: Angel Patel @Emipro Technologies Pvt. Ltd.
         """
         comman_log_line_obj = self.env["common.log.lines.ept"]
+        product_obj = self.env['product.product']
         model = "shopify.product.product.ept"
         model_id = comman_log_line_obj.get_model_id(model)
         log_line_array = []
-        templates = self.search([('shopify_instance_id', '=', instance.id), ('exported_in_shopify', '=', True)])
+        templates = self.search([('shopify_instance_id', '=', instance.id), ('exported_in_shopify', '=', True)],
+                                limit=1)
         invetory_adjustments = self.env['stock.inventory'].search(
             [('is_shopify_product_adjustment', '=', True), ('state', '!=', 'done')])
         for invetory_adjustment in invetory_adjustments:
@@ -902,6 +1008,14 @@ class ShopifyProductProductEpt(models.Model):
                 _logger.info(message)
                 return False
 
+            # One query for all the products of the instance, the inventory levels are matched from memory.
+            inventory_item_products = {}
+            for shopify_product in self.search_read([('shopify_instance_id', '=', instance.id),
+                                                     ('exported_in_shopify', '=', True),
+                                                     ('inventory_item_id', '!=', False)],
+                                                    ['inventory_item_id', 'product_id']):
+                inventory_item_products.setdefault(str(shopify_product['inventory_item_id']),
+                                                   shopify_product['product_id'][0])
             for location_id in location_ids:
                 stock_inventory_array = []
                 shopify_location_warehouse = location_id.import_stock_warehouse_id or False
@@ -911,78 +1025,75 @@ class ShopifyProductProductEpt(models.Model):
                     _logger.info(message)
                     continue
 
+                inventory_level_count = 0
+                inventory = False
+                stock_location = location_id.import_stock_warehouse_id.lot_stock_id
                 try:
-                    inventory_levels = shopify.InventoryLevel.find(location_ids=location_id.shopify_location_id,
-                                                                   limit=250)
-                    if len(inventory_levels) >= 250:
-                        inventory_levels = self.shopify_list_all_inventoryLevel(inventory_levels)
-                except Exception as e:
+                    inventory_levels = shopify.InventoryLevel.find_data(location_ids=location_id.shopify_location_id,
+                                                                        limit=250)
+                    for inventory_level_page in self.shopify_list_all_inventoryLevel(inventory_levels):
+                        inventory_level_count += len(inventory_level_page)
+                        for inventory_level in inventory_level_page:
+                            product_id = inventory_item_products.get(str(inventory_level.get('inventory_item_id')))
+                            if product_id:
+                                stock_inventory_line = {
+                                    'product_id': product_obj.browse(product_id),
+                                    'location_id': stock_location.id,
+                                    'product_qty': inventory_level.get('available')
+                                }
+                                stock_inventory_array.append(stock_inventory_line)
+                        if len(stock_inventory_array) >= self.shopify_stock_import_chunk_size:
+                            inventory = self.shopify_create_stock_inventory_lines(inventory, stock_inventory_array,
+                                                                                 stock_location)
+                            stock_inventory_array = []
+                except pyactiveresource.connection.Error as e:
                     message = "Error while import stock for instance %s\nError: %s" % (
-                        instance.name, str(e.response.code) + " " + e.response.msg)
+                        instance.name, str(e.code) + " " + str(e))
                     log_line_array = self.shopify_create_log(message, model_id, False, log_line_array)
                     _logger.info(message)
                     self.create_log(log_line_array, "import", instance)
                     return False
-                _logger.info("Length of the total inventory item id : %s" % len(inventory_levels))
-                for inventory_level in inventory_levels:
-                    inventory_level = inventory_level.to_dict()
-                    inventory_item_id = inventory_level.get('inventory_item_id')
-                    qty = inventory_level.get('available')
-                    shopify_product = self.env['shopify.product.product.ept'].search(
-                        [('inventory_item_id', '=', inventory_item_id), ('exported_in_shopify', '=', True),
-                         ('shopify_instance_id', '=', instance.id)], limit=1)
-                    if shopify_product:
-                        stock_inventory_line = {
-                            'product_id': shopify_product.product_id,
-                            'location_id': location_id.import_stock_warehouse_id.lot_stock_id.id,
-                            'product_qty': qty
-                        }
-                        stock_inventory_array.append(stock_inventory_line)
+                _logger.info("Length of the total inventory item id : %s" % inventory_level_count)
                 if len(stock_inventory_array) > 0:
-                    inventory = self.env['stock.inventory'].create_stock_inventory(stock_inventory_array,
-                                                                                   location_id.import_stock_warehouse_id.lot_stock_id,
-                                                                                   False)
-                    if inventory:
-                        inventory_name = 'Inventory For Instance "%s" And Shopify Location "%s"' % (
-                            (instance.name) + ' ' + datetime.now().strftime('%d-%m-%Y'), location_id.name)
-                        inventory.is_shopify_product_adjustment = True
-                        inventory.name = inventory_name
-                        instance.inventory_adjustment_id = inventory.id
+                    inventory = self.shopify_create_stock_inventory_lines(inventory, stock_inventory_array,
+                                                                         stock_location)
+                if inventory:
+                    inventory_name = 'Inventory For Instance "%s" And Shopify Location "%s"' % (
+                        (instance.name) + ' ' + datetime.now().strftime('%d-%m-%Y'), location_id.name)
+                    inventory.is_shopify_product_adjustment = True
+                    inventory.name = inventory_name
+                    instance.inventory_adjustment_id = inventory.id
 
         if len(log_line_array) > 0:
             self.create_log(log_line_array, "import", instance)
 
         return True
 
+    def shopify_create_stock_inventory_lines(self, inventory, stock_inventory_array, stock_location):
+        """
+        Create the inventory adjustment with the first chunk of imported stock lines, the next chunks are
+        added in the same inventory adjustment.
+        :param inventory: Record of the inventory adjustment or False for the first chunk.
+        :param stock_inventory_array: List of dict with product_id, location_id and product_qty.
+        :param stock_location: Stock location of the import warehouse.
+        :return: Record of the inventory adjustment.
+        """
+        if not inventory:
+            return self.env['stock.inventory'].create_stock_inventory(stock_inventory_array, stock_location, False)
+        inventory.write({'product_ids': [(4, line['product_id'].id) for line in stock_inventory_array]})
+        inventory.create_inventory_lines(stock_inventory_array, stock_location)
+        return inventory
+
     def shopify_list_all_inventoryLevel(self, result):
         """
             This method used to call the page wise data import for product stock from Shopify to Odoo.
+            It yields one page at a time, so the inventory levels of the previous pages are not kept in memory.
             @param : self, result, shopify_location_id
             @author: Angel Patel @Emipro Technologies Pvt. Ltd on date 21/12/2019.
             Modify by Haresh Mori on 28/12/2019 API and Pagination changes
         """
-        sum_inventory_list = []
-        catch = ""
-        while result:
-            page_info = ""
-            sum_inventory_list += result
-            link = shopify.ShopifyResource.connection.response.headers.get('Link')
-            if not link or not isinstance(link, str):
-                return sum_inventory_list
-            for page_link in link.split(','):
-                if page_link.find('next') > 0:
-                    page_info = page_link.split(';')[0].strip('<>').split('page_info=')[1]
-                    try:
-                        result = shopify.InventoryLevel.find(page_info=page_info, limit=250)
-                    except Exception as e:
-                        if e.response.code == 429 and e.response.msg == "Too Many Requests":
-                            time.sleep(int(float(e.response.headers.get('Retry-After', 5))))
-                            result = shopify.InventoryLevel.find(page_info=page_info, limit=250)
-                        else:
-                            raise Warning(e)
-            if catch == page_info:
-                break
-        return sum_inventory_list
+        for page in shopify.PaginatedIterator(result):
+            yield page
 
     def shopify_create_log(self, message=False, model_id=False, product=False, log_line_array=False):
         """
@@ -1,10 +1,7 @@
-import base64
-import hashlib
 import json
 import logging
 import time
 from datetime import datetime
-import requests
 from dateutil import parser
 import pytz
 
@@ -544,15 +541,29 @@ class ShopifyProductTemplateEpt(models.Model):
         """
         common_product_image_obj = self.env["common.product.image.ept"]
         shopify_product_image_obj = shopify_product_images = self.env["shopify.product.image.ept"]
-        existing_common_template_images = {}
         is_template_image_set = True if self.product_tmpl_id.image_1920 else False
-        for odoo_image in self.product_tmpl_id.ept_image_ids:
-            if not odoo_image.image:
-                continue
-            key = hashlib.md5(odoo_image.image).hexdigest()
-            if not key:
-                continue
-            existing_common_template_images.update({key: odoo_image.id})
+        # The images already held are found by their stored md5, so a known image is linked again
+        # instead of being stored twice.
+        existing_common_template_images = common_product_image_obj.get_image_ids_by_md5(
+            [('template_id', '=', self.product_tmpl_id.id)])
+        # Download at once and concurrently the images which are not linked yet with this template.
+        linked_image_ids = {image['shopify_image_id'] for image in shopify_product_image_obj.search_read(
+            [("shopify_template_id", "=", self.id)], ['shopify_image_id'])}
+        fetched_images = common_product_image_obj.fetch_images(
+            [image.get('src') for image in response_template.get('images', {})
+             if image.get('src') and str(image.get('id')) not in linked_image_ids])
+
+        def get_fetched_image(url):
+            """
+            Returns the image of the url and its md5, (False, False) when it can not be downloaded.
+            """
+            if url not in fetched_images:
+                fetched_images.update(common_product_image_obj.fetch_images([url]))
+            fetched_image = fetched_images.get(url)
+            if not fetched_image or not fetched_image.image:
+                return False, False
+            return fetched_image.image, fetched_image.md5
+
         for image in response_template.get('images', {}):
             if image.get('src'):
                 shopify_image_id = str(image.get('id'))
@@ -567,10 +578,8 @@ class ShopifyProductTemplateEpt(models.Model):
                          ("shopify_image_id", "=", shopify_image_id)])
                     if not shopify_product_image:
                         try:
-                            response = requests.get(url, stream=True, verify=False, timeout=10)
-                            if response.status_code == 200:
-                                image = base64.b64encode(response.content)
-                                key = hashlib.md5(image).hexdigest()
+                            image, key = get_fetched_image(url)
+                            if image:
                                 if key in existing_common_template_images.keys():
                                     shopify_product_image = shopify_product_image_obj.create(
                                         {"shopify_template_id": self.id,
@@ -587,6 +596,8 @@ class ShopifyProductTemplateEpt(models.Model):
                                              "template_id": self.product_tmpl_id.id,
                                              "image": image,
                                              "url": url})
+                                    if common_product_image:
+                                        existing_common_template_images[key] = common_product_image[:1].id
                                     shopify_product_image = shopify_product_image_obj.search([
                                         ("shopify_template_id", "=", self.id),
                                         ("odoo_image_id", "=", common_product_image.id)])
@@ -600,24 +611,16 @@ class ShopifyProductTemplateEpt(models.Model):
                     """For Variant Images."""
                     shopify_products = self.shopify_product_ids.filtered(lambda x: int(x.variant_id) in variant_ids)
                     for shopify_product in shopify_products:
-                        existing_common_variant_images = {}
-                        for odoo_image in shopify_product.product_id.ept_image_ids:
-                            if not odoo_image.image:
-                                continue
-                            key = hashlib.md5(odoo_image.image).hexdigest()
-                            if not key:
-                                continue
-                            existing_common_variant_images.update({key: odoo_image.id})
+                        existing_common_variant_images = common_product_image_obj.get_image_ids_by_md5(
+                            [('product_id', '=', shopify_product.product_id.id)])
 
                         shopify_product_image = shopify_product_image_obj.search(
                             [("shopify_variant_id", "=", shopify_product.id),
                              ("shopify_image_id", "=", shopify_image_id)])
                         if not shopify_product_image:
                             try:
-                                response = requests.get(url, stream=True, verify=False, timeout=10)
-                                if response.status_code == 200:
-                                    image = base64.b64encode(response.content)
-                                    key = hashlib.md5(image).hexdigest()
+                                image, key = get_fetched_image(url)
+                                if image:
                                     if key in existing_common_variant_images.keys():
                                         shopify_product_image = shopify_product_image_obj.create(
                                             {"shopify_template_id": self.id,
@@ -746,6 +749,9 @@ class ShopifyProductTemplateEpt(models.Model):
         :param variant_id : It is the id of the product variant and its type is Integer
         :return : It will returns the odoo product and shopify product if it is exists
         """
+        variant_matcher = self._context.get('shopify_variant_matcher')
+        if variant_matcher and variant_matcher.instance == shopify_instance:
+            return variant_matcher.search(product_sku, variant_id, barcode, s_template_id)
         odoo_product = self.env['product.product']
         shopify_product_obj = self.env['shopify.product.product.ept']
         shopify_product = shopify_product_obj.search(
@@ -0,0 +1,48 @@
+from odoo import models, fields
+
+
+class ShopifyStockLedgerEpt(models.Model):
+    _name = "shopify.stock.ledger.ept"
+    _description = "Shopify Last Exported Stock"
+
+    shopify_instance_id = fields.Many2one("shopify.instance.ept", "Instance", required=True, ondelete="cascade")
+    shopify_location_id = fields.Many2one("shopify.location.ept", "Shopify Location", required=True,
+                                          ondelete="cascade")
+    inventory_item_id = fields.Char("Inventory Item Id", required=True)
+    quantity = fields.Float("Last Exported Quantity", digits=0,
+                            help="Quantity sent to Shopify by the last stock export.")
+
+    _sql_constraints = [('unique_inventory_item_location', 'unique(shopify_location_id,inventory_item_id)',
+                         "Inventory item must be unique per Shopify location.")]
+
+    def get_last_exported_quantities(self, location):
+        """
+        This method is used to get the quantities sent by the last stock exports of a location.
+        @param location: Record of the Shopify location.
+        @return: Dictionary of {inventory_item_id: quantity}.
+        """
+        self._cr.execute("""select inventory_item_id, quantity from shopify_stock_ledger_ept
+            where shopify_location_id = %s""", (location.id,))
+        return dict(self._cr.fetchall())
+
+    def set_last_exported_quantities(self, location, quantities):
+        """
+        This method is used to store the quantities exported to a location, one query is used for
+        all the inventory items.
+        @param location: Record of the Shopify location.
+        @param quantities: Dictionary of {inventory_item_id: quantity}.
+        """
+        if not quantities:
+            return True
+        values = [(location.instance_id.id, location.id, str(inventory_item_id), quantity, self.env.uid,
+                   self.env.uid) for inventory_item_id, quantity in quantities.items()]
+        rows = ",".join(self._cr.mogrify("(%s,%s,%s,%s,%s,%s,now() at time zone 'UTC',now() at time zone 'UTC')",
+                                         value).decode() for value in values)
+        self._cr.execute("""insert into shopify_stock_ledger_ept
+            (shopify_instance_id, shopify_location_id, inventory_item_id, quantity, create_uid, write_uid,
+             create_date, write_date)
+            values %s
+            on conflict (shopify_location_id, inventory_item_id)
+            do update set quantity = excluded.quantity, write_uid = excluded.write_uid,
+            write_date = excluded.write_date""" % rows)
+        return True
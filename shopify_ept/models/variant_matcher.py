@@ -0,0 +1,150 @@
+class ShopifyVariantMatcher(object):
+    """
+    Finds the Shopify and Odoo products of the variants of a product queue batch from memory.
+
+    The Shopify products of the instance and the Odoo products having the SKUs and barcodes of
+    the batch are read once, then every variant is matched with the same rules as
+    shopify.product.template.ept.shopify_search_odoo_product_variant. The records created while the
+    batch is processed are read before the variants of the next template are matched.
+    """
+
+    def __init__(self, env, instance, skus=(), barcodes=()):
+        self.env = env
+        self.instance = instance
+        self.skus = {sku for sku in skus if sku}
+        self.barcodes = {barcode for barcode in barcodes if barcode}
+        self.shopify_by_variant = {}
+        self.shopify_by_sku = {}
+        self.shopify_by_product_sku = {}
+        self.shopify_by_product_barcode = {}
+        self.product_by_sku = {}
+        self.product_by_barcode = {}
+        self.shopify_tmpl_ids = {}
+        self._searched_products = {}
+        self._last_shopify_product_id = 0
+        self._last_shopify_template_id = 0
+        self._last_product_id = 0
+        self._current_template = None
+        self._load_records()
+
+    def _load_records(self):
+        shopify_template_domain = [("shopify_instance_id", "=", self.instance.id),
+                                   ("id", ">", self._last_shopify_template_id)]
+        for template in self.env["shopify.product.template.ept"].search_read(shopify_template_domain,
+                                                                            ["shopify_tmpl_id"]):
+            self.shopify_tmpl_ids[template["id"]] = str(template["shopify_tmpl_id"])
+            self._last_shopify_template_id = max(self._last_shopify_template_id, template["id"])
+
+        shopify_products = self.env["shopify.product.product.ept"].search_read(
+            [("shopify_instance_id", "=", self.instance.id), ("id", ">", self._last_shopify_product_id)],
+            ["variant_id", "default_code", "product_id", "shopify_template_id"])
+        product_ids = {shopify_product["product_id"][0] for shopify_product in shopify_products
+                       if shopify_product["product_id"]}
+        # Only the products of the new Shopify products and the products having the SKUs and barcodes of
+        # the batch are read. The products of the batch read before are older than the watermark, so a
+        # reload only reads the products created for the previous template.
+        sku_domain = ["|", ("default_code", "in", list(self.skus)), ("barcode", "in", list(self.barcodes))]
+        if self._last_product_id:
+            sku_domain = ["&", ("id", ">", self._last_product_id)] + sku_domain
+        product_domain = ["|", ("id", "in", list(product_ids))] + sku_domain
+        products = self.env["product.product"].search_read(product_domain, ["default_code", "barcode"])
+        if not self._last_product_id:
+            # The products created later are newer than every product of the first load.
+            self.env.cr.execute("select coalesce(max(id), 0) from product_product")
+            self._last_product_id = self.env.cr.fetchone()[0]
+        product_codes = {}
+        for product in products:
+            product_codes[product["id"]] = (product["default_code"], product["barcode"])
+            self._last_product_id = max(self._last_product_id, product["id"])
+            if product["default_code"] and product["default_code"] in self.skus:
+                self.product_by_sku.setdefault(product["default_code"], product["id"])
+            if product["barcode"] and product["barcode"] in self.barcodes:
+                self.product_by_barcode.setdefault(product["barcode"], product["id"])
+
+        for shopify_product in shopify_products:
+            self._last_shopify_product_id = max(self._last_shopify_product_id, shopify_product["id"])
+            template_id = shopify_product["shopify_template_id"] and shopify_product["shopify_template_id"][0]
+            entry = (shopify_product["id"], self.shopify_tmpl_ids.get(template_id))
+            if shopify_product["variant_id"]:
+                self.shopify_by_variant.setdefault(str(shopify_product["variant_id"]), shopify_product["id"])
+            if shopify_product["default_code"]:
+                self.shopify_by_sku.setdefault(shopify_product["default_code"], []).append(entry)
+            product_id = shopify_product["product_id"] and shopify_product["product_id"][0]
+            default_code, barcode = product_codes.get(product_id, (False, False))
+            if default_code:
+                self.shopify_by_product_sku.setdefault(default_code, []).append(entry)
+            if barcode:
+                self.shopify_by_product_barcode.setdefault(barcode, []).append(entry)
+
+    @staticmethod
+    def _first(entries, shopify_tmpl_id=None):
+        for shopify_product_id, entry_tmpl_id in entries or []:
+            if shopify_tmpl_id is None or entry_tmpl_id == str(shopify_tmpl_id):
+                return shopify_product_id
+        return False
+
+    def _search_product(self, field_name, value):
+        """
+        Odoo product by SKU or barcode, the values which are not preloaded are searched like before
+        and kept for the next variants.
+        """
+        if field_name == "default_code":
+            preloaded, preloaded_values = self.product_by_sku, self.skus
+        else:
+            preloaded, preloaded_values = self.product_by_barcode, self.barcodes
+        if value and value in preloaded_values:
+            return preloaded.get(value, False)
+        key = (field_name, value)
+        if key not in self._searched_products:
+            self._searched_products[key] = self.env["product.product"].search([(field_name, "=", value)],
+                                                                              limit=1).id
+        return self._searched_products[key]
+
+    def search(self, product_sku, variant_id, barcode, s_template_id):
+        """
+        Returns the Shopify product and the Odoo product of a variant.
+        @param product_sku: SKU of the variant.
+        @param variant_id: Id of the variant in Shopify.
+        @param barcode: Barcode of the variant.
+        @param s_template_id: Id of the product in Shopify.
+        """
+        if self._current_template != s_template_id:
+            # Products created for the previous template have to be matched too.
+            if self._current_template is not None:
+                self._load_records()
+                # A product may be created since a SKU or barcode was not found.
+                self._searched_products.clear()
+            self._current_template = s_template_id
+        sync_product_with = self.instance.shopify_sync_product_with
+        shopify_product_id = self.shopify_by_variant.get(str(variant_id), False)
+        odoo_product_id = False
+        if sync_product_with == 'sku' and product_sku:
+            if not shopify_product_id:
+                shopify_product_id = self._first(self.shopify_by_sku.get(product_sku), s_template_id)
+            if not shopify_product_id:
+                shopify_product_id = self._first(self.shopify_by_product_sku.get(product_sku), s_template_id)
+            if not shopify_product_id:
+                odoo_product_id = self._search_product("default_code", product_sku)
+            if not shopify_product_id:
+                shopify_product_id = self._first(self.shopify_by_sku.get(product_sku))
+
+        if sync_product_with == 'barcode' and barcode:
+            if not shopify_product_id:
+                shopify_product_id = self._first(self.shopify_by_product_barcode.get(barcode))
+            if not shopify_product_id:
+                odoo_product_id = self._search_product("barcode", barcode)
+        if sync_product_with == 'sku_or_barcode':
+            if not shopify_product_id and product_sku:
+                shopify_product_id = self._first(self.shopify_by_sku.get(product_sku))
+            if not shopify_product_id and barcode:
+                shopify_product_id = self._first(self.shopify_by_product_barcode.get(barcode))
+            if not shopify_product_id or product_sku:
+                odoo_product_id = self._search_product("default_code", product_sku)
+            if not odoo_product_id and not shopify_product_id or barcode:
+                odoo_product_id = self._search_product("default_code", product_sku)
+
+        shopify_product = self.env["shopify.product.product.ept"].browse(shopify_product_id)
+        odoo_product = self.env["product.product"].browse(odoo_product_id)
+        if shopify_product and not odoo_product:
+            odoo_product = shopify_product.product_id
+        return shopify_product, odoo_product
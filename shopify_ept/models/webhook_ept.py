@@ -1,4 +1,5 @@
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
+from urllib.parse import urlparse
 from .. import shopify
 from odoo.exceptions import Warning
 import logging
@@ -42,6 +43,9 @@ class ShopifyWebhookEpt(models.Model):
     instance_id = fields.Many2one("shopify.instance.ept", string="Webhook created by this Shopify Instance.",
                                   ondelete="cascade")
 
+    # Fields used to find the instance and the webhook of a webhook request.
+    _webhook_route_fields = {"delivery_url", "instance_id"}
+
     @api.model
     def unlink(self):
         """
@@ -67,6 +71,7 @@ class ShopifyWebhookEpt(models.Model):
             _logger.info("Deleted %s webhook from Odoo." % record.webhook_action)
 
         unlink_main = super(ShopifyWebhookEpt, self).unlink()
+        self.clear_caches()
         self.deactivate_auto_create_webhook(instance)
         return unlink_main
 
@@ -105,10 +110,68 @@ class ShopifyWebhookEpt(models.Model):
             raise Warning(_('Webhook is already created with the same action.'))
 
         result = super(ShopifyWebhookEpt, self).create(values)
+        self.clear_caches()
         # self._cr.commit()
         result.get_webhook()
         return result
 
+    def write(self, vals):
+        """
+        Inherited for clearing the cached routes of the webhooks.
+        """
+        res = super(ShopifyWebhookEpt, self).write(vals)
+        if self._webhook_route_fields.intersection(vals):
+            self.clear_caches()
+        return res
+
+    @staticmethod
+    def normalize_shopify_domain(host):
+        """
+        Gives the shop domain of a host or url, without protocol, path and trailing slash, in lower case.
+        """
+        host = (host or "").strip().lower()
+        if "//" in host:
+            host = host.split("//", 1)[1]
+        return host.split("/", 1)[0]
+
+    @api.model
+    @tools.ormcache("domain", "route")
+    def _get_webhook_route_ids(self, domain, route):
+        """
+        Gives the ids of the instance and of the webhook receiving the webhook requests of a shop
+        domain and route. The result is kept in the cache of the worker until an instance or a
+        webhook is changed.
+        @param domain: Normalized shop domain.
+        @param route: Route of the webhook, without leading slash.
+        @return: Tuple of (instance id, webhook id), 0 when it is not found.
+        """
+        instances = self.env["shopify.instance.ept"].with_context(active_test=False).search_read(
+            [], ["shopify_host"], order="id")
+        instance_id = next((instance["id"] for instance in instances
+                            if self.normalize_shopify_domain(instance["shopify_host"]) == domain), 0)
+        if not instance_id:
+            return 0, 0
+        webhooks = self.search_read([("instance_id", "=", instance_id)], ["delivery_url"], order="id")
+        webhook_id = next((webhook["id"] for webhook in webhooks if webhook["delivery_url"] and
+                           urlparse(webhook["delivery_url"]).path.strip("/") == route), 0)
+        if not webhook_id:
+            # Webhooks created with another delivery url are found like before.
+            webhook_id = self.search([("delivery_url", "ilike", route), ("instance_id", "=", instance_id)],
+                                     limit=1).id
+        return instance_id, webhook_id
+
+    @api.model
+    def get_webhook_for_route(self, host, route):
+        """
+        Gives the instance and the webhook of a webhook request.
+        @param host: Shop domain sent by Shopify.
+        @param route: Route of the webhook.
+        @return: Records of the instance and of the webhook.
+        """
+        instance_id, webhook_id = self._get_webhook_route_ids(self.normalize_shopify_domain(host),
+                                                              route.strip("/"))
+        return self.env["shopify.instance.ept"].browse(instance_id), self.browse(webhook_id)
+
     def get_route(self):
         """
         Gives delivery URL for the webhook as per the Webhook Action.
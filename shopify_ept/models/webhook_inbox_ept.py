@@ -0,0 +1,140 @@
+import json
+import logging
+import time
+
+import psycopg2
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger("Shopify Webhook")
+
+
+class ShopifyWebhookInboxEpt(models.Model):
+    """
+    Payloads of the order webhooks received from Shopify.
+    The controller only stores the payload and answers, the orders are processed by the cron. The
+    same delivery of an order (topic, order id and updated_at) is stored once, so the retries of
+    Shopify are ignored.
+    """
+    _name = "shopify.webhook.inbox.ept"
+    _description = "Shopify Webhook Inbox"
+    _order = "id"
+
+    shopify_instance_id = fields.Many2one("shopify.instance.ept", string="Instance", required=True,
+                                          ondelete="cascade", index=True)
+    topic = fields.Char(required=True)
+    resource_id = fields.Char("Order Id", required=True)
+    resource_updated_at = fields.Char("Updated At", default="", help="updated_at of the order in the payload.")
+    payload = fields.Text()
+    state = fields.Selection([("draft", "Draft"), ("done", "Done"), ("skipped", "Skipped"), ("failed", "Failed")],
+                             default="draft", index=True)
+    message = fields.Text()
+    processed_at = fields.Datetime()
+
+    _sql_constraints = [("unique_webhook_delivery",
+                         "unique(shopify_instance_id,topic,resource_id,resource_updated_at)",
+                         "The webhook delivery is already received.")]
+
+    @api.model
+    def add_webhook_payload(self, instance, topic, payload):
+        """
+        This method is used to store the payload of a webhook. The payload is inserted with one query
+        and a delivery which is already stored is ignored.
+        @param instance: Record of the Shopify instance.
+        @param topic: Topic of the webhook, like orders/updated.
+        @param payload: Dictionary of the webhook data.
+        @return: True when the payload is stored, False when it is invalid or already received.
+        """
+        if not isinstance(payload, dict) or not payload.get("id"):
+            return False
+        self._cr.execute("""insert into shopify_webhook_inbox_ept
+            (shopify_instance_id, topic, resource_id, resource_updated_at, payload, state, create_uid,
+             write_uid, create_date, write_date)
+            values (%s, %s, %s, %s, %s, 'draft', %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')
+            on conflict (shopify_instance_id, topic, resource_id, resource_updated_at) do nothing
+            returning id""", (instance.id, topic, str(payload.get("id")), payload.get("updated_at") or "",
+                              json.dumps(payload), self.env.uid, self.env.uid))
+        return bool(self._cr.fetchone())
+
+    @api.model
+    def process_webhook_inbox(self, batch_size=200, time_limit=240):
+        """
+        This method is used by the cron to process the received webhooks batch by batch. The
+        deliveries of the same order in a batch are coalesced, only the latest one is processed.
+        @param batch_size: Number of deliveries read at once.
+        @param time_limit: Seconds after which no new batch is started.
+        """
+        self.cleanup_webhook_inbox()
+        start = time.time()
+        while time.time() - start < time_limit:
+            self._cr.execute("""select id from shopify_webhook_inbox_ept where state = 'draft'
+                order by id limit %s""", (batch_size,))
+            inbox_ids = [row[0] for row in self._cr.fetchall()]
+            if not inbox_ids:
+                break
+            deliveries = {}
+            for inbox in self.browse(inbox_ids):
+                deliveries.setdefault((inbox.shopify_instance_id.id, inbox.resource_id), self.browse())
+                deliveries[(inbox.shopify_instance_id.id, inbox.resource_id)] |= inbox
+            for inbox_records in deliveries.values():
+                latest = max(inbox_records, key=lambda inbox: (inbox.resource_updated_at or "", inbox.id))
+                (inbox_records - latest).write({"state": "skipped", "processed_at": fields.Datetime.now(),
+                                                "message": "Replaced by a later delivery of the order."})
+                latest.process_inbox_order()
+                self._cr.commit()
+        return True
+
+    @api.model
+    def cleanup_webhook_inbox(self, days=7):
+        """
+        Deletes the processed and skipped deliveries older than the given days, the failed ones are
+        kept to be checked.
+        @param days: Number of days the processed deliveries are kept.
+        """
+        self._cr.execute("""delete from shopify_webhook_inbox_ept where state in ('done', 'skipped')
+            and processed_at < (now() at time zone 'UTC') - %s * interval '1 day'""", (days,))
+        self._cr.commit()
+        return True
+
+    def process_inbox_order(self):
+        """
+        This method is used to process one delivery of an order webhook, like the controller did
+        before.
+        """
+        self.ensure_one()
+        instance = self.shopify_instance_id
+        sale_order_obj = self.env["sale.order"].sudo()
+        if not instance.active:
+            self.write({"state": "skipped", "processed_at": fields.Datetime.now(),
+                        "message": "Instance %s is archived." % instance.name})
+            return False
+        order_data = json.loads(self.payload)
+        # The deliveries skipped before are flushed, so only this delivery is rolled back on error. The
+        # savepoint is not released, the queue processing of the order commits and ends it.
+        self.flush()
+        self._cr.execute('SAVEPOINT webhook_inbox_order')
+        try:
+            if sale_order_obj.search_read([("shopify_instance_id", "=", instance.id),
+                                           ("shopify_order_id", "=", order_data.get("id")),
+                                           ("shopify_order_number", "=", order_data.get("order_number"))],
+                                          ["id"]):
+                sale_order_obj.process_shopify_order_via_webhook(order_data, instance, True)
+            elif self.topic != "orders/cancelled" and not order_data.get("fulfillment_status"):
+                order_data.update({"fulfillment_status": "unshipped"})
+                if order_data.get("fulfillment_status") in instance.import_shopify_order_status_ids.mapped(
+                        "status"):
+                    sale_order_obj.process_shopify_order_via_webhook(order_data, instance)
+            self.flush()
+        except Exception as error:
+            try:
+                self._cr.execute('ROLLBACK TO SAVEPOINT webhook_inbox_order')
+            except psycopg2.Error:
+                # The order is committed by its queue, with the deliveries skipped before.
+                self._cr.rollback()
+            # The changes of the order are dropped from the cache too.
+            self.env.clear()
+            _logger.exception("Webhook of order %s of %s is not processed.", self.resource_id, instance.name)
+            self.write({"state": "failed", "processed_at": fields.Datetime.now(), "message": str(error)})
+            return False
+        self.write({"state": "done", "processed_at": fields.Datetime.now()})
+        return True
@@ -5,11 +5,15 @@ from . import mixins as mixins
 from .. import shopify
 import threading
 import sys
+import time
 from six.moves import urllib
 import six
 
 from .collection import PaginatedCollection
+from .limits import RateLimiter
+from .transport import PooledTransport
 from . pyactiveresource.collection import Collection
+from . pyactiveresource import util
 
 # Store the response from the last request in the connection object
 
@@ -21,13 +25,32 @@ class ShopifyConnection(pyactiveresource.connection.Connection):
         super(ShopifyConnection, self).__init__(site, user, password, timeout, format)
 
     def _open(self, *args, **kwargs):
-        self.response = None
-        try:
-            self.response = super(ShopifyConnection, self)._open(*args, **kwargs)
-        except pyactiveresource.connection.ConnectionError as err:
-            self.response = err.response
-            raise
-        return self.response
+        """
+        Pace the request with the leaky bucket of the shop and transparently retry
+        it when Shopify still answers 429 Too Many Requests.
+        """
+        bucket = RateLimiter.bucket(self.site)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            self.response = None
+            try:
+                self.response = super(ShopifyConnection, self)._open(*args, **kwargs)
+            except pyactiveresource.connection.ConnectionError as err:
+                self.response = err.response
+                RateLimiter.update_from_headers(self.site, err.response.headers)
+                if err.response.code == 429 and attempt < RateLimiter.max_retries:
+                    bucket.drain()
+                    time.sleep(RateLimiter.retry_delay(attempt, err.response.get("Retry-After")))
+                    attempt += 1
+                    continue
+                raise
+            RateLimiter.update_from_headers(self.site, self.response.headers)
+            return self.response
+
+    def _urlopen(self, request):
+        """Send the request through the keep-alive connection pool of the shop."""
+        return PooledTransport.urlopen(request, timeout=self.timeout)
 
 
 # Inherit from pyactiveresource's metaclass in order to use ShopifyConnection
@@ -162,6 +185,7 @@ class ShopifyResource(ActiveResource, mixins.Countable):
     _headers = {"User-Agent": "ShopifyPythonAPI/%s Python/%s" % (shopify.VERSION, sys.version.split(" ", 1)[0])}
     _version = None
     _url = None
+    _nested_prefix_parameters_cache = {}
 
     def __init__(self, attributes=None, prefix_options=None):
         if attributes is not None and prefix_options is None:
@@ -200,3 +224,66 @@ class ShopifyResource(ActiveResource, mixins.Countable):
         if isinstance(collection, Collection) and "headers" in collection.metadata:
             return PaginatedCollection(collection, metadata={"resource_class": cls}, **kwargs)
         return collection
+
+    @classmethod
+    def find_data(cls, from_=None, **kwargs):
+        """
+        Same as find for a collection, but the dictionaries decoded from the JSON response are kept as
+        they are instead of being built into resource objects. Next pages are fetched the same way.
+        """
+        prefix_options, query_options = cls._split_options(kwargs)
+        if from_:
+            query_options.update(prefix_options)
+            path = from_ + cls._query_string(query_options)
+        else:
+            path = cls._collection_path(prefix_options, query_options)
+        response = cls.connection.get(path, cls.headers)
+        data = cls.format.decode(response.body)
+        if isinstance(data, dict):
+            data = [data]
+        collection = Collection(data, metadata={"headers": response.headers})
+        return PaginatedCollection(collection, metadata={"resource_class": cls, "raw_data": True})
+
+    @classmethod
+    def to_xml_dict(cls, attributes):
+        """
+        Returns the decoded JSON attributes of a resource shaped exactly like
+        xml_to_dict(cls(attributes).to_xml()), without building the resource objects and the xml.
+
+        Like the xml round trip: nested resources lose their prefix parameters (e.g. order_id of
+        fulfillments), floats become strings, empty strings and empty dictionaries become None.
+        """
+        return {cls._singular: cls._to_xml_value(attributes, cls._prefix_parameters())}
+
+    @classmethod
+    def _nested_prefix_parameters(cls, element_name, parent_parameters):
+        """Prefix parameters of the resource class used for a nested element, see _find_class_for."""
+        cache = ShopifyResource._nested_prefix_parameters_cache
+        if element_name not in cache:
+            klass = cls._find_class_for(element_name, create_missing=False)
+            cache[element_name] = klass._prefix_parameters() if klass else None
+        parameters = cache[element_name]
+        # Missing classes are created as subclasses of the parent resource and share its prefix.
+        return parent_parameters if parameters is None else parameters
+
+    @classmethod
+    def _to_xml_value(cls, value, prefix_parameters, element_name=None, resource=True):
+        if isinstance(value, dict):
+            if resource and element_name:
+                # Nested dictionaries of a resource are built as resources, without their prefix options.
+                prefix_parameters = cls._nested_prefix_parameters(element_name, prefix_parameters)
+                value = {key: item for key, item in value.items() if key not in prefix_parameters}
+            values = {}
+            for key, item in value.items():
+                values[key.replace("-", "_")] = cls._to_xml_value(item, prefix_parameters, key, resource)
+            return values or None
+        if isinstance(value, list):
+            if resource:
+                element_name = util.singularize(element_name)
+            # Only the dictionaries of a list are built as resources, nested lists are kept as they are.
+            return [cls._to_xml_value(item, prefix_parameters, element_name, resource and isinstance(item, dict))
+                    for item in value]
+        if value is None or isinstance(value, six.integer_types):
+            return value
+        value = six.text_type(value).replace("\r\n", "\n").replace("\r", "\n")
+        return value or None
@@ -35,6 +35,7 @@ class PaginatedCollection(Collection):
         self.metadata["pagination"] = self.__parse_pagination()
         self.next_page_url = self.metadata["pagination"].get("next", None)
         self.previous_page_url = self.metadata["pagination"].get("previous", None)
+        self.next_page_info = self.__parse_page_info(self.next_page_url)
 
         self._next = None
         self._previous = None
@@ -55,6 +56,12 @@ class PaginatedCollection(Collection):
             result[rel.split('"')[1]] = link[1:-1]
         return result
 
+    def __parse_page_info(self, url):
+        """Returns the page_info cursor of a page url, it can be stored to resume the pagination later."""
+        if not url:
+            return None
+        return parse_qs(urlparse(url).query).get("page_info", [None])[0]
+
     def has_previous_page(self):
         """Returns true if the current page has any previous pages before it."""
         return bool(self.previous_page_url)
@@ -92,7 +99,10 @@ class PaginatedCollection(Collection):
         return self.__fetch_page(self.next_page_url, no_cache)
 
     def __fetch_page(self, url, no_cache=False):
-        next = self.metadata["resource_class"].find(from_=url)
+        if self.metadata.get("raw_data"):
+            next = self.metadata["resource_class"].find_data(from_=url)
+        else:
+            next = self.metadata["resource_class"].find(from_=url)
         if not no_cache:
             self._next = next
             self._next._previous = self
@@ -137,8 +147,10 @@ class PaginatedIterator(object):
     >>> for page in PaginatedIterator(Product.find()):
     ...     for item in page:
     ...         do_something(item)
+    ...     save_cursor(page.next_page_info)
     ...
-    # every page and the page items are iterated
+    # every page and the page items are iterated, an interrupted loop can be
+    # resumed with PaginatedIterator(Product.find(page_info=saved_cursor))
     """
 
     def __init__(self, collection):
@@ -0,0 +1,160 @@
+import json
+import time
+
+from six.moves import urllib
+
+from .resources.graphql import GraphQL
+
+
+class GraphQLUnavailable(Exception):
+    """
+    Raised when the shop can not be updated with the GraphQL Admin API at all, for
+    example when the access scope is missing. The caller is expected to fall back to
+    the REST API.
+    """
+
+
+class InventoryBulkSetter(object):
+    """
+    Set the available quantity of many inventory items with one GraphQL mutation per
+    chunk of rows, instead of one InventoryLevel.set REST call per item and location.
+
+    Rows are dicts with the keys inventory_item_id, location_id and quantity, the ids
+    are the numeric Shopify ids. set_quantities returns the errors by row index, so
+    the caller can log them against its own records.
+
+    chunk_size: number of rows sent in one mutation, Shopify accepts up to 250.
+    api_version: version of the GraphQL Admin API used for the mutation, it is set in
+    place of the version of the REST site, which is older than inventorySetQuantities.
+    The input of the mutation (name, reason, ignoreCompareQuantity and quantities with
+    inventoryItemId, locationId and quantity) is the one of this version.
+    """
+
+    MUTATION = """
+mutation inventorySetQuantities($input: InventorySetQuantitiesInput!) {
+  inventorySetQuantities(input: $input) {
+    userErrors {
+      field
+      message
+    }
+  }
+}"""
+
+    max_chunk_size = 250
+    max_retries = 5
+    api_version = "2025-10"
+
+    def __init__(self, chunk_size=100):
+        self.chunk_size = max(1, min(chunk_size or 100, self.max_chunk_size))
+        self.graphql = GraphQL()
+        self.graphql.endpoint = self._versioned_endpoint(self.graphql.endpoint)
+
+    def _versioned_endpoint(self, endpoint):
+        parts = endpoint.split("/admin/api/")
+        if len(parts) == 2 and "/" in parts[1]:
+            return "%s/admin/api/%s/%s" % (parts[0], self.api_version, parts[1].split("/", 1)[1])
+        return endpoint
+
+    def set_quantities(self, rows, reason="correction"):
+        """
+        Send the rows chunk by chunk.
+        Args:
+            rows: list of dicts with inventory_item_id, location_id and quantity.
+            reason: reason of the inventory change shown in the Shopify admin.
+        Returns:
+            dict of {row index: error message} for the rows which are not updated.
+        Raises:
+            GraphQLUnavailable when no chunk could be sent through GraphQL.
+        """
+        errors = {}
+        for start in range(0, len(rows), self.chunk_size):
+            indexes = list(range(start, min(start + self.chunk_size, len(rows))))
+            errors.update(self._send_chunk(rows, indexes, reason))
+        return errors
+
+    def _send_chunk(self, rows, indexes, reason):
+        """
+        Send one chunk, the mutation is applied as a whole so the rows reported in the
+        user errors are removed and the rest of the chunk is sent again.
+        """
+        errors = {}
+        while indexes:
+            user_errors = self._execute(rows, indexes, reason)
+            if not user_errors:
+                break
+            failed = set()
+            for user_error in user_errors:
+                position = self._error_position(user_error.get("field"))
+                if position is not None and position < len(indexes):
+                    failed.add(indexes[position])
+                    errors[indexes[position]] = user_error.get("message")
+            if not failed:
+                # The error is not linked to a row, so the whole chunk is reported.
+                message = "; ".join(user_error.get("message", "") for user_error in user_errors)
+                errors.update({index: message for index in indexes})
+                break
+            indexes = [index for index in indexes if index not in failed]
+        return errors
+
+    @staticmethod
+    def _error_position(field):
+        # The field of a user error looks like ["input", "quantities", "3", "quantity"].
+        if field and len(field) > 2 and field[1] == "quantities":
+            try:
+                return int(field[2])
+            except ValueError:
+                return None
+        return None
+
+    def _execute(self, rows, indexes, reason):
+        # The available quantity is set like InventoryLevel.set of the REST API, whatever the
+        # quantity Shopify holds at the time of the mutation.
+        variables = {"input": {
+            "name": "available",
+            "reason": reason,
+            "ignoreCompareQuantity": True,
+            "quantities": [{
+                "inventoryItemId": "gid://shopify/InventoryItem/%s" % rows[index]["inventory_item_id"],
+                "locationId": "gid://shopify/Location/%s" % rows[index]["location_id"],
+                "quantity": int(rows[index]["quantity"]),
+            } for index in indexes]}}
+        attempt = 0
+        while True:
+            try:
+                response = json.loads(self.graphql.execute(self.MUTATION, variables))
+            except urllib.error.HTTPError as error:
+                if error.code in (429, 502, 503) and attempt < self.max_retries:
+                    time.sleep(int(float(error.headers.get("Retry-After", 2 ** attempt))))
+                    attempt += 1
+                    continue
+                raise GraphQLUnavailable("%s %s" % (error.code, error.msg))
+            except urllib.error.URLError as error:
+                raise GraphQLUnavailable(str(error.reason))
+            top_errors = response.get("errors") or []
+            if any(error.get("extensions", {}).get("code") == "THROTTLED" for error in top_errors) \
+                    and attempt < self.max_retries:
+                time.sleep(self._throttle_delay(response))
+                attempt += 1
+                continue
+            if top_errors:
+                raise GraphQLUnavailable("; ".join(error.get("message", "") for error in top_errors))
+            self._wait_for_cost(response)
+            data = (response.get("data") or {}).get("inventorySetQuantities") or {}
+            return data.get("userErrors") or []
+
+    @staticmethod
+    def _throttle_status(response):
+        cost = response.get("extensions", {}).get("cost", {})
+        return cost.get("requestedQueryCost") or 0, cost.get("throttleStatus") or {}
+
+    def _throttle_delay(self, response):
+        requested, status = self._throttle_status(response)
+        restore_rate = float(status.get("restoreRate") or 50)
+        missing = requested - float(status.get("currentlyAvailable") or 0)
+        return max(1.0, missing / restore_rate)
+
+    def _wait_for_cost(self, response):
+        # Wait before the next chunk when the bucket can not pay for a mutation of the same cost.
+        requested, status = self._throttle_status(response)
+        if status and float(status.get("currentlyAvailable") or 0) < requested:
+            time.sleep(self._throttle_delay(response))
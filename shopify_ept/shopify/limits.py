@@ -1,6 +1,125 @@
+import random
+import threading
+import time
+
 from .. import shopify
 
 
+class LeakyBucket(object):
+    """
+    Client side mirror of the Shopify leaky bucket of a single shop.
+
+    Shopify allows a burst of `limit` calls and leaks `limit / 20` calls per
+    second (2/s on a 40 call bucket, 4/s on the 80 call bucket of Plus shops).
+    The bucket is synced from the X-Shopify-Shop-Api-Call-Limit header of every
+    response and requests are delayed before they would overflow it.
+    """
+
+    # Calls kept free so that other processes sharing the same token still fit.
+    HEADROOM = 2
+
+    def __init__(self, limit=40):
+        self.limit = limit
+        self.leak_rate = limit / 20.0
+        self.used = 0.0
+        self.updated_at = time.time()
+        self.lock = threading.Lock()
+
+    def _leak(self, now):
+        self.used = max(0.0, self.used - (now - self.updated_at) * self.leak_rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """
+        Reserve one call in the bucket, sleeping until there is room for it.
+        """
+        with self.lock:
+            now = time.time()
+            self._leak(now)
+            overflow = self.used + 1 - max(self.limit - self.HEADROOM, 1)
+            wait = overflow / self.leak_rate if overflow > 0 else 0.0
+            # The call is accounted now so that concurrent callers queue behind it.
+            self.used += 1
+        if wait > 0:
+            time.sleep(wait)
+
+    def update(self, used, limit):
+        """
+        Replace the local estimate with the values reported by Shopify.
+        """
+        with self.lock:
+            self.limit = limit
+            self.leak_rate = limit / 20.0
+            self.used = float(used)
+            self.updated_at = time.time()
+
+    def drain(self):
+        """
+        Mark the bucket as full, used when Shopify answered 429.
+        """
+        with self.lock:
+            self.used = float(self.limit)
+            self.updated_at = time.time()
+
+
+class RateLimiter(object):
+    """
+    Per shop leaky bucket registry used by ShopifyConnection to pace REST calls
+    and to retry throttled (429) calls with a jittered exponential backoff.
+
+    Buckets are shared by every thread of the process so that parallel crons
+    and webhook requests of one shop are paced together.
+    """
+
+    _buckets = {}
+    _lock = threading.Lock()
+
+    max_retries = 5
+    backoff_base = 1.0
+    backoff_max = 30.0
+
+    @classmethod
+    def bucket(cls, site):
+        with cls._lock:
+            bucket = cls._buckets.get(site)
+            if bucket is None:
+                bucket = cls._buckets[site] = LeakyBucket()
+            return bucket
+
+    @classmethod
+    def update_from_headers(cls, site, headers):
+        """
+        Sync the bucket of the shop with the call limit header of a response.
+        """
+        value = None
+        for key, header_value in (headers or {}).items():
+            if key.lower() == Limits.CREDIT_LIMIT_HEADER_PARAM.lower():
+                value = header_value
+                break
+        if not value:
+            return
+        try:
+            used, limit = [int(part) for part in value.split("/")]
+        except ValueError:
+            return
+        cls.bucket(site).update(used, limit)
+
+    @classmethod
+    def retry_delay(cls, attempt, retry_after=None):
+        """
+        Seconds to wait before retrying a throttled call: exponential backoff with
+        full jitter, never shorter than the Retry-After value sent by Shopify.
+        """
+        delay = random.uniform(0, min(cls.backoff_max, cls.backoff_base * 2 ** attempt))
+        try:
+            delay = max(delay, float(retry_after))
+        except (TypeError, ValueError):
+            pass
+        return delay
+
+
+
+
 class Limits(object):
     """
     API Calls Limit
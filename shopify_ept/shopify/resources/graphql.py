@@ -1,13 +1,20 @@
 from ... import shopify
 from ..base import ShopifyResource
+from ..transport import PooledTransport
 from six.moves import urllib
+import io
 import json
 
 
 class GraphQL:
     def __init__(self):
         self.endpoint = shopify.ShopifyResource.get_site() + "/graphql.json"
-        self.headers = shopify.ShopifyResource.get_headers()
+        self.headers = dict(shopify.ShopifyResource.get_headers())
+        # Private apps connect with basic auth in the REST site, the GraphQL endpoint takes
+        # the app password as access token instead.
+        password = shopify.ShopifyResource.get_password()
+        if password and "X-Shopify-Access-Token" not in self.headers:
+            self.headers["X-Shopify-Access-Token"] = password
 
     def merge_headers(self, *headers):
         merged_headers = {}
@@ -23,10 +30,8 @@ class GraphQL:
 
         req = urllib.request.Request(self.endpoint, json.dumps(data).encode("utf-8"), headers)
 
-        try:
-            response = urllib.request.urlopen(req)
-            return response.read().decode("utf-8")
-        except urllib.error.HTTPError as e:
-            print((e.read()))
-            print("")
-            raise e
+        response = PooledTransport.urlopen(req, timeout=shopify.ShopifyResource.get_timeout())
+        if response.code >= 400:
+            raise urllib.error.HTTPError(endpoint, response.code, response.msg, response.headers,
+                                         io.BytesIO(response.read()))
+        return response.read().decode("utf-8")
@@ -0,0 +1,102 @@
+import os
+import threading
+import time
+
+import urllib3
+from six.moves import urllib
+
+
+class PooledResponse(object):
+    """
+    Minimal urllib like response built from a pooled urllib3 response, so that
+    pyactiveresource can keep using Response.from_httpresponse and _handle_error.
+    """
+
+    def __init__(self, url, response):
+        self.url = url
+        self.code = response.status
+        self.msg = response.reason
+        self.headers = response.headers
+        self._body = response.data
+
+    def read(self):
+        return self._body
+
+    def close(self):
+        pass
+
+
+class PooledTransport(object):
+    """
+    Keep-alive HTTP connection pools, one per shop site and shared by every thread
+    of the process, so that consecutive Shopify calls reuse the TCP/TLS connection
+    instead of paying a new handshake on each request.
+
+    pool_size: maximum number of kept-alive connections per site.
+    idle_timeout: seconds after which an unused pool is closed and rebuilt, this
+    avoids reusing sockets already dropped by the server.
+    """
+
+    pool_size = 10
+    idle_timeout = 30
+
+    _pools = {}
+    _pid = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            for pool, _last_used in cls._pools.values():
+                pool.close()
+            cls._pools.clear()
+
+    @classmethod
+    def pool(cls, url):
+        """
+        Return the connection pool of the site of the url.
+        """
+        parts = urllib.parse.urlparse(url)
+        key = (parts.scheme, parts.hostname, parts.port)
+        now = time.time()
+        with cls._lock:
+            if cls._pid != os.getpid():
+                # Sockets must not be shared with the parent of a forked worker.
+                cls._pools = {}
+                cls._pid = os.getpid()
+            pool, last_used = cls._pools.get(key, (None, None))
+            if pool is not None and now - last_used > cls.idle_timeout:
+                pool.close()
+                pool = None
+            if pool is None:
+                pool = urllib3.connection_from_url(url, maxsize=cls.pool_size, block=False)
+            cls._pools[key] = (pool, now)
+            return pool
+
+    @classmethod
+    def urlopen(cls, request, timeout=None):
+        """
+        Send a urllib Request through the pool of its site.
+
+        Args:
+            request: A urllib.request.Request object.
+            timeout: socket timeout in seconds.
+        Returns:
+            A PooledResponse object, HTTP error codes are returned and not raised.
+        Raises:
+            urllib.error.URLError on IO errors.
+        """
+        url = request.full_url
+        parts = urllib.parse.urlsplit(url)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+        # A connection dropped while idle is retried once, except for POST requests
+        # which are never sent twice.
+        retries = urllib3.Retry(total=1, connect=1, read=1, redirect=0, status=0, raise_on_redirect=False)
+        try:
+            response = cls.pool(url).urlopen(
+                request.get_method(), target, body=request.data, headers=dict(request.header_items()),
+                retries=retries, redirect=False, assert_same_host=False,
+                timeout=urllib3.Timeout(total=timeout) if timeout else urllib3.Timeout.DEFAULT_TIMEOUT)
+        except urllib3.exceptions.HTTPError as error:
+            raise urllib.error.URLError(error)
+        return PooledResponse(url, response)
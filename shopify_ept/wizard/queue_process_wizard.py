@@ -61,9 +61,10 @@ class ShopifyQueueProcessEpt(models.TransientModel):
         shopify_order_queue_obj = self.env["shopify.order.data.queue.ept"]
         order_queue_ids = self._context.get('active_ids')
         # Below two line add by Dipak Gogiya on date 15/01/2020, this is used to update
-        # is_process_queue as False.
+        # is_process_queue as False. Queues claimed by a running worker are kept as they are.
         self.env.cr.execute(
-            """update shopify_order_data_queue_ept set is_process_queue = False where is_process_queue = True""")
+            """update shopify_order_data_queue_ept set is_process_queue = False where is_process_queue = True
+            and (locked_until is null or locked_until < (now() at time zone 'UTC'))""")
         self._cr.commit()
         for order_queue_id in order_queue_ids:
             order_queue = shopify_order_queue_obj.browse(order_queue_id)
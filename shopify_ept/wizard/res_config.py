@@ -154,6 +154,9 @@ class ResConfigSettings(models.TransientModel):
                                                   ], string="Sync Product With", default='sku')
     shopify_pricelist_id = fields.Many2one('product.pricelist', string='Pricelist')
     shopify_stock_field = fields.Many2one('ir.model.fields', string='Stock Field')
+    shopify_stock_export_api = fields.Selection([('graphql', 'GraphQL (Bulk)'), ('rest', 'REST')],
+                                                string="Export Stock With", default='graphql')
+    shopify_stock_export_chunk_size = fields.Integer(string="Export Stock Chunk Size", default=100)
     # shopify_allow_inconstance_remote_variants = fields.Boolean(
     #     string="Allow Inconstance Remote Variants")
     # payment_term_id = fields.Many2one('account.payment.term', string='Payment Term')
@@ -243,6 +246,8 @@ class ResConfigSettings(models.TransientModel):
             self.shopify_sync_product_with = instance.shopify_sync_product_with
             self.shopify_pricelist_id = instance.shopify_pricelist_id and instance.shopify_pricelist_id.id or False
             self.shopify_stock_field = instance.shopify_stock_field and instance.shopify_stock_field.id or False
+            self.shopify_stock_export_api = instance.shopify_stock_export_api
+            self.shopify_stock_export_chunk_size = instance.shopify_stock_export_chunk_size
             # self.shopify_allow_inconstance_remote_variants = instance.shopify_allow_inconstance_remote_variants or False
             # self.payment_term_id = instance.payment_term_id or False
             self.import_shopify_order_status_ids = instance.import_shopify_order_status_ids.ids
@@ -313,6 +318,8 @@ class ResConfigSettings(models.TransientModel):
                 'shopify_pricelist_id'] = self.shopify_pricelist_id and self.shopify_pricelist_id.id or False
             values[
                 'shopify_stock_field'] = self.shopify_stock_field and self.shopify_stock_field.id or False
+            values['shopify_stock_export_api'] = self.shopify_stock_export_api
+            values['shopify_stock_export_chunk_size'] = self.shopify_stock_export_chunk_size
             # values['payment_term_id'] = self.payment_term_id and self.payment_term_id.id or False
             # values[
             #     'shopify_allow_inconstance_remote_variants'] = self.shopify_allow_inconstance_remote_variants or False
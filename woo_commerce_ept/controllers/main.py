@@ -107,15 +107,7 @@ class Webhook(http.Controller):
         res, instance = self.get_basic_info()
         if not res:
             return
-        if instance.active:
-            if request.env["sale.order"].sudo().search_read([("woo_instance_id", "=", instance.id),
-                                                             ("woo_order_id", "=", res.get("id")),
-                                                             ("woo_order_number", "=", res.get("number"))],
-                                                            ["id"]):
-                request.env["sale.order"].sudo().process_order_via_webhook(res, instance, True)
-            elif res.get("status") in instance.import_order_status_ids.mapped("status"):
-                request.env["sale.order"].sudo().process_order_via_webhook(res, instance)
-
+        self.add_order_webhook_to_inbox(res, instance, "order.updated")
         return
 
     @http.route("/delete_order_webhook_odoo", csrf=False, auth="public", type="json")
@@ -127,18 +119,7 @@ class Webhook(http.Controller):
         res, instance = self.get_basic_info()
         if not res:
             return
-        res.update({"number": res.get("id"), "status": "cancelled"})
-
-        if instance.active:
-            order = request.env["sale.order"].sudo().search([("woo_instance_id", "=", instance.id),
-                                                             ("woo_order_id", "=", res.get("id"))])
-            if order:
-                order_data_queue = order.create_woo_order_data_queue(instance, [res], "Order#" + str(res.get("id", "")),
-                                                                     "webhook")
-                order._cr.commit()
-                order_data_queue.order_data_queue_line_ids.process_order_queue_line(update_order=True)
-                _logger.info("Cancelled order {0} of {1} via Webhook as deleted in Woo Successfully".format(order.name,
-                                                                                                            instance.name))
+        self.add_order_webhook_to_inbox(res, instance, "order.deleted")
         return
 
     @http.route("/check_webhook", csrf=False, auth="public", type="json")
@@ -312,6 +293,22 @@ class Webhook(http.Controller):
 
         return
 
+    def add_order_webhook_to_inbox(self, res, instance, topic):
+        """
+        This method is used to store the order webhook in the inbox, the order is processed by the cron
+        so the webhook is answered at once.
+        @param res: Data of the order received in the webhook.
+        @param instance: Records of the Woo instance.
+        @param topic: Topic used when the header of WooCommerce is missing.
+        """
+        topic = request.httprequest.headers.get("X-WC-Webhook-Topic") or topic
+        inbox_obj = request.env["woo.webhook.inbox.ept"].sudo()
+        for woo_instance in instance.filtered("active"):
+            if not inbox_obj.add_webhook_payload(woo_instance, topic, res):
+                _logger.info("Order webhook {0} of {1} is skipped, it is invalid or already received.".format(
+                    res.get("id"), woo_instance.name))
+        return True
+
     def get_basic_info(self):
         """
         This method is used return basic info. It will return res and instance.
@@ -320,7 +317,7 @@ class Webhook(http.Controller):
         res = request.jsonrequest
         headers = request.httprequest.headers
         host = headers.get("X-WC-Webhook-Source").rstrip('/')
-        instance = request.env["woo.instance.ept"].sudo().search([("woo_host", "ilike", host)])
+        instance = request.env["woo.instance.ept"].sudo().get_instance_for_webhook(host)
 
         if not instance:
             _logger.warning("Instance is not found for host %s, while searching for Webhook.", host)
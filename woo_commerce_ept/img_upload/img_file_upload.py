@@ -5,6 +5,8 @@ In this file transfer images from odoo to woo-commerce.
 '''
 import tempfile
 import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from odoo.tools.mimetypes import guess_mimetype
 # from .. python_magic_0_4_11 import magic
@@ -20,6 +22,67 @@ class SpecialTransport(compat.xmlrpc_client.Transport):
     user_agent = 'Mozilla/5.0 (Windows NT 6.0) AppleWebKit/537.31 (KHTML, like Gecko) Chrome/26.0.1410.43 Safari/537.31'
 
 
+# Supported methods of the XML-RPC endpoints, asked once per worker for every site and user.
+_supported_methods = {}
+_supported_methods_lock = threading.Lock()
+# XML-RPC proxies are not thread safe, so every thread keeps its own clients.
+_clients = threading.local()
+
+
+class CachedClient(base.Client):
+    """
+    XML-RPC client created without the mt.supportedMethods round trip, the methods asked by the
+    first client of the endpoint are used.
+    """
+
+    def __init__(self, url, username, password, supported_methods, blog_id=0):
+        self.url = url
+        self.username = username
+        self.password = password
+        self.blog_id = blog_id
+        self.server = compat.xmlrpc_client.ServerProxy(url)
+        self.supported_methods = supported_methods
+
+
+def get_client(url, username, password):
+    """
+    Gives the client of the current thread for the endpoint, it is created once and reused by the
+    next uploads.
+    :param url: URL of xmlrpc.php of the site.
+    :param username: WordPress admin username.
+    :param password: WordPress admin password.
+    :return: Client of wordpress_xmlrpc.
+    """
+    key = (url, username, password)
+    clients = getattr(_clients, "clients", None)
+    if clients is None:
+        clients = _clients.clients = {}
+    client = clients.get(key)
+    if client:
+        return client
+    with _supported_methods_lock:
+        supported_methods = _supported_methods.get(key)
+    if supported_methods is None:
+        client = base.Client(url, username, password, transport=SpecialTransport())
+        with _supported_methods_lock:
+            _supported_methods[key] = client.supported_methods
+    else:
+        client = CachedClient(url, username, password, supported_methods)
+    clients[key] = client
+    return client
+
+
+def _upload(connection, image_data, image_name, mime_type):
+    url, username, password, instance_id = connection
+    binary_data = base64.decodebytes(image_data)
+    data = {
+        'name': '%s_%s.%s' % (image_name, instance_id, mime_type.split("/")[1]),
+        'type': mime_type,
+        'bits': compat.xmlrpc_client.Binary(binary_data)
+    }
+    return get_client(url, username, password).call(media.UploadFile(data))
+
+
 def upload_image(instance, image_data, image_name, mime_type=False):
     '''
 
@@ -34,20 +97,32 @@ def upload_image(instance, image_data, image_name, mime_type=False):
         if not image_data or not image_name:
             return {}
 
-        client = base.Client('%s/xmlrpc.php' % (instance.woo_host), instance.woo_admin_username,
-                             instance.woo_admin_password, transport=SpecialTransport())
-
-        binary_data = base64.decodebytes(image_data)
+        connection = ('%s/xmlrpc.php' % (instance.woo_host), instance.woo_admin_username,
+                      instance.woo_admin_password, instance.id)
+        return _upload(connection, image_data, image_name, mime_type)
+    return {}
 
-        data = {
-            'name': '%s_%s.%s' % (image_name, instance.id, mime_type.split("/")[1]),
-            'type': mime_type,
-            'bits': compat.xmlrpc_client.Binary(binary_data)
-        }
-        res = client.call(media.UploadFile(data))
 
-        return res
-    return {}
+def upload_images(instance, images):
+    '''
+    Uploads the images with a pool of at most woo_concurrent_requests threads.
+    The threads only call XML-RPC, the instance is read before they are started.
+    :param instance: Woo-active instance
+    :param images: List of tuples (key, image data, image name, mime type).
+    :return: Dictionary of {key: response of the upload}, an empty dictionary is given for the
+    images which can not be uploaded.
+    '''
+    images = [image for image in images if image[1] and image[2]]
+    if not images or not instance.woo_admin_username or not instance.woo_admin_password:
+        return {}
+    connection = ('%s/xmlrpc.php' % (instance.woo_host), instance.woo_admin_username,
+                  instance.woo_admin_password, instance.id)
+    if len(images) == 1:
+        key, image_data, image_name, mime_type = images[0]
+        return {key: _upload(connection, image_data, image_name, mime_type)}
+    with ThreadPoolExecutor(max_workers=max(min(instance.woo_concurrent_requests, len(images)), 1)) as executor:
+        results = executor.map(lambda image: _upload(connection, *image[1:]), images)
+        return dict(zip([image[0] for image in images], results))
 
 
 def fetch_image(image_url):
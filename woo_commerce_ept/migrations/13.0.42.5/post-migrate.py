@@ -0,0 +1,34 @@
+"""
+Converts the order and coupon queue line data stored as Python repr strings into JSON.
+"""
+import ast
+import json
+import logging
+
+_logger = logging.getLogger("Woo")
+
+
+def convert_queue_line_data(cr, table, column):
+    """
+    Rewrites the repr strings of the column as JSON, by batch of 1000 lines.
+    """
+    query = "SELECT id, {column} FROM {table} WHERE {column} LIKE '{{''%%' AND id > %s ORDER BY id LIMIT 1000".format(
+        table=table, column=column)
+    last_id = 0
+    while True:
+        cr.execute(query, (last_id,))
+        rows = cr.fetchall()
+        if not rows:
+            break
+        for line_id, data in rows:
+            try:
+                cr.execute("UPDATE {table} SET {column} = %s WHERE id = %s".format(table=table, column=column),
+                           (json.dumps(ast.literal_eval(data)), line_id))
+            except (ValueError, SyntaxError):
+                _logger.warning("Could not convert %s of %s %s into JSON.", column, table, line_id)
+        last_id = rows[-1][0]
+
+
+def migrate(cr, version):
+    convert_queue_line_data(cr, "woo_order_data_queue_line_ept", "order_data")
+    convert_queue_line_data(cr, "woo_coupon_data_queue_line_ept", "coupon_data")
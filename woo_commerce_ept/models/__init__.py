@@ -5,6 +5,7 @@ from . import res_partner
 from . import sale_order
 from . import product_image_ept
 from . import product_ept
+from . import stock_ledger_ept
 from . import product_data_queue_ept
 from . import product_data_queue_line_ept
 from . import common_log_book_ept
@@ -19,6 +20,7 @@ from . import customer_data_queue_line_ept
 from . import order_data_queue_ept
 from . import order_data_queue_line_ept
 from . import webhook_ept
+from . import webhook_inbox_ept
 from . import import_order_status_ept
 from . import delivery_carrier
 from . import stock_move
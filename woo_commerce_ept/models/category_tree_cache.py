@@ -0,0 +1,53 @@
+"""
+For woo_commerce_ept module.
+"""
+
+
+class WooCategoryTreeCache(object):
+    """
+    Categories of a WooCommerce store, read once per product sync and indexed by id and by lower
+    case name, so the categories of the products and their parents are found without requests.
+    The categories created in WooCommerce during the sync are added by the exporter.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.by_id = {}
+        self.by_name = {}
+
+    def load(self, categories):
+        self.by_id.clear()
+        self.by_name.clear()
+        for category in categories:
+            self.add(category)
+        self.loaded = True
+
+    def add(self, category):
+        if not isinstance(category, dict) or not category.get("id"):
+            return
+        self.by_id[category["id"]] = category
+        name = (category.get("name") or "").lower()
+        # The first category of a name is used, like the name search did before.
+        self.by_name.setdefault(name, category)
+
+    def get(self, categ_id):
+        try:
+            return self.by_id.get(int(categ_id))
+        except (TypeError, ValueError):
+            return None
+
+    def find_by_name(self, name):
+        return self.by_name.get((name or "").lower())
+
+    def get_chain(self, category):
+        """
+        Gives the category and its parents, the root category first.
+        """
+        chain = []
+        seen = set()
+        while category and category["id"] not in seen:
+            chain.append(category)
+            seen.add(category["id"])
+            category = category.get("parent") and self.by_id.get(category["parent"])
+        chain.reverse()
+        return chain
@@ -1,3 +1,4 @@
+import json
 from odoo import models, fields, api
 import logging
 _logger = logging.getLogger("WooCommerce")
@@ -83,7 +84,7 @@ class WooCouponDataQueueEpt(models.Model):
         for coupon in coupons:
             vals_list.append({"coupon_data_queue_id":self.id,
                               "woo_coupon":coupon["id"],
-                              "coupon_data":coupon,
+                              "coupon_data":json.dumps(coupon),
                               "number": coupon["code"],
                               })
         if vals_list:
@@ -1,4 +1,4 @@
-import ast
+import json
 import logging
 
 import requests
@@ -129,7 +129,7 @@ class WooCoupons(models.Model):
                 queue_line.coupon_data_queue_id.is_process_queue = True
                 self._cr.commit()
                 commit_count = 0
-            coupon = ast.literal_eval(queue_line.coupon_data)
+            coupon = json.loads(queue_line.coupon_data)
             coupon_id = coupon.get("id")
             if not coupon.get("code"):
                 message = "Coupon code not available in coupon number %s" % (coupon_id)
@@ -219,40 +219,19 @@ class WooCoupons(models.Model):
             queue_line.coupon_data_queue_id.is_process_queue = False
         return woo_coupons
 
-    def woo_import_all_coupons(self, wcapi, instance, page, common_log_book_id, model_id):
+    def woo_import_all_coupons(self, instance, common_log_book_id, model_id):
         """
-        this method is used to import the all coupons from woo commerce.
-        :param wcapi:
+        this method is used to import the all coupons from woo commerce, the pages are fetched concurrently.
         :param instance: woo commerce instance
-        :param page: coupons data page no
         :param common_log_book_id: common log book id for create a log.
         :param model_id:
-        :return:
+        :return: generator of the coupons data
         @author : Nilesh Parmar on date 17 Dec 2019.
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        try:
-            res = wcapi.get("coupons", params={"per_page": 100, 'page': page})
-        except Exception as e:
-            raise Warning("Something went wrong while importing coupons.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        if not isinstance(res, requests.models.Response):
-            message = "Get Coupons \nResponse is not in proper format :: %s" % (res)
-            common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            return True
-        if res.status_code not in [200, 201]:
-            message = res.content
-            common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            return True
-        try:
-            result = res.json()
-        except Exception as e:
-            message = "Json Error : While import coupon from WooCommerce for instance %s. \n%s" % (
-                instance.name, e),
-            common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            return False
-        return result
+        return instance.woo_fetch_collection(
+            "coupons", "coupons", "coupons",
+            lambda message: common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False))
 
     def create_woo_coupon_data_queue(self, woo_instance, coupon_data, created_by="import"):
         """
@@ -275,35 +254,7 @@ class WooCoupons(models.Model):
         return coupon_data_queue
 
     def sync_woo_coupons(self, instance, common_log_book_id, model_id):
-        common_log_line_obj = self.env["common.log.lines.ept"]
-        wcapi = instance.woo_connect()
-        try:
-            res = wcapi.get('coupons', params={"per_page": 100})
-        except Exception as e:
-            raise Warning("Something went wrong while importing coupons.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        if not isinstance(res, requests.models.Response):
-            message = "Get Coupons \nResponse is not in proper format :: %s" % (res)
-            common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            return True
-        if res.status_code not in [200, 201]:
-            message = res.content
-            common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            return True
-        results = []
-        total_pages = res and res.headers.get('x-wp-totalpages', 0) or 1
-        try:
-            res = res.json()
-        except Exception as e:
-            message = "Json Error : While import coupon from WooCommerce for instance %s. \n%s" % (
-                instance.name, e),
-            common_log_line_obj.woo_create_log_line(message, model_id, common_log_book_id, False)
-            return False
-        results = res
-        if int(total_pages) >= 2:
-            for page in range(2, int(total_pages) + 1):
-                results += self.woo_import_all_coupons(wcapi, instance, page, common_log_book_id, model_id)
+        results = list(self.woo_import_all_coupons(instance, common_log_book_id, model_id))
         if not results:
             _logger.info("Coupons data not found from woo")
             return True
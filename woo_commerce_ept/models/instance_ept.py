@@ -1,16 +1,24 @@
 """
 For woo_commerce_ept module.
 """
+import os
 import requests
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .. import woocommerce
 from calendar import monthrange
-from odoo import models, fields, api, _
+from odoo import models, fields, api, tools, _
 from odoo.addons.base.models.res_partner import _tz_get
 from odoo.exceptions import Warning
 
 _logger = logging.getLogger("Woo")
 
+# Woo API clients of the worker, keyed by database and instance so that every call of an instance
+# reuses the same keep-alive session. The client is replaced when the credentials of the instance change.
+_woo_api_clients = {}
+_woo_api_clients_lock = threading.Lock()
+
 _secondsConverter = {
     'days': lambda interval: interval * 24 * 60 * 60,
     'hours': lambda interval: interval * 60 * 60,
@@ -278,6 +286,9 @@ class woo_instance_ept(models.Model):
                                       default=_default_stock_field)
     woo_last_synced_order_date = fields.Datetime(string="Last Date of Import Order",
                                                  help="Which from date to import woo order from woo commerce")
+    woo_concurrent_requests = fields.Integer("Concurrent Requests", default=4,
+                                             help="Maximum number of pages requested at the same time while "
+                                                  "importing data from WooCommerce.")
     woo_warehouse_id = fields.Many2one('stock.warehouse', string='Warehouse', check_company=True,
                                        default=_get_default_warehouse, required=True)
     woo_visible = fields.Boolean("Visible on the product page?", default=True,
@@ -461,9 +472,69 @@ class woo_instance_ept(models.Model):
             'sales_team_id': sales_channel.id,
             'global_channel_id': global_channel.id
         })
+        self.clear_caches()
 
         return instance
 
+    def write(self, vals):
+        """
+        Inherited for clearing the cached instances of the webhook hosts when the host or the active
+        state is changed.
+        """
+        res = super(woo_instance_ept, self).write(vals)
+        if "woo_host" in vals or "active" in vals:
+            self.clear_caches()
+        return res
+
+    def unlink(self):
+        """
+        Inherited for clearing the cached instances of the webhook hosts and the API clients.
+        """
+        dbname, instance_ids = self._cr.dbname, self.ids
+        res = super(woo_instance_ept, self).unlink()
+        self.clear_caches()
+        with _woo_api_clients_lock:
+            for instance_id in instance_ids:
+                client = _woo_api_clients.pop((dbname, instance_id), None)
+                if client and client[0] == os.getpid():
+                    client[2].session.close()
+        return res
+
+    @staticmethod
+    def normalize_woo_host(host):
+        """
+        Gives the host without protocol and trailing slash, in lower case.
+        """
+        host = (host or "").strip().lower()
+        if "//" in host:
+            host = host.split("//", 1)[1]
+        return host.rstrip("/")
+
+    @api.model
+    @tools.ormcache("host")
+    def _get_webhook_instance_ids(self, host):
+        """
+        Gives the ids of the active instances receiving the webhooks of a host. The result is kept in
+        the cache of the worker until an instance is changed.
+        @param host: Normalized host sent by WooCommerce.
+        @return: Tuple of instance ids.
+        """
+        instances = self.search_read([], ["woo_host"], order="id")
+        instance_ids = tuple(instance["id"] for instance in instances
+                             if self.normalize_woo_host(instance["woo_host"]) == host)
+        if not instance_ids and host:
+            # Hosts stored differently are found like before.
+            instance_ids = tuple(self.search([("woo_host", "ilike", host)]).ids)
+        return instance_ids
+
+    @api.model
+    def get_instance_for_webhook(self, host):
+        """
+        Gives the active instances of the host of a webhook request.
+        @param host: Host sent by WooCommerce in the X-WC-Webhook-Source header.
+        """
+        return self.browse(self._get_webhook_instance_ids(self.normalize_woo_host(host)))
+
     def woo_create_pricelist(self):
         """
         Create price list for woocommerce instance
@@ -658,18 +729,142 @@ class woo_instance_ept(models.Model):
     def woo_connect(self):
         """
         Creates connection for given instance of Woo.
+        The client is cached for the life of the worker, so its pooled session is reused by every call.
         @author: Maulik Barad on Date 09-Jan-2019.
         """
-        host = self.woo_host
-        consumer_key = self.woo_consumer_key
-        consumer_secret = self.woo_consumer_secret
         wp_api = False if self.woo_version == 'v3' else True
-        wcapi = woocommerce.api.API(url=host, consumer_key=consumer_key,
-                                    consumer_secret=consumer_secret, verify_ssl=self.woo_verify_ssl,
-                                    wp_api=wp_api,
-                                    version=self.woo_version, query_string_auth=True)
+        key = (self._cr.dbname, self.id)
+        settings = (self.woo_host, self.woo_consumer_key, self.woo_consumer_secret, self.woo_verify_ssl,
+                    self.woo_version)
+        pid = os.getpid()
+        with _woo_api_clients_lock:
+            client_pid, client_settings, wcapi = _woo_api_clients.get(key, (None, None, None))
+            if client_pid == pid and client_settings == settings:
+                return wcapi
+            if wcapi and client_pid == pid:
+                # The credentials are changed, the session of the old ones is closed.
+                wcapi.session.close()
+            wcapi = woocommerce.api.API(url=self.woo_host, consumer_key=self.woo_consumer_key,
+                                        consumer_secret=self.woo_consumer_secret,
+                                        verify_ssl=self.woo_verify_ssl, wp_api=wp_api,
+                                        version=self.woo_version, query_string_auth=True,
+                                        max_retries=3)
+            # The client of the parent of a forked worker is replaced, its sockets must not be shared.
+            _woo_api_clients[key] = (pid, settings, wcapi)
         return wcapi
 
+    def woo_fetch_pages_concurrently(self, fetch_page, pages):
+        """
+        Fetches the given pages with a pool of at most woo_concurrent_requests threads and yields the
+        responses in the order they arrive.
+        fetch_page runs outside of the main thread, so it must only call the Woo API and never the ORM.
+        @param fetch_page: Callable receiving a page number and returning its response.
+        @param pages: Page numbers to fetch.
+        """
+        executor = ThreadPoolExecutor(max_workers=max(self.woo_concurrent_requests, 1))
+        futures = [executor.submit(fetch_page, page) for page in pages]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def woo_get_collection_page_fetcher(self, wcapi, path, label):
+        """
+        Gives a function getting one page of a collection of the Woo API, 100 records per page, 1000 for
+        the legacy API. The function only calls the Woo API, so it can run in the threads of
+        woo_fetch_pages_concurrently.
+        @param wcapi: Connection of the instance.
+        @param path: Endpoint of the collection, like products/attributes.
+        @param label: Name of the records used in the error message, like attributes.
+        """
+        legacy = self.woo_version == 'v3'
+
+        def fetch_page(page):
+            try:
+                if legacy:
+                    return wcapi.get("%s?filter[limit]=1000&page=%s" % (path, page))
+                return wcapi.get(path, params={'per_page': 100, 'page': page})
+            except Exception as e:
+                raise Warning("Something went wrong while importing %s.\n\nPlease Check your Connection and "
+                              "Instance Configuration.\n\n%s" % (label, str(e)))
+
+        return fetch_page
+
+    def woo_read_collection_page(self, response, record_key, label):
+        """
+        Gives the records of a page of a collection and the error message when the page can not be read.
+        @param response: Response of the page.
+        @param record_key: Key of the records in the responses of the legacy API, like product_attributes.
+        @param label: Name of the records used in the error message.
+        @return: Tuple of (list of records, error message or False).
+        """
+        if not isinstance(response, requests.models.Response):
+            return [], "Get All %s \nResponse is not in proper format :: %s" % (label, response)
+        if response.status_code not in [200, 201]:
+            return [], response.content
+        try:
+            data = response.json()
+        except Exception as e:
+            return [], "Json Error : While import %s from WooCommerce for instance %s. \n%s" % (label, self.name, e)
+        if self.woo_version == 'v3':
+            errors = data.get('errors', '')
+            if errors:
+                return [], errors[0].get('message')
+            data = data.get(record_key) or []
+        if not isinstance(data, list):
+            return [], "Response is not in proper format :: %s" % data
+        return data, False
+
+    def woo_fetch_collection(self, path, record_key, label, log_error, first_response=None):
+        """
+        Yields the records of all the pages of a collection of the Woo API.
+        The number of pages is read from the first page (X-WP-TotalPages, X-WC-TotalPages for the legacy
+        API) and the other pages are fetched with woo_fetch_pages_concurrently, so the records of a page are
+        yielded as soon as it arrives and not in the order of the pages.
+        @param path: Endpoint of the collection, like products/attributes.
+        @param record_key: Key of the records in the responses of the legacy API, like product_attributes.
+        @param label: Name of the records used in the error messages, like attributes.
+        @param log_error: Callable receiving the message of a page which can not be read.
+        @param first_response: Response of the first page, when it is already fetched.
+        """
+        fetch_page = self.woo_get_collection_page_fetcher(self.woo_connect(), path, label)
+        response = first_response if first_response is not None else fetch_page(1)
+        records, error = self.woo_read_collection_page(response, record_key, label)
+        if error:
+            log_error(error)
+            return
+        for record in records:
+            yield record
+
+        if self.woo_version == 'v3':
+            total, total_pages = response.headers.get('X-WC-Total'), response.headers.get('X-WC-TotalPages')
+        else:
+            total, total_pages = response.headers.get('X-WP-Total'), response.headers.get('X-WP-TotalPages')
+        if not total_pages:
+            # Without the header, the pages are read one by one until a page is not full.
+            page_size = 1000 if self.woo_version == 'v3' else 100
+            page = 1
+            while len(records) >= page_size:
+                page += 1
+                records, error = self.woo_read_collection_page(fetch_page(page), record_key, label)
+                if error:
+                    log_error(error)
+                    return
+                for record in records:
+                    yield record
+            return
+        _logger.info("Importing %s %s of %s from %s pages.", total or "", label, self.name, total_pages)
+        for response in self.woo_fetch_pages_concurrently(fetch_page, range(2, int(total_pages) + 1)):
+            records, error = self.woo_read_collection_page(response, record_key, label)
+            if error:
+                log_error(error)
+                continue
+            for record in records:
+                yield record
+
     def confirm(self):
         """
         Performs needed operations for instance after its creation.
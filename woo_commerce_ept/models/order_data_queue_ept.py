@@ -1,6 +1,7 @@
 """
 For woo_commerce_ept module.
 """
+import json
 from odoo import models, fields, api
 
 
@@ -93,7 +94,7 @@ class WooOrderDataQueueEpt(models.Model):
         for order in orders:
             vals_list.append({"order_data_queue_id":self.id,
                               "woo_order":order["id"],
-                              "order_data":order,
+                              "order_data":json.dumps(order),
                               "number": order["number"],
                               })
         if vals_list:
@@ -0,0 +1,59 @@
+"""
+For woo_commerce_ept module.
+"""
+
+
+class WooOrderProductMatcher(object):
+    """
+    Finds the Woo products of the order lines of a queue batch from memory.
+
+    The Woo products having the variant ids and SKUs of the lines are read with one query per key,
+    then every line is matched with the same rules as
+    woo.product.template.ept.search_odoo_product_variant. The products imported for the batch are
+    read by loading their lines again.
+    """
+
+    def __init__(self, env, instance):
+        self.env = env
+        self.instance = instance
+        self.woo_by_variant = {}
+        self.woo_by_sku = {}
+        self.woo_by_product_sku = {}
+
+    @staticmethod
+    def get_variant_id(order_line):
+        return order_line.get("variation_id") or order_line.get("product_id")
+
+    def load(self, order_lines):
+        variant_ids = {str(self.get_variant_id(order_line)) for order_line in order_lines
+                       if self.get_variant_id(order_line)}
+        skus = {order_line.get("sku") for order_line in order_lines if order_line.get("sku")}
+        woo_product_obj = self.env["woo.product.product.ept"].with_context(active_test=False)
+        domain = [("woo_instance_id", "=", self.instance.id)]
+        if variant_ids:
+            for woo_product in woo_product_obj.search_read(domain + [("variant_id", "in", list(variant_ids))],
+                                                           ["variant_id"]):
+                self.woo_by_variant.setdefault(woo_product["variant_id"], woo_product["id"])
+        if not skus:
+            return
+        for woo_product in woo_product_obj.search_read(domain + [("default_code", "in", list(skus))],
+                                                       ["default_code"]):
+            self.woo_by_sku.setdefault(woo_product["default_code"], woo_product["id"])
+        product_skus = {product["id"]: product["default_code"] for product in
+                        self.env["product.product"].with_context(active_test=False).search_read(
+                            [("default_code", "in", list(skus))], ["default_code"])}
+        if product_skus:
+            for woo_product in woo_product_obj.search_read(domain + [("product_id", "in", list(product_skus))],
+                                                           ["product_id"]):
+                self.woo_by_product_sku.setdefault(product_skus[woo_product["product_id"][0]], woo_product["id"])
+
+    def search(self, order_line):
+        """
+        Returns the Woo product of an order line, an empty record when it is not found.
+        """
+        variant_id = self.get_variant_id(order_line)
+        sku = order_line.get("sku")
+        woo_product_id = variant_id and self.woo_by_variant.get(str(variant_id))
+        if not woo_product_id and sku:
+            woo_product_id = self.woo_by_sku.get(sku) or self.woo_by_product_sku.get(sku)
+        return self.env["woo.product.product.ept"].browse(woo_product_id or [])
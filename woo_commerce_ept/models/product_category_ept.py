@@ -2,6 +2,7 @@ import requests, base64
 import logging
 from odoo import models, fields, api, _
 from ..img_upload import img_file_upload
+from .category_tree_cache import WooCategoryTreeCache
 from odoo.tools.mimetypes import guess_mimetype
 
 _logger = logging.getLogger("Woo")
@@ -50,205 +51,124 @@ class WooProductCategoryEpt(models.Model):
     def name_create(self, name):
         return self.create({'name': name}).name_get()[0]
 
+    def woo_get_cached_category_tree(self, instance):
+        """
+        Gives the category tree of the instance kept for the current product sync, None when the
+        sync does not keep one.
+        """
+        trees = self._context.get('woo_category_trees')
+        if trees is None:
+            return None
+        return trees.setdefault(instance.id, WooCategoryTreeCache())
+
+    def woo_get_category_tree(self, instance, woo_common_log_id, model_id):
+        """
+        Gives the loaded category tree of the instance, all the pages of categories are read when
+        the tree of the sync is not loaded yet.
+        """
+        tree = self.woo_get_cached_category_tree(instance)
+        if tree is None:
+            tree = WooCategoryTreeCache()
+        if not tree.loaded:
+            tree.load(self.import_all_woo_categories(instance, woo_common_log_id, model_id))
+        return tree
+
     def create_or_update_woo_categ(self, instance, woo_common_log_id, model_id,
                                    woo_product_categ_name, sync_images_with_product=True):
-        common_log_line_obj = self.env["common.log.lines.ept"]
         woo_categ = False
-        categ_name_list = []
-        product_categ_ids = []
-        wcapi = instance.woo_connect()
-        try:
-            categ_res = wcapi.get("products/categories?fields=id,name,parent")
-        except Exception as e:
-            raise Warning("Something went wrong while importing categories.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        if not isinstance(categ_res, requests.models.Response):
-            message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                categ_res)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return False
-        if categ_res.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(categ_res.content, model_id,
-                                                            woo_common_log_id, False)
-            return False
-        try:
-            categ_response = categ_res.json()
-        except Exception as e:
-            message = "Json Error : While import product category %s from WooCommerce for " \
-                      "instance %s. \n%s" % (woo_product_categ_name, instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return False
-        if instance.woo_version == 'v3':
-            product_categories = categ_response.get('product_categories')
-        else:
-            product_categories = categ_response
-        categ = list(filter(lambda categ: categ['name'].lower() == woo_product_categ_name.lower(),
-                            product_categories))
-        if categ:
-            categ = categ[0]
-            product_categ_ids.append(categ.get('id'))
-            categ_name_list.append(woo_product_categ_name.lower())
-        for product_categ_id in product_categ_ids:
-            tmp_categ = list(
-                filter(lambda categ1: categ1['id'] == product_categ_id, product_categories))
-            if tmp_categ:
-                tmp_categ = tmp_categ[0]
-                if tmp_categ.get('parent') and tmp_categ.get('parent') not in product_categ_ids:
-                    product_categ_ids.append(tmp_categ.get('parent'))
-                    tmp_parent_categ = list(
-                        filter(lambda categ2: categ2['id'] == tmp_categ.get('parent'),
-                               product_categories))
-                    tmp_parent_categ and categ_name_list.append(
-                        tmp_parent_categ[0].get('name').lower())
-
-        product_categ_ids.reverse()
-        for product_categ_id in product_categ_ids:
-            try:
-                response = wcapi.get("products/categories/%s" % product_categ_id)
-            except Exception as e:
-                raise Warning("Something went wrong while importing categories.\n\nPlease Check your Connection and "
-                              "Instance Configuration.\n\n" + str(e))
+        tree = self.woo_get_category_tree(instance, woo_common_log_id, model_id)
+        categ = tree.find_by_name(woo_product_categ_name)
+        parent_ids = {}
+        for single_catg in tree.get_chain(categ):
+            woo_categ = self.woo_create_or_update_categ_from_data(instance, single_catg, sync_images_with_product,
+                                                                  parent_ids.get(single_catg.get('parent')))
+            parent_ids[single_catg.get('id')] = woo_categ.id
+        return woo_categ
 
-            if not isinstance(response, requests.models.Response):
-                message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                    response)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                continue
-            if response.status_code not in [200, 201]:
-                common_log_line_obj.woo_product_export_log_line(response.content, model_id,
-                                                                woo_common_log_id, False)
-                continue
-            try:
-                response = response.json()
-            except Exception as e:
-                message = "Json Error : While import product category with id %s from " \
-                          "WooCommerce for instance %s. \n%s" % (
-                              product_categ_id, instance.name, e)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                continue
+    def woo_create_or_update_categ_from_data(self, instance, single_catg, sync_images_with_product=True,
+                                             parent_id=None):
+        """
+        Creates or updates the category from the data of WooCommerce.
+        :param instance: Record of the Woo instance.
+        :param single_catg: Data of the category in WooCommerce.
+        :param sync_images_with_product: Sync the image of the category or not.
+        :param parent_id: Id of the parent category in Odoo when it is known.
+        :return: Record of the category.
+        """
+        parent_woo_id = single_catg.get('parent')
+        binary_img_data = False
+        if parent_id is None:
+            parent_id = False
+            if parent_woo_id:
+                parent_id = self.search([('woo_categ_id', '=', parent_woo_id),
+                                         ('woo_instance_id', '=', instance.id)], limit=1).id
+        vals = {'name': single_catg.get('name'), 'woo_instance_id': instance.id, 'parent_id': parent_id,
+                'woo_categ_id': single_catg.get('id'),
+                'display': single_catg.get('display'), 'slug': single_catg.get('slug'),
+                'exported_in_woo': True, 'description': single_catg.get('description', '')}
+        if sync_images_with_product:
+            res_image = False
             if instance.woo_version == 'v3':
-                categ = response.get('product_category')
+                res_image = single_catg.get('image')
             else:
-                categ = response
-            product_category = {'id': categ.get('id'), 'name': categ.get('name')}
-            categ_name = product_category.get('name')
-            if categ_name.lower() in categ_name_list:
-                try:
-                    single_catg_res = wcapi.get("products/categories/%s" % (product_category.get('id')))
-                except Exception as e:
-                    raise Warning("Something went wrong while importing categories.\n\nPlease Check your Connection and"
-                                  " Instance Configuration.\n\n" + str(e))
-
-                if not isinstance(single_catg_res, requests.models.Response):
-                    message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                        single_catg_res)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                try:
-                    single_catg_response = single_catg_res.json()
-                except Exception as e:
-                    message = "Json Error : While import product category with id %s from" \
-                              " WooCommerce for instance %s. \n%s" % (
-                                  product_category.get('id'), instance.name, e)
-                    common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                    woo_common_log_id, False)
-                    continue
-                if instance.woo_version == 'v3':
-                    single_catg = single_catg_response.get('product_category')
-                else:
-                    single_catg = single_catg_response
-                parent_woo_id = single_catg.get('parent')
-                parent_id = False
-                binary_img_data = False
-                if parent_woo_id:
-                    parent_id = self.search([('woo_categ_id', '=', parent_woo_id),
-                                             ('woo_instance_id', '=', instance.id)], limit=1).id
-                vals = {'name': categ_name, 'woo_instance_id': instance.id, 'parent_id': parent_id,
-                        'woo_categ_id': product_category.get('id'),
-                        'display': single_catg.get('display'), 'slug': single_catg.get('slug'),
-                        'exported_in_woo': True, 'description': single_catg.get('description', '')}
-                if sync_images_with_product:
-                    res_image = False
-                    if instance.woo_version == 'v3':
-                        res_image = single_catg.get('image')
-                    else:
-                        res_image = single_catg.get('image') and single_catg.get('image').get('src',
-                                                                                              '')
-                    if instance.woo_is_image_url:
-                        res_image and vals.update({'response_url': res_image})
-                    else:
-                        if res_image:
-                            try:
-                                res_img = requests.get(res_image, stream=True, verify=False,
-                                                       timeout=10)
-                                if res_img.status_code == 200:
-                                    binary_img_data = base64.b64encode(res_img.content)
-                            except Exception:
-                                pass
-                        binary_img_data and vals.update({'image': binary_img_data})
-                woo_categ = self.search([('woo_categ_id', '=', product_category.get('id')),
-                                         ('woo_instance_id', '=', instance.id)], limit=1)
-                if not woo_categ:
-                    woo_categ = self.search([('slug', '=', product_category.get('slug')),
-                                             ('woo_instance_id', '=', instance.id)], limit=1)
-                if woo_categ:
-                    woo_categ.write(vals)
-                else:
-                    woo_categ = self.create(vals)
+                res_image = single_catg.get('image') and single_catg.get('image').get('src',
+                                                                                      '')
+            if instance.woo_is_image_url:
+                res_image and vals.update({'response_url': res_image})
+            else:
+                if res_image:
+                    try:
+                        res_img = requests.get(res_image, stream=True, verify=False,
+                                               timeout=10)
+                        if res_img.status_code == 200:
+                            binary_img_data = base64.b64encode(res_img.content)
+                    except Exception:
+                        pass
+                binary_img_data and vals.update({'image': binary_img_data})
+        woo_categ = self.search([('woo_categ_id', '=', single_catg.get('id')),
+                                 ('woo_instance_id', '=', instance.id)], limit=1)
+        if not woo_categ:
+            woo_categ = self.search([('slug', '=', single_catg.get('slug')),
+                                     ('woo_instance_id', '=', instance.id)], limit=1)
+        if woo_categ:
+            woo_categ.write(vals)
+        else:
+            woo_categ = self.create(vals)
         return woo_categ
 
-    def import_all_woo_categories(self, wcapi, instance, page, woo_common_log_id, model_id):
+    def import_all_woo_categories(self, instance, woo_common_log_id, model_id):
+        """
+        Yields the categories of all the pages, the pages are fetched concurrently.
+        :param instance: Record of the Woo instance.
+        :param woo_common_log_id: Record of the common log book.
+        :param model_id: Id of the model for the log lines.
+        """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        try:
-            if instance.woo_version == 'v3':
-                res = wcapi.get("products/categories?filter[limit]=1000&page=%s" % (page))
-            else:
-                res = wcapi.get("products/categories", params={'per_page': 100, 'page': page})
-        except Exception as e:
-            raise Warning("Something went wrong while importing categories.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        if not isinstance(res, requests.models.Response):
-            message = "Get All Product Category \nResponse is not in proper format :: %s" % (
-                res)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        if res.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(res.content, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        try:
-            response = res.json()
-        except Exception as e:
-            message = "Json Error : While import product categories from WooCommerce for " \
-                      "instance %s. \n%s" % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        if instance.woo_version == 'v3':
-            errors = response.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return []
-            return response.get('product_categories')
-        else:
-            return response
+        return instance.woo_fetch_collection(
+            "products/categories", "product_categories", "product categories",
+            lambda message: common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                                            False))
 
     def sync_woo_product_category(self, instance, woo_common_log_id, woo_product_categ=False,
                                   woo_product_categ_name=False, sync_images_with_product=True):
         common_log_line_obj = self.env["common.log.lines.ept"]
         model_id = common_log_line_obj.get_model_id("woo.product.categ.ept")
         wcapi = instance.woo_connect()
-        if woo_product_categ and woo_product_categ.exported_in_woo:
+        tree = self.woo_get_cached_category_tree(instance)
+        if woo_product_categ and woo_product_categ.exported_in_woo and tree is not None and tree.loaded:
+            # The category and its parents are taken from the categories read for the sync. The tree is
+            # only read to find a category by name, an exported category is requested alone before.
+            categ = tree.get(woo_product_categ.woo_categ_id)
+            if not categ:
+                self.export_product_categs(instance, [woo_product_categ], woo_common_log_id,
+                                           model_id)
+                return True
+            parent_ids = {}
+            for single_catg in tree.get_chain(categ):
+                parent_ids[single_catg.get('id')] = self.woo_create_or_update_categ_from_data(
+                    instance, single_catg, sync_images_with_product, parent_ids.get(single_catg.get('parent'))).id
+            return True
+        elif woo_product_categ and woo_product_categ.exported_in_woo:
             try:
                 response = wcapi.get("products/categories/%s" % woo_product_categ.woo_categ_id)
             except Exception as e:
@@ -282,61 +202,27 @@ class WooProductCategoryEpt(models.Model):
                                                         sync_images_with_product)
             return woo_categ
         else:
+            results = list(self.import_all_woo_categories(instance, woo_common_log_id, model_id))
+
+        if woo_product_categ:
             try:
-                if instance.woo_version == 'v3':
-                    response = wcapi.get("products/categories?filter[limit]=1000")
-                else:
-                    response = wcapi.get("products/categories", params={'per_page': 100})
+                res = response.json()
             except Exception as e:
-                raise Warning("Something went wrong while importing categories.\n\nPlease Check your Connection and "
-                              "Instance Configuration.\n\n" + str(e))
-
-            if not isinstance(response, requests.models.Response):
-                message = "Get Product Category \nResponse is not in proper format :: %s" % (
-                    response)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return True
-            if response.status_code not in [200, 201]:
-                message = response.content
+                message = "Json Error : While import product categories from WooCommerce for " \
+                          "instance %s. \n%s" % (instance.name, e)
                 common_log_line_obj.woo_product_export_log_line(message, model_id,
                                                                 woo_common_log_id, False)
-                return True
-
-        total_pages = 1
-        if instance.woo_version == 'v3':
-            total_pages = response and response.headers.get('X-WC-TotalPages') or 1
-        else:
-            total_pages = response and response.headers.get('x-wp-totalpages') or 1
-        try:
-            res = response.json()
-        except Exception as e:
-            message = "Json Error : While import product categories from WooCommerce for " \
-                      "instance %s. \n%s" % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id, False)
-            return False
-        if instance.woo_version == 'v3':
-            errors = res.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id, False)
-                return True
-            if woo_product_categ:
-                response = res.get('product_category')
-                results = [response]
+                return False
+            if instance.woo_version == 'v3':
+                errors = res.get('errors', '')
+                if errors:
+                    message = errors[0].get('message')
+                    common_log_line_obj.woo_product_export_log_line(message, model_id,
+                                                                    woo_common_log_id, False)
+                    return True
+                results = [res.get('product_category')]
             else:
-                results = res.get('product_categories')
-        else:
-            if woo_product_categ:
                 results = [res]
-            else:
-                results = res
-        if int(total_pages) >= 2:
-            for page in range(2, int(total_pages) + 1):
-                results = results + self.import_all_woo_categories(wcapi, instance, page,
-                                                                   woo_common_log_id, model_id)
 
         processed_categs = []
         for res in results:
@@ -442,7 +328,10 @@ class WooProductCategoryEpt(models.Model):
     def export_product_categs(self, instance, woo_product_categs, woo_common_log_id, model_id):
         common_log_line_obj = self.env['common.log.lines.ept']
         wcapi = instance.woo_connect()
+        tree = self.woo_get_cached_category_tree(instance)
         for woo_product_categ in woo_product_categs:
+            if woo_product_categ.woo_categ_id and tree is not None and tree.get(woo_product_categ.woo_categ_id):
+                continue
             if woo_product_categ.woo_categ_id:
                 try:
                     res = wcapi.get("products/categories/%s" % woo_product_categ.woo_categ_id)
@@ -578,6 +467,8 @@ class WooProductCategoryEpt(models.Model):
                     response_data.update(
                         {'woo_categ_id': product_categ_id, 'slug': slug, 'exported_in_woo': True})
                     woo_product_categ.write(response_data)
+                    if tree is not None and tree.loaded:
+                        tree.add(product_categ)
         return True
 
     def update_product_categs_in_woo(self, instance, woo_product_categs):
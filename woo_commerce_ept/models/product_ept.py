@@ -116,10 +116,13 @@ class WooProductTemplateEpt(models.Model):
 
         if variant_images:
             if not variant_images[0].woo_image_id:
-                res = img_file_upload.upload_image(instance, variant_images[0].image,
-                                                   "%s_%s" % (variant.name, variant.id),
-                                                   variant_images[0].image_mime_type)
-                image_id = res and res.get('id', False) or ''
+                key = variant_images[0].image and hashlib.md5(variant_images[0].image).hexdigest()
+                image_id = key and self.woo_get_uploaded_image_ids(instance, [key]).get(key)
+                if not image_id:
+                    res = img_file_upload.upload_image(instance, variant_images[0].image,
+                                                       "%s_%s" % (variant.name, variant.id),
+                                                       variant_images[0].image_mime_type)
+                    image_id = res and res.get('id', False) or ''
             else:
                 image_id = variant_images[0].woo_image_id
 
@@ -341,8 +344,14 @@ class WooProductTemplateEpt(models.Model):
         common_log_line_obj = self.env["common.log.lines.ept"]
         model = "woo.product.product.ept"
         product_obj = self.env['product.product']
+        stock_ledger_obj = self.env['woo.stock.ledger.ept']
         model_id = common_log_line_obj.get_model_id(model)
         log_line_id = []
+        # Quantities already sent to WooCommerce, the unchanged ones are not sent again. All quantities
+        # are sent when the stock is exported for the selected products, so the user can send the stock again.
+        last_quantities = {}
+        if not self._context.get('is_process_from_selected_product'):
+            last_quantities = stock_ledger_obj.get_last_exported_quantities(instance)
         location_ids = instance.woo_warehouse_id.lot_stock_id.child_ids.ids
         location_ids.append(instance.woo_warehouse_id.lot_stock_id.id)
         wcapi = instance.woo_connect()
@@ -358,11 +367,12 @@ class WooProductTemplateEpt(models.Model):
             for variant in template.woo_product_ids:
                 if variant.variant_id and variant.product_id.type == 'product' and variant.woo_is_manage_stock:
                     if variant.product_id.id in self._context.get('updated_products_in_inventory'):
-                        quantity = [x['stock'] for i, x in enumerate(export_product_stock) if
-                                    x['product_id'] == variant.product_id.id][0]
+                        quantity = export_product_stock.get(variant.product_id.id)
                         if not quantity:
                             quantity = self.get_stock(variant, instance.woo_warehouse_id.id,
                                                       instance.woo_stock_field.name)
+                        if last_quantities.get(str(variant.variant_id)) == int(quantity):
+                            continue
                         info.get('variations').append({
                             'id': variant.variant_id,
                             'manage_stock': True,
@@ -385,6 +395,9 @@ class WooProductTemplateEpt(models.Model):
                             'message': "Update Product Stock\n%s" % res.content,
                         })
                         log_line_id.append(log_id.id)
+                    else:
+                        stock_ledger_obj.set_last_exported_quantities(
+                            instance, self.woo_get_exported_stock_from_batch(res, woo_variants))
         # Update stock for simple products
         woo_products_data = woo_products.filtered(lambda x: x.woo_product_type == 'simple')
         batches = self.prepare_batches(woo_products_data)
@@ -394,12 +407,13 @@ class WooProductTemplateEpt(models.Model):
             for template in woo_products:
                 info = {'id': template.woo_tmpl_id, 'variations': []}
                 if template.woo_product_ids.woo_is_manage_stock:
-                    quantity = [x['stock'] for i, x in enumerate(export_product_stock) if
-                                x['product_id'] == template.woo_product_ids[0].product_id.id][0]
+                    quantity = export_product_stock.get(template.woo_product_ids[0].product_id.id)
                     if not quantity:
                         quantity = self.get_stock(template.woo_product_ids,
                                                   instance.woo_warehouse_id.id,
                                                   instance.woo_stock_field.name)
+                    if last_quantities.get(str(template.woo_tmpl_id)) == int(quantity):
+                        continue
                     info.update({'manage_stock': True, 'stock_quantity': int(quantity)})
                     batch_update_data.append(info)
             if batch_update_data:
@@ -441,6 +455,9 @@ class WooProductTemplateEpt(models.Model):
                         'message': message
                     })
                     log_line_id.append(log_id.id)
+                elif res.status_code in [200, 201]:
+                    stock_ledger_obj.set_last_exported_quantities(
+                        instance, self.woo_get_exported_stock_from_batch(res, batch_update_data))
         instance.write({'last_inventory_update_time': datetime.now()})
         if log_line_id:
             common_log_id = common_log_obj.create({
@@ -453,6 +470,22 @@ class WooProductTemplateEpt(models.Model):
                 {'log_line_id': common_log_id and common_log_id.id or False})
         return True
 
+    def woo_get_exported_stock_from_batch(self, response, batch_data):
+        """
+        This method is used to get the quantities updated by a batch request, the items returned
+        with an error are not taken.
+        :param response: Response of the batch request.
+        :param batch_data: List of the dictionaries sent for update.
+        :return: Dictionary of {woo id: quantity}.
+        """
+        try:
+            updated_items = response.json().get('update', [])
+        except Exception:
+            return {}
+        sent_quantities = {str(data.get('id')): data.get('stock_quantity') for data in batch_data}
+        return {str(item.get('id')): sent_quantities[str(item.get('id'))] for item in updated_items
+                if not item.get('error') and str(item.get('id')) in sent_quantities}
+
     def check_stock_type(self, instance, product_ids, prod_obj, warehouse):
         """
         This Method relocates check type of stock.
@@ -460,16 +493,20 @@ class WooProductTemplateEpt(models.Model):
         :param product_ids: This argumentes product listing id of odoo.
         :param prod_obj: This argument relocates product object of common connector.
         :param warehouse:This arguments relocates warehouse of Woocmmerce.
-        :return: This Method return prouct listing stock.
+        :return: Dictionary of {product id: stock}, the products without stock row are not in it.
         """
-        prouct_listing_stock = False
+        prouct_listing_stock = []
         if product_ids:
             # prod_ids = prod_obj.browse(product_ids)
             if instance.woo_stock_field.name == 'qty_available':
                 prouct_listing_stock = prod_obj.get_qty_on_hand(warehouse, product_ids)
             elif instance.woo_stock_field.name == 'virtual_available':
                 prouct_listing_stock = prod_obj.get_forecated_qty(warehouse, product_ids)
-        return prouct_listing_stock
+        product_stock = {}
+        for stock in prouct_listing_stock:
+            # The first row of a product is used, like the list lookup did before.
+            product_stock.setdefault(stock['product_id'], stock['stock'])
+        return product_stock
 
     def get_stock(self, woo_product, warehouse_id, stock_type='virtual_available'):
         """
@@ -634,63 +671,25 @@ class WooProductTemplateEpt(models.Model):
                     self.write({'website_published': True})
         return True
 
-    def import_all_attribute_terms(self, wcapi, instance, woo_attribute_id, woo_common_log_id,
-                                   model_id, page):
+    def import_all_attribute_terms(self, instance, woo_attribute_id, woo_common_log_id, model_id,
+                                   first_response=None):
         """
-        This method is used for get the attribute value response as per request by page wise and return it
-        :param wcapi: It contain the connection object between odoo and woo
+        This method is used for get the attribute values of all the pages, the pages are fetched concurrently
         :param instance: It contain the browsable object of the current instance
         :param woo_attribute_id: It contain the Woo product Attribute and its type is Object
         :param woo_common_log_id: It contain the common log book id and its type is Object
         :param model_id: It contain the id of the model class
-        :param page: It contain the page number of woo commerce and its type if Integer
-        :return: It will return response based on send request
+        :param first_response: It contain the response of the first page when it is already fetched
+        :return: It will yield the response of every attribute value into Dict Format.
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        try:
-            if instance.woo_version == 'v3':
-                res = wcapi.get("products/attributes/%s/terms?filter[limit]=1000&page=%s" % (
-                    woo_attribute_id.woo_attribute_id, page))
-            else:
-                res = wcapi.get("products/attributes/%s/terms" % (
-                    woo_attribute_id.woo_attribute_id), params={'per_page': 100, 'page': page})
-        except Exception as e:
-            raise Warning("Something went wrong while importing attribute values.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        if not isinstance(res, requests.models.Response):
-            message = "Get All Attribute Terms \nResponse is not in proper format :: %s" % (
-                res)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id,
-                                                            False)
-            return []
-        if res.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(res.content, model_id,
-                                                            woo_common_log_id,
-                                                            False)
-            return []
-        try:
-            response = res.json()
-        except Exception as e:
-            message = "Json Error : While import product attribute terms from WooCommerce for " \
-                      "instance %s. \n%s " % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                            woo_common_log_id,
-                                                            False)
-            return []
-        if instance.woo_version == 'v3':
-            errors = response.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id,
-                                                                False)
-                return []
-            return response.get('product_attribute_terms')
-        else:
-            return response
+        return instance.woo_fetch_collection(
+            "products/attributes/%s/terms" % woo_attribute_id.woo_attribute_id, "product_attribute_terms",
+            "product attribute terms",
+            lambda message: common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                                            False),
+            first_response)
 
     def sync_woo_attribute_term(self, instance, woo_common_log_id):
         """
@@ -709,147 +708,76 @@ class WooProductTemplateEpt(models.Model):
 
         wcapi = instance.woo_connect()
         woo_attributes = obj_woo_attribute.search([('woo_instance_id', '=', instance.id)])
-        attributes_term_data = []
+        # The first pages of all the attributes are fetched together, the other pages of an attribute are
+        # fetched concurrently while its values are imported.
+        page_fetchers = {woo_attribute.id: instance.woo_get_collection_page_fetcher(
+            wcapi, "products/attributes/%s/terms" % woo_attribute.woo_attribute_id, "attribute values")
+            for woo_attribute in woo_attributes}
+        first_responses = dict(instance.woo_fetch_pages_concurrently(
+            lambda attribute_id: (attribute_id, page_fetchers[attribute_id](1)), list(page_fetchers)))
         for woo_attribute in woo_attributes:
-            try:
-                if instance.woo_version == 'v3':
-                    response = wcapi.get(
-                        "products/attributes/%s/terms?filter[limit]=1000" % woo_attribute.woo_attribute_id)
+            attributes_term_data = self.import_all_attribute_terms(instance, woo_attribute, woo_common_log_id,
+                                                                   model_id, first_responses.get(woo_attribute.id))
+            for attribute_term in attributes_term_data:
+                woo_attribute_term = obj_woo_attribute_term.search(
+                    [('woo_attribute_term_id', '=', attribute_term.get('id')),
+                     ('woo_instance_id', '=', instance.id), ('exported_in_woo', '=', True)],
+                    limit=1)
+                if woo_attribute_term:
+                    continue
+                odoo_attribute_value = odoo_attribute_value_obj.search(
+                    [('name', '=ilike', attribute_term.get('name')),
+                     ('attribute_id', '=', woo_attribute.attribute_id.id)], limit=1)
+                if not odoo_attribute_value:
+                    odoo_attribute_value = odoo_attribute_value.with_context(
+                        active_id=False).create({
+                        'name': attribute_term.get('name'),
+                        'attribute_id': woo_attribute.attribute_id.id
+                    })
+                woo_attribute_term = obj_woo_attribute_term.search(
+                    [('attribute_value_id', '=', odoo_attribute_value.id),
+                     ('attribute_id', '=', woo_attribute.attribute_id.id),
+                     ('woo_attribute_id', '=', woo_attribute.id),
+                     ('woo_instance_id', '=', instance.id),
+                     ('exported_in_woo', '=', False)],
+                    limit=1)
+                if woo_attribute_term:
+                    woo_attribute_term.write({
+                        'woo_attribute_term_id': attribute_term.get(
+                            'id'),
+                        'count': attribute_term.get('count'),
+                        'slug': attribute_term.get('slug'),
+                        'exported_in_woo': True
+                    })
                 else:
-                    response = wcapi.get("products/attributes/%s/terms" % woo_attribute.woo_attribute_id,
-                                         params={'per_page': 100})
-            except Exception as e:
-                raise Warning("Something went wrong while importing attribute values.\n\nPlease Check your Connection "
-                              "and Instance Configuration.\n\n" + str(e))
-
-            try:
-                attributes_term_data = response.json()
-            except Exception as e:
-                message = "Json Error : While import product attribute terms from WooCommerce " \
-                          "for instance %s. \n%s " % (instance.name, e)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id,
-                                                                False)
-                return False
-            if instance.woo_version == 'v3':
-                attributes_term_data = attributes_term_data.get('product_attribute_terms')
-            if not isinstance(attributes_term_data, list):
-                message = "Response is not in proper format :: %s" % (attributes_term_data)
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id,
-                                                                False)
-                continue
-            total_pages = 1
-            if instance.woo_version == 'v3':
-                total_pages = response and response.headers.get('X-WC-TotalPages') or 1
-            else:
-                total_pages = response and response.headers.get('x-wp-totalpages') or 1
-            if int(total_pages) >= 2:
-                for page in range(2, int(total_pages) + 1):
-                    attributes_term_data = attributes_term_data + self.import_all_attribute_terms(
-                        wcapi, instance, woo_attribute, woo_common_log_id, model_id, page)
-            if response.status_code in [201, 200]:
-                for attribute_term in attributes_term_data:
-                    woo_attribute_term = obj_woo_attribute_term.search(
-                        [('woo_attribute_term_id', '=', attribute_term.get('id')),
-                         ('woo_instance_id', '=', instance.id), ('exported_in_woo', '=', True)],
-                        limit=1)
-                    if woo_attribute_term:
-                        continue
-                    odoo_attribute_value = odoo_attribute_value_obj.search(
-                        [('name', '=ilike', attribute_term.get('name')),
-                         ('attribute_id', '=', woo_attribute.attribute_id.id)], limit=1)
-                    if not odoo_attribute_value:
-                        odoo_attribute_value = odoo_attribute_value.with_context(
-                            active_id=False).create({
-                            'name': attribute_term.get('name'),
-                            'attribute_id': woo_attribute.attribute_id.id
-                        })
-                    woo_attribute_term = obj_woo_attribute_term.search(
-                        [('attribute_value_id', '=', odoo_attribute_value.id),
-                         ('attribute_id', '=', woo_attribute.attribute_id.id),
-                         ('woo_attribute_id', '=', woo_attribute.id),
-                         ('woo_instance_id', '=', instance.id),
-                         ('exported_in_woo', '=', False)],
-                        limit=1)
-                    if woo_attribute_term:
-                        woo_attribute_term.write({
-                            'woo_attribute_term_id': attribute_term.get(
-                                'id'),
-                            'count': attribute_term.get('count'),
-                            'slug': attribute_term.get('slug'),
-                            'exported_in_woo': True
-                        })
-                    else:
-                        obj_woo_attribute_term.create({
-                            'name': attribute_term.get('name'),
-                            'woo_attribute_term_id': attribute_term.get(
-                                'id'),
-                            'slug': attribute_term.get('slug'),
-                            'woo_instance_id': instance.id,
-                            'attribute_value_id': odoo_attribute_value.id,
-                            'woo_attribute_id': woo_attribute.woo_attribute_id,
-                            'attribute_id': woo_attribute.attribute_id.id,
-                            'exported_in_woo': True,
-                            'count': attribute_term.get('count')
-                        })
-            else:
-                common_log_line_obj.woo_product_export_log_line(attribute_term.content, model_id,
-                                                                woo_common_log_id,
-                                                                False)
-                continue
+                    obj_woo_attribute_term.create({
+                        'name': attribute_term.get('name'),
+                        'woo_attribute_term_id': attribute_term.get(
+                            'id'),
+                        'slug': attribute_term.get('slug'),
+                        'woo_instance_id': instance.id,
+                        'attribute_value_id': odoo_attribute_value.id,
+                        'woo_attribute_id': woo_attribute.woo_attribute_id,
+                        'attribute_id': woo_attribute.attribute_id.id,
+                        'exported_in_woo': True,
+                        'count': attribute_term.get('count')
+                    })
         return True
 
-    def woo_import_all_attributes(self, wcapi, instance, woo_common_log_id, model_id, page):
+    def woo_import_all_attributes(self, instance, woo_common_log_id, model_id):
         """
-        This method is used for get the attribute response as per request by page wise and return it
-        :param wcapi: It contain the connection object between odoo and woo
+        This method is used for get the attributes of all the pages, the pages are fetched concurrently
         :param instance: It contain the browsable object of the current instance
         :param woo_common_log_id: It contain the log book id and its type is object
         :param model_id: It contain the id of the model class
-        :param page: It contain the page number of woo commerce and its type if Integer
-        :return: It will return the response of product attribute into Dict Format.
+        :return: It will yield the response of every product attribute into Dict Format.
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        try:
-            if instance.woo_version == 'v3':
-                res = wcapi.get('products/attributes?filter[limit]=1000&page=%s' % page)
-            else:
-                res = wcapi.get('products/attributes', params={'per_page': 100, 'page': page})
-        except Exception as e:
-            raise Warning("Something went wrong while importing attributes.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        if not isinstance(res, requests.models.Response):
-            message = "Get All Attibutes \nResponse is not in proper format :: %s" % (res)
-            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
-                                                            False)
-            return []
-        if res.status_code not in [200, 201]:
-            common_log_line_obj.woo_product_export_log_line(res.content, model_id,
-                                                            woo_common_log_id, False)
-            return []
-        try:
-            response = res.json()
-        except Exception as e:
-            message = "Json Error : While import product attributes from WooCommerce for " \
-                      "instance %s. \n%s " % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
-                                                            False)
-            return []
-
-        if instance.woo_version == 'v3':
-            errors = response.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.woo_product_export_log_line(message, model_id,
-                                                                woo_common_log_id,
-                                                                False)
-                return []
-            return response.get('product_attributes')
-        else:
-            return response
+        return instance.woo_fetch_collection(
+            "products/attributes", "product_attributes", "product attributes",
+            lambda message: common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
+                                                                            False))
 
     def sync_woo_attribute(self, instance, woo_common_log_id):
         """
@@ -864,81 +792,37 @@ class WooProductTemplateEpt(models.Model):
         model_id = common_log_line_obj.get_model_id("woo.product.attribute.ept")
         obj_woo_attribute = self.env['woo.product.attribute.ept']
         odoo_attribute_obj = self.env['product.attribute']
-        wcapi = instance.woo_connect()
-        try:
-            if instance.woo_version == 'v3':
-                response = wcapi.get('products/attributes?filter[limit]=1000')
+        attributes_data = self.woo_import_all_attributes(instance, woo_common_log_id, model_id)
+        for attribute in attributes_data:
+            woo_attribute = obj_woo_attribute.search(
+                [('woo_attribute_id', '=', attribute.get('id')),
+                 ('woo_instance_id', '=', instance.id), ('exported_in_woo', '=', True)],
+                limit=1)
+            if woo_attribute:
+                continue
+            odoo_attribute = odoo_attribute_obj.search(
+                [('name', '=ilike', attribute.get('name'))], limit=1)
+            if not odoo_attribute:
+                odoo_attribute = odoo_attribute.create({'name': attribute.get('name')})
+            woo_attribute = obj_woo_attribute.search([('attribute_id', '=', odoo_attribute.id),
+                                                      ('woo_instance_id', '=', instance.id),
+                                                      ('exported_in_woo', '=', False)], limit=1)
+            if woo_attribute:
+                woo_attribute.write({
+                    'woo_attribute_id': attribute.get('id'),
+                    'order_by': attribute.get('order_by'),
+                    'slug': attribute.get('slug'), 'exported_in_woo': True,
+                    'has_archives': attribute.get('has_archives')
+                })
             else:
-                response = wcapi.get("products/attributes", params={'per_page': 100})
-        except Exception as e:
-            raise Warning("Something went wrong while importing attributes.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
-
-        try:
-            attributes_data = response.json()
-        except Exception as e:
-            message = "Json Error : While import product attributes from WooCommerce for " \
-                      "instance %s. \n%s " % (instance.name, e)
-            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
-                                                            False)
-            return False
-        if instance.woo_version == 'v3':
-            attributes_data = response.get('product_attributes')
-        if not isinstance(attributes_data, list):
-            message = "Response is not in proper format :: %s" % (attributes_data)
-            common_log_line_obj.woo_product_export_log_line(message, model_id, woo_common_log_id,
-                                                            False)
-            return True
-        total_pages = 1
-        if instance.woo_version == 'v3':
-            total_pages = response and response.headers.get('X-WC-TotalPages') or 1
-        else:
-            total_pages = response and response.headers.get('x-wp-totalpages') or 1
-        if int(total_pages) >= 2:
-            for page in range(2, int(total_pages) + 1):
-                attributes_data = attributes_data + self.woo_import_all_attributes(wcapi, instance,
-                                                                                   woo_common_log_id,
-                                                                                   model_id, page)
-        if response.status_code in [201, 200]:
-            for attribute in attributes_data:
-                woo_attribute = obj_woo_attribute.search(
-                    [('woo_attribute_id', '=', attribute.get('id')),
-                     ('woo_instance_id', '=', instance.id), ('exported_in_woo', '=', True)],
-                    limit=1)
-                if woo_attribute:
-                    continue
-                odoo_attribute = odoo_attribute_obj.search(
-                    [('name', '=ilike', attribute.get('name'))], limit=1)
-                if not odoo_attribute:
-                    odoo_attribute = odoo_attribute.create({'name': attribute.get('name')})
-                woo_attribute = obj_woo_attribute.search([('attribute_id', '=', odoo_attribute.id),
-                                                          ('woo_instance_id', '=', instance.id),
-                                                          ('exported_in_woo', '=', False)], limit=1)
-                if woo_attribute:
-                    woo_attribute.write({
-                        'woo_attribute_id': attribute.get('id'),
+                obj_woo_attribute.create(
+                    {
+                        'name': attribute.get('name'), 'woo_attribute_id': attribute.get('id'),
                         'order_by': attribute.get('order_by'),
-                        'slug': attribute.get('slug'), 'exported_in_woo': True,
-                        'has_archives': attribute.get('has_archives')
+                        'slug': attribute.get('slug'), 'woo_instance_id': instance.id,
+                        'attribute_id': odoo_attribute.id,
+                        'exported_in_woo': True, 'has_archives': attribute.get('has_archives')
                     })
-                else:
-                    obj_woo_attribute.create(
-                        {
-                            'name': attribute.get('name'), 'woo_attribute_id': attribute.get('id'),
-                            'order_by': attribute.get('order_by'),
-                            'slug': attribute.get('slug'), 'woo_instance_id': instance.id,
-                            'attribute_id': odoo_attribute.id,
-                            'exported_in_woo': True, 'has_archives': attribute.get('has_archives')
-                        })
-        else:
-            common_log_line_obj.create(
-                {
-                    'message': attributes_data.content,
-                    'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                    'model_id': model_id,
-                    'res_id': self and self.id or False
-                })
-            return True
         self.sync_woo_attribute_term(instance, woo_common_log_id)
         return True
 
@@ -1101,11 +985,13 @@ class WooProductTemplateEpt(models.Model):
 
         return results
 
-    def get_products_from_woo_v1_v2_v3(self, instance, common_log_id, template_id=False, import_all=False):
+    def get_products_from_woo_v1_v2_v3(self, instance, common_log_id, template_id=False, import_all=False,
+                                       template_ids=False):
         """
         :param woo_instance: It contain the browsable object of class woo_instance_ept
         :param woo_comman_log_id: It is the browsable object of common log book
         :param woo_template_id: It contain the browsable object of class woo_product_template_ept
+        :param template_ids: It contain the list of at most 100 product ids of woo, fetched with one request
         @author: Dipak Gogiya @Emipro Technologies Pvt. Ltd.
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
@@ -1115,6 +1001,9 @@ class WooProductTemplateEpt(models.Model):
         try:
             if template_id:
                 res = wcapi.get('products/%s' % template_id)
+            elif template_ids:
+                res = wcapi.get('products', params={'include': ",".join(str(woo_id) for woo_id in template_ids),
+                                                    'per_page': 100})
             else:
                 res = wcapi.get('products', params={'per_page': 100})
         except Exception as error:
@@ -1149,7 +1038,7 @@ class WooProductTemplateEpt(models.Model):
         if instance.woo_version == 'wc/v2' or instance.woo_version == 'wc/v3':
             available_queue = False
             product_data_queue_line_ids = False
-            if not template_id and not import_all:
+            if not template_id and not template_ids and not import_all:
                 product_data_queues = self.env['woo.product.data.queue.ept'].search(
                     [('woo_instance_id', '=', instance.id)])
                 if product_data_queues:
@@ -2367,6 +2256,12 @@ class WooProductTemplateEpt(models.Model):
         Modify by Haresh Mori on date 31/12/2019 modification adds active_test=False for searching an archived
         product for a webhook process.
         """
+        if self._context.get('woo_category_trees') is None:
+            # The categories of the store are read once for all the products of the sync, when the first
+            # category is searched by name.
+            return self.with_context(woo_category_trees={}).sync_products(
+                product_data_queue_lines, woo_instance, common_log_book_id, skip_existing_products,
+                order_queue_line)
         common_log_line_obj = self.env["common.log.lines.ept"]
 
         queue_counter = 0
@@ -2374,17 +2269,18 @@ class WooProductTemplateEpt(models.Model):
         model_id = common_log_line_obj.get_model_id(self._name)
         update_price = woo_instance.sync_price_with_product
         update_images = woo_instance.sync_images_with_product
-        if order_queue_line:
+        if order_queue_line and not self._context.get('woo_attributes_synced'):
             self.env["woo.process.import.export"].sync_woo_attributes(woo_instance)
 
         for product_data_queue_line in product_data_queue_lines:
             if queue_counter == 10:
+                # The products imported for an order are committed with the order.
                 if not order_queue_line:
                     product_queue_id = product_data_queue_line and \
                                        product_data_queue_line.queue_id or False
                     if product_queue_id:
                         product_queue_id.is_process_queue = True
-                self._cr.commit()
+                    self._cr.commit()
                 queue_counter = 0
             queue_counter += 1
 
@@ -3574,6 +3470,7 @@ class WooProductTemplateEpt(models.Model):
         gallery_img_keys = {}
         key = False
         gallery_images = woo_template.woo_image_ids.filtered(lambda x: not x.woo_variant_id)
+        uploaded_image_ids = self.woo_upload_gallery_images(instance, gallery_images, template)
         for br_gallery_image in gallery_images:
             image_id = br_gallery_image.woo_image_id
             # img_url = ''
@@ -3599,9 +3496,7 @@ class WooProductTemplateEpt(models.Model):
                     continue
                 else:
                     gallery_img_keys.update({key: br_gallery_image.id})
-                res = img_file_upload.upload_image(instance, br_gallery_image.image,"%s_%s_%s" % (
-                    template.name, template.categ_id.name, template.id), br_gallery_image.image_mime_type)
-                image_id = res and res.get('id', False) or ''
+                image_id = uploaded_image_ids.get(key) or ''
             if image_id:
                 # if instance.woo_is_image_url:
                 #     tmpl_images.append({'src': img_url, 'position': position})
@@ -3611,6 +3506,50 @@ class WooProductTemplateEpt(models.Model):
                 br_gallery_image.woo_image_id = image_id
         return tmpl_images
 
+    @api.model
+    def woo_get_uploaded_image_ids(self, instance, keys):
+        """
+        This method is used to find the images already uploaded in WordPress for the instance by
+        the md5 of the image, so an image shared by many products is uploaded once.
+        :param instance: It contain the browsable object of the current instance
+        :param keys: List of md5 of the images
+        :return: Dictionary of {md5: id of the image in Woo}
+        """
+        if not keys:
+            return {}
+        uploaded_images = self.env["woo.product.image.ept"].search_read(
+            [("odoo_image_id.image_md5", "in", list(keys)), ("woo_image_id", "!=", False), "|",
+             ("woo_template_id.woo_instance_id", "=", instance.id),
+             ("woo_variant_id.woo_instance_id", "=", instance.id)], ["odoo_image_id", "woo_image_id"])
+        image_md5 = {image["id"]: image["image_md5"] for image in self.env["common.product.image.ept"].search_read(
+            [("id", "in", [image["odoo_image_id"][0] for image in uploaded_images])], ["image_md5"])}
+        uploaded_image_ids = {}
+        for image in uploaded_images:
+            uploaded_image_ids.setdefault(image_md5.get(image["odoo_image_id"][0]), image["woo_image_id"])
+        return uploaded_image_ids
+
+    @api.model
+    def woo_upload_gallery_images(self, instance, gallery_images, template):
+        """
+        This method is used to upload the gallery images which are not in WordPress yet. The images
+        already uploaded for another product are reused and the others are uploaded concurrently.
+        :param instance: It contain the browsable object of the current instance
+        :param gallery_images: Records of woo.product.image.ept
+        :param template: It contain the product template
+        :return: Dictionary of {md5: id of the image in Woo}
+        """
+        images_md5 = {}
+        for gallery_image in gallery_images:
+            if gallery_image.image and not gallery_image.woo_image_id:
+                images_md5.setdefault(hashlib.md5(gallery_image.image).hexdigest(), gallery_image)
+        uploaded_image_ids = self.woo_get_uploaded_image_ids(instance, list(images_md5.keys()))
+        images = [(key, gallery_image.image, "%s_%s_%s" % (template.name, template.categ_id.name, template.id),
+                   gallery_image.image_mime_type) for key, gallery_image in images_md5.items()
+                  if key not in uploaded_image_ids]
+        for key, res in img_file_upload.upload_images(instance, images).items():
+            uploaded_image_ids[key] = res and res.get('id', False) or ''
+        return uploaded_image_ids
+
     def woo_export_or_update_product_categories(self, wcapi, woo_template, instance, old,
                                                 common_log_id, model_id):
         """
@@ -3625,11 +3564,16 @@ class WooProductTemplateEpt(models.Model):
         """
         categ_ids = []
         common_log_line_obj = self.env['common.log.lines.ept']
+        tree = self.env['woo.product.categ.ept'].woo_get_cached_category_tree(instance)
+        if tree is not None:
+            tree = self.env['woo.product.categ.ept'].woo_get_category_tree(instance, common_log_id, model_id)
         for woo_categ in woo_template.woo_categ_ids:
             if not woo_categ.woo_categ_id:
                 woo_categ.sync_woo_product_category(instance, common_log_id,
                                                     woo_product_categ=woo_categ)
                 woo_categ.woo_categ_id and categ_ids.append(woo_categ.woo_categ_id)
+            elif tree is not None and tree.get(woo_categ.woo_categ_id):
+                categ_ids.append(woo_categ.woo_categ_id)
             else:
                 try:
                     categ_res = wcapi.get("products/categories/%s" % woo_categ.woo_categ_id)
@@ -4050,20 +3994,24 @@ class WooProductTemplateEpt(models.Model):
         :return: It will return the True if the process is successfully complete
          @author: Dipak Gogiya @Emipro Technologies Pvt.Ltd
         """
+        if self._context.get('woo_category_trees') is None:
+            # The categories of the store are read once for all the exported products.
+            context = dict(self._context, woo_category_trees={})
+            return self.with_context(context).export_products_in_woo(
+                instance, woo_templates.with_context(context), update_price, publish, update_image, basic_detail,
+                common_log_id)
         wcapi = instance.woo_connect()
         # common_product_image_obj = self.env['common.product.image.ept']
-        woo_product_product_ept = self.env['woo.product.product.ept']
         common_log_line_obj = self.env['common.log.lines.ept']
         model_id = common_log_line_obj.get_model_id('woo.product.template.ept')
-        variants = []
+        if instance.woo_version == 'wc/v2' or instance.woo_version == 'wc/v3':  # instance.woo_version != 'v3'
+            return self.export_products_in_woo_batches(wcapi, instance, woo_templates, update_price, publish,
+                                                       update_image, basic_detail, common_log_id, model_id)
         for woo_template in woo_templates:
             template = woo_template.product_tmpl_id
             data = self.get_product_data(wcapi, instance, woo_template, publish, update_price,
                                          update_image, basic_detail, template, common_log_id,
                                          model_id)
-            if instance.woo_version == 'wc/v2' or instance.woo_version == 'wc/v3':  # instance.woo_version != 'v3'
-                variants = data.get('variations') or []
-                variants and data.update({'variations': []})
             try:
                 if instance.woo_version == 'v3':
                     new_product = wcapi.post('products', {'product': data})
@@ -4109,129 +4057,215 @@ class WooProductTemplateEpt(models.Model):
                                                                 common_log_id,
                                                                 woo_template.product_tmpl_id)
                 continue
-            response_variations = []
-            if instance.woo_version == 'wc/v1':  # instance.woo_version == 'v3'
-                response_variations = response.get('variations')
-            if instance.woo_version == 'v3':
-                response_variations = response.get('product').get('variations')
-            woo_tmpl_id = response.get('id') if not instance.woo_version == 'v3' else response.get(
-                'product').get('id') or False
-
-            if woo_tmpl_id and instance.woo_version != 'wc/v1' and variants:
-                response_variations = []
-                vairant_batches = []
-                start, end = 0, 100
-                if len(variants) > 100:
-                    while True:
-                        w_products_ids = variants[start:end]
-                        if not w_products_ids:
-                            break
-                        temp = end + 100
-                        start, end = end, temp
-                        if w_products_ids:
-                            vairant_batches.append(w_products_ids)
-                else:
-                    vairant_batches.append(variants)
-                for woo_variants in vairant_batches:
-                    for variant in woo_variants:
-                        if variant.get('image'):
-                            variant.update({'image': variant.get('image')})
-                    try:
-                        variant_response = wcapi.post("products/%s/variations/batch" % woo_tmpl_id,
-                                                      {'create': woo_variants})
-                    except Exception as e:
-                        raise Warning("Something went wrong while exporting variants.\n\nPlease Check your Connection "
-                                      "and Instance Configuration.\n\n" + str(e))
+            self.woo_update_exported_product(wcapi, instance, woo_template, response, [], publish,
+                                             common_log_id, model_id)
+            self.sync_woo_attribute_term(instance, common_log_id)
+            self._cr.commit()
+        return True
 
-                    if variant_response.status_code not in [200, 201]:
-                        common_log_line_obj.woo_product_export_log_line(variant_response.content,
-                                                                        model_id, common_log_id,
-                                                                        woo_template.product_tmpl_id)
-                        continue
-                    try:
-                        response_variations += variant_response.json().get('create')
-                    except Exception as e:
-                        message = "Json Error : While retrive product response from WooCommerce " \
-                                  "for instance %s. \n%s" % (instance.name, e)
-                        common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id,
-                                                                        woo_template.product_tmpl_id)
-                        continue
+    @api.model
+    def export_products_in_woo_batches(self, wcapi, instance, woo_templates, update_price, publish, update_image,
+                                       basic_detail, common_log_id, model_id):
+        """
+        This method is used to export the products with products/batch, up to 100 products are
+        created by one request. The variations of every created product are exported by its own
+        variations batches.
+        :param wcapi: It contain the connection object of the woo rest api
+        :param instance: It contain the browsable object of the current instance
+        :param woo_templates: It contain the browsable object of the woo product templates
+        :param update_price: It contain either True or False and its type is Boolean
+        :param publish: It contain either True or False and its type is Boolean
+        :param update_image: It contain either True or False and its type is Boolean
+        :param basic_detail: It contain either True or False and its type is Boolean
+        :param common_log_id: It contain the browsable object of common log book ept model
+        :param model_id: It contain the id of the model class
+        :return: It will return the True if the process is successfully complete
+        """
+        common_log_line_obj = self.env['common.log.lines.ept']
+        for woo_template_batch in self.prepare_batches(woo_templates):
+            batch_data = []
+            batch_variants = []
+            for woo_template in woo_template_batch:
+                data = self.get_product_data(wcapi, instance, woo_template, publish, update_price,
+                                             update_image, basic_detail, woo_template.product_tmpl_id,
+                                             common_log_id, model_id)
+                variants = data.get('variations') or []
+                variants and data.update({'variations': []})
+                batch_data.append(data)
+                batch_variants.append(variants)
+            _logger.info('Export Product||Products batch processing')
+            try:
+                res = wcapi.post('products/batch', {'create': batch_data})
+            except Exception as e:
+                raise Warning("Something went wrong while exporting products.\n\nPlease Check your Connection and "
+                              "Instance Configuration.\n\n" + str(e))
+            _logger.info('Export Product||Products batch process completed [status: %s]', res.status_code)
+
+            message = False
+            response = {}
+            if not isinstance(res, requests.models.Response):
+                message = "Export Product\nResponse is not in proper format :: %s" % res
+            elif res.status_code not in [200, 201]:
+                message = res.content
+            else:
+                try:
+                    response = res.json()
+                except Exception as e:
+                    message = "Json Error : While export product to WooCommerce for instance %s. \n%s" % (
+                        instance.name, e)
+            if not message and (not isinstance(response, dict) or len(response.get('create') or []) != len(
+                    batch_data)):
+                message = "Export Product, Response is not in proper format"
+            if message:
+                for woo_template in woo_template_batch:
+                    common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id,
+                                                                    woo_template.product_tmpl_id)
+                continue
+
+            for woo_template, data, variants, product_response in zip(woo_template_batch, batch_data,
+                                                                      batch_variants, response.get('create')):
+                if product_response.get('error'):
+                    error = product_response.get('error')
+                    message = error.get('message') if isinstance(error, dict) else error
+                    if isinstance(error, dict) and error.get('code') == 'woocommerce_rest_product_sku_already_exists':
+                        message = "%s, ==> %s" % (message, data.get('name'))
+                    common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id,
+                                                                    woo_template.product_tmpl_id)
+                    continue
+                self.woo_update_exported_product(wcapi, instance, woo_template, product_response, variants,
+                                                 publish, common_log_id, model_id)
+                self._cr.commit()
+            # The attribute values created by WooCommerce for the products of the batch are imported once.
+            self.sync_woo_attribute_term(instance, common_log_id)
+            self._cr.commit()
+        return True
 
-            for response_variation in response_variations:
-                if response_variation.get('error'):
-                    common_log_line_obj.woo_product_export_log_line(response_variation.get('error'),
+    @api.model
+    def woo_update_exported_product(self, wcapi, instance, woo_template, response, variants, publish,
+                                    common_log_id, model_id):
+        """
+        This method is used to export the variations of a created product and to store the ids
+        given by WooCommerce on the woo template and its variants.
+        :param wcapi: It contain the connection object of the woo rest api
+        :param instance: It contain the browsable object of the current instance
+        :param woo_template: It contain the browsable object of the woo product template
+        :param response: Data of the created product in WooCommerce
+        :param variants: List of the variations to create for the product
+        :param publish: It contain either True or False and its type is Boolean
+        :param common_log_id: It contain the browsable object of common log book ept model
+        :param model_id: It contain the id of the model class
+        """
+        woo_product_product_ept = self.env['woo.product.product.ept']
+        common_log_line_obj = self.env['common.log.lines.ept']
+        template = woo_template.product_tmpl_id
+        response_variations = []
+        if instance.woo_version == 'wc/v1':  # instance.woo_version == 'v3'
+            response_variations = response.get('variations')
+        if instance.woo_version == 'v3':
+            response_variations = response.get('product').get('variations')
+        woo_tmpl_id = response.get('id') if not instance.woo_version == 'v3' else response.get(
+            'product').get('id') or False
+
+        if woo_tmpl_id and instance.woo_version != 'wc/v1' and variants:
+            response_variations = []
+            for woo_variants in self.prepare_batches(variants):
+                for variant in woo_variants:
+                    if variant.get('image'):
+                        variant.update({'image': variant.get('image')})
+                try:
+                    variant_response = wcapi.post("products/%s/variations/batch" % woo_tmpl_id,
+                                                  {'create': woo_variants})
+                except Exception as e:
+                    raise Warning("Something went wrong while exporting variants.\n\nPlease Check your Connection "
+                                  "and Instance Configuration.\n\n" + str(e))
+
+                if variant_response.status_code not in [200, 201]:
+                    common_log_line_obj.woo_product_export_log_line(variant_response.content,
                                                                     model_id, common_log_id,
                                                                     woo_template.product_tmpl_id)
                     continue
-                response_variant_data = {}
-                variant_sku = response_variation.get('sku')
-                variant_id = response_variation.get('id')
-                if instance.woo_is_image_url:
-                    variant_image = response_variation.get('image')
-                    variant_image_id = variant_image and variant_image.get('id') or False
-                    variant_image_url = variant_image and variant_image.get('src') or ''
-                    response_variant_data.update(
-                        {'woo_image_id': variant_image_id, 'response_url': variant_image_url})
-                if instance.woo_version == 'v3':
-                    variant_created_at = response_variation.get('created_at').replace('T',
-                                                                                      ' ').replace(
-                        'Z', '')
-                    variant_updated_at = response_variation.get('updated_at').replace('T',
-                                                                                      ' ').replace(
-                        'Z', '')
-                else:
-                    variant_created_at = response_variation.get('date_created').replace('T', ' ')
-                    variant_updated_at = response_variation.get('date_modified').replace('T', ' ')
-                woo_product = woo_product_product_ept.search(
-                    [('default_code', '=', variant_sku),
-                     ('woo_template_id', '=', woo_template.id),
-                     ('woo_instance_id', '=', instance.id)])
+                try:
+                    response_variations += variant_response.json().get('create')
+                except Exception as e:
+                    message = "Json Error : While retrive product response from WooCommerce " \
+                              "for instance %s. \n%s" % (instance.name, e)
+                    common_log_line_obj.woo_product_export_log_line(message, model_id, common_log_id,
+                                                                    woo_template.product_tmpl_id)
+                    continue
+
+        for response_variation in response_variations:
+            if response_variation.get('error'):
+                common_log_line_obj.woo_product_export_log_line(response_variation.get('error'),
+                                                                model_id, common_log_id,
+                                                                woo_template.product_tmpl_id)
+                continue
+            response_variant_data = {}
+            variant_sku = response_variation.get('sku')
+            variant_id = response_variation.get('id')
+            if instance.woo_is_image_url:
+                variant_image = response_variation.get('image')
+                variant_image_id = variant_image and variant_image.get('id') or False
+                variant_image_url = variant_image and variant_image.get('src') or ''
                 response_variant_data.update(
-                    {
-                        'variant_id': variant_id, 'created_at': variant_created_at,
-                        'updated_at': variant_updated_at, 'exported_in_woo': True
-                    })
-                woo_product and woo_product.write(response_variant_data)
-            total_variants_in_woo = 0
+                    {'woo_image_id': variant_image_id, 'response_url': variant_image_url})
             if instance.woo_version == 'v3':
-                created_at = response.get('product').get('created_at').replace('T', ' ').replace(
+                variant_created_at = response_variation.get('created_at').replace('T',
+                                                                                  ' ').replace(
                     'Z', '')
-                updated_at = response.get('product').get('updated_at').replace('T', ' ').replace(
+                variant_updated_at = response_variation.get('updated_at').replace('T',
+                                                                                  ' ').replace(
                     'Z', '')
-                if not template.attribute_line_ids:
-                    woo_product = woo_template.woo_product_ids
-                    woo_product.write(
-                        {
-                            'variant_id': woo_tmpl_id, 'created_at': created_at,
-                            'updated_at': updated_at,
-                            'exported_in_woo': True
-                        })
-                total_variants_in_woo = len(response_variations) if response_variations else 1
             else:
-                created_at = response.get('date_created').replace('T', ' ')
-                updated_at = response.get('date_modified').replace('T', ' ')
-
-                if template.product_variant_count == 1 and not template.attribute_line_ids:
-                    woo_product = woo_template.woo_product_ids
-                    woo_product.write({
-                        'variant_id': woo_tmpl_id,
-                        'created_at': created_at or False,
-                        'updated_at': updated_at or False, 'exported_in_woo': True
+                variant_created_at = response_variation.get('date_created').replace('T', ' ')
+                variant_updated_at = response_variation.get('date_modified').replace('T', ' ')
+            woo_product = woo_product_product_ept.search(
+                [('default_code', '=', variant_sku),
+                 ('woo_template_id', '=', woo_template.id),
+                 ('woo_instance_id', '=', instance.id)])
+            response_variant_data.update(
+                {
+                    'variant_id': variant_id, 'created_at': variant_created_at,
+                    'updated_at': variant_updated_at, 'exported_in_woo': True
+                })
+            woo_product and woo_product.write(response_variant_data)
+        total_variants_in_woo = 0
+        if instance.woo_version == 'v3':
+            created_at = response.get('product').get('created_at').replace('T', ' ').replace(
+                'Z', '')
+            updated_at = response.get('product').get('updated_at').replace('T', ' ').replace(
+                'Z', '')
+            if not template.attribute_line_ids:
+                woo_product = woo_template.woo_product_ids
+                woo_product.write(
+                    {
+                        'variant_id': woo_tmpl_id, 'created_at': created_at,
+                        'updated_at': updated_at,
+                        'exported_in_woo': True
                     })
-                total_variants_in_woo = response.get('variations') and len(
-                    response.get('variations')) or 1
+            total_variants_in_woo = len(response_variations) if response_variations else 1
+        else:
+            created_at = response.get('date_created').replace('T', ' ')
+            updated_at = response.get('date_modified').replace('T', ' ')
 
-            tmpl_data = {
-                'woo_tmpl_id': woo_tmpl_id, 'created_at': created_at or False,
-                'updated_at': updated_at or False, 'exported_in_woo': True,
-                'total_variants_in_woo': total_variants_in_woo
-            }
-            tmpl_data.update(
-                {'website_published': True}) if publish == 'publish' else tmpl_data.update(
-                {'website_published': False})
-            woo_template.write(tmpl_data)
-            self.sync_woo_attribute_term(instance, common_log_id)
-            self._cr.commit()
+            if template.product_variant_count == 1 and not template.attribute_line_ids:
+                woo_product = woo_template.woo_product_ids
+                woo_product.write({
+                    'variant_id': woo_tmpl_id,
+                    'created_at': created_at or False,
+                    'updated_at': updated_at or False, 'exported_in_woo': True
+                })
+            total_variants_in_woo = response.get('variations') and len(
+                response.get('variations')) or 1
+
+        tmpl_data = {
+            'woo_tmpl_id': woo_tmpl_id, 'created_at': created_at or False,
+            'updated_at': updated_at or False, 'exported_in_woo': True,
+            'total_variants_in_woo': total_variants_in_woo
+        }
+        tmpl_data.update(
+            {'website_published': True}) if publish == 'publish' else tmpl_data.update(
+            {'website_published': False})
+        woo_template.write(tmpl_data)
         return True
 
     def get_product_data(self, wcapi, instance, woo_template, publish, update_price,
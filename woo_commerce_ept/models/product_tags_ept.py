@@ -96,69 +96,24 @@ class WooTagsEpt(models.Model):
             _logger.info("Exported {0} tags to Woo of instance {1}".format(len(exported_product_tags), instance.name))
         return True
 
-    def woo_import_all_tags(self, wcapi, instance, page, woo_common_log_id, model_id):
+    def woo_import_all_tags(self, instance, woo_common_log_id, model_id):
         """
-        This method is used for collecting the info of tags by page wise and return the response into dict format
-        :param wcapi: It is the connection object of woo commerce to odoo
+        This method is used for collecting the info of tags of all the pages, the pages are fetched concurrently
         :param instance: It is the browsable object of the woo instance
-        :param page: It contain the page number of woo product tags and its type is Integer
         :param woo_common_log_id: It contain the browsable object of the common log book ept model
         :param model_id: It contain the id of the model class
-        :return: It will return the response of collection details of tags from woo and its type is Dict
+        :return: It will yield the response of every tag from woo and its type is Dict
         @author: Dipak Gogiya @Emipro Technologies Pvt.Ltd
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
-        try:
-            if instance.woo_version == 'v3':
-                res = wcapi.get("products/tags?filter[limit]=1000&page=%s" % page)
-            else:
-                res = wcapi.get("products/tags", params={"per_page": 100, 'page': page})
-        except Exception as error:
-            raise Warning("Something went wrong while importing tags.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(error))
-
-        if not isinstance(res, requests.models.Response):
-            common_log_line_obj.create(
-                {'message': "Get Product Tags \nResponse is not in proper format :: %s" % (res),
-                 'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                 'model_id': model_id,
-                 'res_id': self and self.id or False
-                 })
-            return []
-        if res.status_code not in [200, 201]:
-            common_log_line_obj.create(
-                {'message': res.content,
-                 'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                 'model_id': model_id,
-                 'res_id': self and self.id or False
-                 })
-            return []
-        try:
-            response = res.json()
-        except Exception as e:
-            common_log_line_obj.create({
-                'message': "Json Error : While import tags from WooCommerce for instance %s. \n%s" % (
-                    instance.name, e),
+        return instance.woo_fetch_collection(
+            "products/tags", "product_tags", "tags",
+            lambda message: common_log_line_obj.create({
+                'message': message,
                 'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
                 'model_id': model_id,
                 'res_id': self and self.id or False
-            })
-            return []
-        if instance.woo_version == 'v3':
-            errors = response.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.create(
-                    {'message': message,
-                     'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                     'model_id': model_id,
-                     'res_id': self and self.id or False
-                     })
-                return []
-            return response.get('product_tags')
-        # elif instance.woo_version == 'new':
-        else:
-            return response
+            }))
 
     def woo_sync_product_tags(self, instance, woo_common_log_id):
         """
@@ -170,66 +125,7 @@ class WooTagsEpt(models.Model):
         """
         common_log_line_obj = self.env["common.log.lines.ept"]
         model_id = common_log_line_obj.get_model_id("woo.tags.ept")
-        wcapi = instance.woo_connect()
-        try:
-            if instance.woo_version == 'v3':
-                res = wcapi.get("products/tags?filter[limit]=1000")
-            else:
-                res = wcapi.get("products/tags", params={"per_page": 100})
-        except Exception as error:
-            raise Warning("Something went wrong while importing tags.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(error))
-        if not isinstance(res, requests.models.Response):
-            common_log_line_obj.create(
-                {'message': "Get Product Tags \nResponse is not in proper format :: %s" % (res),
-                 'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                 'model_id': model_id,
-                 'res_id': self and self.id or False
-                 })
-            return True
-        if res.status_code not in [200, 201]:
-            common_log_line_obj.create({
-                'message': "Get Product Tags \nResponse is not in proper format :: %s" % (
-                    res.content),
-                'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                'model_id': model_id,
-                'res_id': self and self.id or False
-            })
-            return True
-        results = []
-        total_pages = res and res.headers.get('x-wp-totalpages', 0) or 1
-        try:
-            res = res.json()
-        except Exception as e:
-            common_log_line_obj.create({
-                'message': "Json Error : While import tags from WooCommerce for instance %s. \n%s" % (
-                    instance.name, e),
-                'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                'model_id': model_id,
-                'res_id': self and self.id or False
-            })
-            return False
-
-        if instance.woo_version == 'v3':
-            errors = res.get('errors', '')
-            if errors:
-                message = errors[0].get('message')
-                common_log_line_obj.create(
-                    {'message': message,
-                     'log_line_id': woo_common_log_id and woo_common_log_id.id or False,
-                     'model_id': model_id,
-                     'res_id': self and self.id or False
-                     })
-                return True
-            results = res.get('product_tags')
-        else:
-            results = res
-        if int(total_pages) >= 2:
-            for page in range(2, int(total_pages) + 1):
-                results = results + self.woo_import_all_tags(wcapi, instance, page,
-                                                             woo_common_log_id,
-                                                             model_id)
-
+        results = self.woo_import_all_tags(instance, woo_common_log_id, model_id)
         for res in results:
             if not isinstance(res, dict):
                 continue
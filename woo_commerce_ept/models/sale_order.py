@@ -1,13 +1,14 @@
 """
 For woo_commerce_ept module.
 """
-import ast
+import json
 import logging
 import pytz
 from datetime import timedelta
 from odoo.tools.misc import split_every
 from odoo import models, fields, api, _
 from odoo.exceptions import Warning, UserError
+from .order_product_matcher import WooOrderProductMatcher
 
 _logger = logging.getLogger("Woo")
 
@@ -101,27 +102,29 @@ class SaleOrder(models.Model):
     def get_order_data_v3(self, params, woo_instance):
         """
         Fetch orders from WooCommerce for wc/v3 api version.
+        Pages after the first one are fetched concurrently and yielded as they arrive.
         @author: Maulik Barad on Date 21-11-2019.
         @param params: Dictionary of parameters to pass in request.
         @param woo_instance: Instance of Woo.
-        @return: List of Dictionaries of orders.
+        @return: Generator of lists of dictionaries of orders, one list per page.
         """
-        orders_data = []
         statuses = woo_instance.import_order_status_ids.mapped("status")
 
         wcapi = woo_instance.woo_connect()
         from_date = params["after"][:10]
         to_date = params["before"][:10]
         for status in statuses:
-            try:
-                response = wcapi.get(
-                    "orders?status=%s&filter[created_at_min]=%s&filter[created_at_max]=%s&filter[limit]=%d&page=%d&filter[order]=%s" % (
-                        status, from_date, to_date, params["per_page"], params["page"],
-                        params["order"]))
-            except Exception as e:
-                raise Warning(
-                    "Something went wrong while importing orders.\n\nPlease Check your Connection and Instance Configuration.\n\n" + str(
-                        e))
+            def fetch_page(page, status=status):
+                try:
+                    return wcapi.get(
+                        "orders?status=%s&filter[created_at_min]=%s&filter[created_at_max]=%s&filter[limit]=%d&page=%d&filter[order]=%s" % (
+                            status, from_date, to_date, params["per_page"], page, params["order"]))
+                except Exception as e:
+                    raise Warning(
+                        "Something went wrong while importing orders.\n\nPlease Check your Connection and Instance Configuration.\n\n" + str(
+                            e))
+
+            response = fetch_page(params["page"])
             if response.status_code != 200:
                 log_line = self.create_woo_log_lines(
                     response.json().get("message", response.reason))
@@ -131,50 +134,38 @@ class SaleOrder(models.Model):
                                                         "active": True,
                                                         "log_lines": [(4, log_line.id, False)]
                                                         })
-                return False
+                return
 
-            orders_data += response.json().get("orders", [])
+            yield response.json().get("orders", [])
 
             total_pages = response.headers.get("X-WC-TotalPages")
             # If there are more than one pages.
             if int(total_pages) > 1:
-                page_data = []
-                for page in range(2, int(total_pages) + 1):
-                    try:
-                        response = wcapi.get("orders?status=%s&filter[created_at_min]=%s&filter[created_at_max]=%s&"
-                                             "filter[limit]=%d&page=%d&order=%s" % (status, from_date, to_date,
-                                                                                    params["per_page"], page,
-                                                                                    params["order"]))
-                    except Exception as error:
-                        raise Warning("Something went wrong while importing tags.\n\nPlease Check your Connection and "
-                                      "Instance Configuration.\n\n" + str(error))
-
-                    page_data = response.json().get("orders", [])
-                orders_data += page_data
-
-        return orders_data
+                for response in woo_instance.woo_fetch_pages_concurrently(fetch_page, range(2, int(total_pages) + 1)):
+                    yield response.json().get("orders", [])
 
     @api.model
     def get_order_data_wc_v1_v2(self, params, woo_instance):
         """
         Fetch orders from WooCommerce for wc/v3 api version.
+        Pages after the first one are fetched concurrently and yielded as they arrive.
         @author: Maulik Barad on Date 21-11-2019.
         @param params: Dictionary of parameters to pass in request.
         @param woo_instance: Instance of Woo.
-        @return: List of Dictionaries of orders.
+        @return: Generator of lists of dictionaries of orders, one list per page.
         """
-        orders_data = []
         statuses = woo_instance.import_order_status_ids.mapped("status")
 
         wcapi = woo_instance.woo_connect()
         for status in statuses:
-            params["status"] = status
-            try:
-                response = wcapi.get("orders", params=params)
-            except Exception as e:
-                raise Warning("Something went wrong while importing orders.\n\nPlease Check your Connection and "
-                              "Instance Configuration.\n\n" + str(e))
+            def fetch_page(page, status=status):
+                try:
+                    return wcapi.get("orders", params=dict(params, status=status, page=page))
+                except Exception as e:
+                    raise Warning("Something went wrong while importing orders.\n\nPlease Check your Connection and "
+                                  "Instance Configuration.\n\n" + str(e))
 
+            response = fetch_page(params["page"])
             if response.status_code != 200:
                 log_line = self.create_woo_log_lines(
                     response.json().get("message", response.reason))
@@ -184,46 +175,38 @@ class SaleOrder(models.Model):
                                                         "active": True,
                                                         "log_lines": [(4, log_line.id, False)]
                                                         })
-                return False
+                return
 
-            orders_data += response.json()
+            yield response.json()
 
             total_pages = response.headers.get("X-WP-TotalPages")
             # If there are more than one pages.
             if int(total_pages) > 1:
-                page_data = []
-                for page in range(2, int(total_pages) + 1):
-                    params["page"] = page
-                    try:
-                        response = wcapi.get("orders", params=params)
-                    except Exception as e:
-                        raise Warning(
-                            "Something went wrong while importing orders.\n\nPlease Check your Connection and "
-                            "Instance Configuration.\n\n" + str(e))
-                    page_data = response.json()
-                orders_data += page_data
-
-        return orders_data
+                for response in woo_instance.woo_fetch_pages_concurrently(fetch_page, range(2, int(total_pages) + 1)):
+                    yield response.json()
 
     @api.model
     def get_order_data_wc_v3(self, params, woo_instance):
         """
         Fetch orders from WooCommerce for wc/v3 api version.
+        Pages after the first one are fetched concurrently and yielded as they arrive.
         @author: Maulik Barad on Date 21-11-2019.
         @param params: Dictionary of parameters to pass in request.
         @param woo_instance: Instance of Woo.
-        @return: List of Dictionaries of orders.
+        @return: Generator of lists of dictionaries of orders, one list per page.
         """
         status = ",".join(map(str, woo_instance.import_order_status_ids.mapped("status")))
-        params["status"] = status
 
         wcapi = woo_instance.woo_connect()
-        try:
-            response = wcapi.get("orders", params=params)
-        except Exception as e:
-            raise Warning("Something went wrong while importing orders.\n\nPlease Check your Connection and "
-                          "Instance Configuration.\n\n" + str(e))
 
+        def fetch_page(page):
+            try:
+                return wcapi.get("orders", params=dict(params, status=status, page=page))
+            except Exception as e:
+                raise Warning("Something went wrong while importing orders.\n\nPlease Check your Connection and "
+                              "Instance Configuration.\n\n" + str(e))
+
+        response = fetch_page(params["page"])
         if response.status_code != 200:
             log_line = self.create_woo_log_lines(
                 str(response.status_code) + " || " + response.json().get("message", response.reason))
@@ -233,23 +216,15 @@ class SaleOrder(models.Model):
                                                     "active": True,
                                                     "log_lines": [(4, log_line.id, False)]
                                                     })
-            return False
+            return
 
-        orders_data = response.json()
+        yield response.json()
 
         total_pages = response.headers.get("X-WP-TotalPages")
         # If there are more than one pages.
         if int(total_pages) > 1:
-            for page in range(2, int(total_pages) + 1):
-                params["page"] = page
-                try:
-                    response = wcapi.get("orders", params=params)
-                except Exception as e:
-                    raise Warning("Something went wrong while importing orders.\n\nPlease Check your Connection and "
-                                  "Instance Configuration.\n\n" + str(e))
-                orders_data += response.json()
-
-        return orders_data
+            for response in woo_instance.woo_fetch_pages_concurrently(fetch_page, range(2, int(total_pages) + 1)):
+                yield response.json()
 
     def import_woo_orders(self, woo_instance, from_date="", to_date=""):
         """
@@ -278,17 +253,20 @@ class SaleOrder(models.Model):
         params = {"after": str(from_date)[:19], "before": str(to_date)[:19],
                   "per_page": 100, "page": 1, "order": "asc"}
 
-        orders_data = self.get_order_data_v3(params, woo_instance) if woo_instance.woo_version == "v3" else \
+        orders_pages = self.get_order_data_v3(params, woo_instance) if woo_instance.woo_version == "v3" else \
             self.get_order_data_wc_v3(params, woo_instance) if woo_instance.woo_version == "wc/v3" else \
                 self.get_order_data_wc_v1_v2(params, woo_instance)
+        orders_found = False
+        for orders_data in orders_pages:
+            if orders_data:
+                # Queues are created page by page, while the next pages are still being fetched.
+                self.create_woo_order_data_queue(woo_instance, orders_data)
+                orders_found = True
         woo_instance.last_order_import_date = to_date.astimezone(pytz.timezone("UTC")).replace(
             tzinfo=None)
-        if not orders_data:
+        if not orders_found:
             _logger.info("No orders Found between %s and %s for %s" % (
                 str(from_date), str(to_date), woo_instance.name))
-            return True
-
-        self.create_woo_order_data_queue(woo_instance, orders_data)
         return True
 
     @api.model
@@ -612,6 +590,11 @@ class SaleOrder(models.Model):
         woo_product_template_obj = self.env["woo.product.template.ept"]
         woo_instance = queue_line.instance_id
 
+        product_matcher = self._context.get("woo_order_product_matcher")
+        if product_matcher and product_matcher.instance == woo_instance:
+            # The products of the batch are resolved and imported before the orders are created.
+            return product_matcher.search(order_line)
+
         # Checks for the product. If found then returns it.
         woo_product_id = order_line.get("variation_id") if order_line.get(
             "variation_id") else order_line.get(
@@ -636,6 +619,73 @@ class SaleOrder(models.Model):
                                                                                woo_product_id)[0]
         return woo_product
 
+    def prepare_woo_order_product_matcher(self, queue_lines, common_log_book_id):
+        """
+        Resolves the products of the order lines of the queue lines before the orders are created.
+        The Woo products are searched once per variant id and SKU, and when the products are imported
+        with the orders, the missing ones are fetched from WooCommerce with one request per 100 products.
+        @param queue_lines: Order data queue lines.
+        @param common_log_book_id: Record of the common log book.
+        @return: WooOrderProductMatcher object.
+        """
+        woo_product_template_obj = self.env["woo.product.template.ept"]
+        woo_instance = queue_lines[:1].instance_id
+        orders_data = {}
+        for queue_line in queue_lines.filtered(lambda line: line.instance_id == woo_instance and line.order_data):
+            try:
+                orders_data[queue_line] = json.loads(queue_line.order_data)
+            except ValueError:
+                continue
+        existing_order_ids = {order["woo_order_id"] for order in self.search_read(
+            [("woo_instance_id", "=", woo_instance.id),
+             ("woo_order_id", "in", [str(order_data.get("id")) for order_data in orders_data.values()])],
+            ["woo_order_id"])}
+        order_lines = {queue_line: order_data.get("line_items") or [] for queue_line, order_data in
+                       orders_data.items() if str(order_data.get("id")) not in existing_order_ids}
+
+        product_matcher = WooOrderProductMatcher(self.env, woo_instance)
+        product_matcher.load([order_line for lines in order_lines.values() for order_line in lines])
+        if not woo_instance.auto_import_product:
+            return product_matcher
+
+        missing_products = {}
+        missing_lines = []
+        for queue_line, lines in order_lines.items():
+            for order_line in lines:
+                if order_line.get("product_id") and not product_matcher.search(order_line):
+                    missing_products.setdefault(order_line.get("product_id"), queue_line)
+                    missing_lines.append(order_line)
+        if not missing_products:
+            return product_matcher
+        _logger.info("Importing %s products of the orders of %s.", len(missing_products), woo_instance.name)
+        products_data = {}
+        for woo_product_ids in split_every(100, list(missing_products)):
+            for product_data in woo_product_template_obj.get_products_from_woo_v1_v2_v3(
+                    woo_instance, common_log_book_id, template_ids=woo_product_ids) or []:
+                queue_line = missing_products.get(product_data.get("id"))
+                if queue_line:
+                    products_data.setdefault(queue_line, []).append(product_data)
+        if products_data:
+            # The attributes and the category tree are synced once for the products of all the orders.
+            self.env["woo.process.import.export"].sync_woo_attributes(woo_instance)
+            woo_product_template_obj = woo_product_template_obj.with_context(woo_category_trees={},
+                                                                             woo_attributes_synced=True)
+        for queue_line, product_data in products_data.items():
+            # The work done before is flushed, so only the products of this order are rolled back on error.
+            self.flush()
+            try:
+                with self._cr.savepoint():
+                    woo_product_template_obj.sync_products(product_data, woo_instance, common_log_book_id,
+                                                           order_queue_line=queue_line)
+                    woo_product_template_obj.flush()
+            except Exception as error:
+                # The products of the order are rolled back, they are dropped from the cache too.
+                self.env.clear()
+                message = "Error :- %s " % error
+                self.create_woo_log_lines(message, common_log_book_id, queue_line)
+        product_matcher.load(missing_lines)
+        return product_matcher
+
     @api.model
     def get_tax_ids(self, woo_instance, tax_id, woo_taxes):
         """
@@ -686,6 +736,10 @@ class SaleOrder(models.Model):
         product_template_obj = self.env["product.template"]
         woo_coupon_obj = self.env["woo.coupons.ept"]
         sale_auto_workflow_obj = self.env["woo.sale.auto.workflow.configuration"]
+        if queue_lines and not self._context.get("woo_order_product_matcher"):
+            return self.with_context(
+                woo_order_product_matcher=self.prepare_woo_order_product_matcher(
+                    queue_lines, common_log_book_id)).create_woo_orders_wc_v1_v2_v3(queue_lines, common_log_book_id)
         new_orders = self
         woo_instance = False
         commit_count = 0
@@ -705,7 +759,7 @@ class SaleOrder(models.Model):
                     queue_line.state = "failed"
                     continue
 
-                order_data = ast.literal_eval(queue_line.order_data)
+                order_data = json.loads(queue_line.order_data)
                 queue_line.processed_at = fields.Datetime.now()
                 existing_order = self.search([("woo_instance_id", "=", woo_instance.id),
                                               ("woo_order_id", "=", order_data.get("id")),
@@ -1078,7 +1132,7 @@ class SaleOrder(models.Model):
         """
         message = ""
         woo_instance = queue_line.instance_id
-        order_data = ast.literal_eval(queue_line.order_data)
+        order_data = json.loads(queue_line.order_data)
         queue_line.processed_at = fields.Datetime.now()
         woo_status = order_data.get("status")
         order = self.search([("woo_instance_id", "=", woo_instance.id),
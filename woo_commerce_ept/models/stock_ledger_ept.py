@@ -0,0 +1,48 @@
+from odoo import models, fields
+
+
+class WooStockLedgerEpt(models.Model):
+    _name = "woo.stock.ledger.ept"
+    _description = "WooCommerce Last Exported Stock"
+
+    woo_instance_id = fields.Many2one("woo.instance.ept", "Instance", required=True, ondelete="cascade")
+    warehouse_id = fields.Many2one("stock.warehouse", "Warehouse", required=True, ondelete="cascade",
+                                   help="Warehouse of the instance when the stock was exported.")
+    woo_variant_id = fields.Char("Woo Variant Id", required=True,
+                                 help="Id of the variation, or of the product for simple products.")
+    quantity = fields.Float("Last Exported Quantity", digits=0,
+                            help="Quantity sent to WooCommerce by the last stock export.")
+
+    _sql_constraints = [('unique_woo_variant_warehouse', 'unique(woo_instance_id,warehouse_id,woo_variant_id)',
+                         "Woo variant must be unique per instance and warehouse.")]
+
+    def get_last_exported_quantities(self, instance):
+        """
+        This method is used to get the quantities sent by the last stock exports of the instance
+        from its current warehouse.
+        @param instance: Record of the instance.
+        @return: Dictionary of {woo_variant_id: quantity}.
+        """
+        self._cr.execute("""select woo_variant_id, quantity from woo_stock_ledger_ept
+            where woo_instance_id = %s and warehouse_id = %s""", (instance.id, instance.woo_warehouse_id.id))
+        return dict(self._cr.fetchall())
+
+    def set_last_exported_quantities(self, instance, quantities):
+        """
+        This method is used to store the exported quantities, one query is used for all the variants.
+        @param instance: Record of the instance.
+        @param quantities: Dictionary of {woo_variant_id: quantity}.
+        """
+        if not quantities:
+            return True
+        values = [(instance.id, instance.woo_warehouse_id.id, str(woo_variant_id), quantity, self.env.uid,
+                   self.env.uid) for woo_variant_id, quantity in quantities.items()]
+        rows = ",".join(self._cr.mogrify("(%s,%s,%s,%s,%s,%s,now() at time zone 'UTC',now() at time zone 'UTC')",
+                                         value).decode() for value in values)
+        self._cr.execute("""insert into woo_stock_ledger_ept
+            (woo_instance_id, warehouse_id, woo_variant_id, quantity, create_uid, write_uid, create_date, write_date)
+            values %s
+            on conflict (woo_instance_id, warehouse_id, woo_variant_id)
+            do update set quantity = excluded.quantity, write_uid = excluded.write_uid,
+            write_date = excluded.write_date""" % rows)
+        return True
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+For woo_commerce_ept module.
+"""
+import json
+import logging
+import time
+
+import psycopg2
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger("Woo")
+
+
+class WooWebhookInboxEpt(models.Model):
+    """
+    Payloads of the order webhooks received from WooCommerce.
+    The controller only stores the payload and answers, the orders are processed by the cron. The
+    same delivery of an order (topic, order id and date_modified_gmt) is stored once, so the retries
+    of WooCommerce are ignored.
+    """
+    _name = "woo.webhook.inbox.ept"
+    _description = "Woo Webhook Inbox"
+    _order = "id"
+
+    woo_instance_id = fields.Many2one("woo.instance.ept", string="Instance", required=True, ondelete="cascade",
+                                      index=True)
+    topic = fields.Char(required=True)
+    resource_id = fields.Char("Order Id", required=True)
+    resource_updated_at = fields.Char("Updated At", default="",
+                                      help="date_modified_gmt of the order in the payload.")
+    payload = fields.Text()
+    state = fields.Selection([("draft", "Draft"), ("done", "Done"), ("skipped", "Skipped"), ("failed", "Failed")],
+                             default="draft", index=True)
+    message = fields.Text()
+    processed_at = fields.Datetime()
+
+    _sql_constraints = [("unique_webhook_delivery", "unique(woo_instance_id,topic,resource_id,resource_updated_at)",
+                         "The webhook delivery is already received.")]
+
+    @api.model
+    def add_webhook_payload(self, instance, topic, payload):
+        """
+        Stores the payload of a webhook with one query, a delivery which is already stored is ignored.
+        @param instance: Record of the Woo instance.
+        @param topic: Topic of the webhook, like order.updated.
+        @param payload: Dictionary of the webhook data.
+        @return: True when the payload is stored, False when it is invalid or already received.
+        """
+        if not isinstance(payload, dict) or not payload.get("id"):
+            return False
+        self._cr.execute("""insert into woo_webhook_inbox_ept
+            (woo_instance_id, topic, resource_id, resource_updated_at, payload, state, create_uid, write_uid,
+             create_date, write_date)
+            values (%s, %s, %s, %s, %s, 'draft', %s, %s, now() at time zone 'UTC', now() at time zone 'UTC')
+            on conflict (woo_instance_id, topic, resource_id, resource_updated_at) do nothing
+            returning id""", (instance.id, topic, str(payload.get("id")),
+                              payload.get("date_modified_gmt") or payload.get("date_modified") or "",
+                              json.dumps(payload), self.env.uid, self.env.uid))
+        return bool(self._cr.fetchone())
+
+    @api.model
+    def process_webhook_inbox(self, batch_size=200, time_limit=240):
+        """
+        Processes the received webhooks batch by batch. It is called by the cron.
+        The deliveries of the same order in a batch are coalesced, only the latest one is processed.
+        @param batch_size: Number of deliveries read at once.
+        @param time_limit: Seconds after which no new batch is started.
+        """
+        self.cleanup_webhook_inbox()
+        start = time.time()
+        while time.time() - start < time_limit:
+            self._cr.execute("""select id from woo_webhook_inbox_ept where state = 'draft'
+                order by id limit %s""", (batch_size,))
+            inbox_ids = [row[0] for row in self._cr.fetchall()]
+            if not inbox_ids:
+                break
+            deliveries = {}
+            for inbox in self.browse(inbox_ids):
+                deliveries.setdefault((inbox.woo_instance_id.id, inbox.resource_id), self.browse())
+                deliveries[(inbox.woo_instance_id.id, inbox.resource_id)] |= inbox
+            for inbox_records in deliveries.values():
+                # A deleted order is cancelled whatever the updates received before.
+                deleted = inbox_records.filtered(lambda inbox: inbox.topic == "order.deleted")
+                latest = max(deleted or inbox_records, key=lambda inbox: (inbox.resource_updated_at or "", inbox.id))
+                (inbox_records - latest).write({"state": "skipped", "processed_at": fields.Datetime.now(),
+                                                "message": "Replaced by a later delivery of the order."})
+                latest.process_inbox_order()
+                self._cr.commit()
+        return True
+
+    @api.model
+    def cleanup_webhook_inbox(self, days=7):
+        """
+        Deletes the processed and skipped deliveries older than the given days, the failed ones are
+        kept to be checked.
+        @param days: Number of days the processed deliveries are kept.
+        """
+        self._cr.execute("""delete from woo_webhook_inbox_ept where state in ('done', 'skipped')
+            and processed_at < (now() at time zone 'UTC') - %s * interval '1 day'""", (days,))
+        self._cr.commit()
+        return True
+
+    def process_inbox_order(self):
+        """
+        Processes one delivery of an order webhook, like the controller did before.
+        """
+        self.ensure_one()
+        instance = self.woo_instance_id
+        sale_order_obj = self.env["sale.order"].sudo()
+        if not instance.active:
+            self.write({"state": "skipped", "processed_at": fields.Datetime.now(),
+                        "message": "Instance %s is archived." % instance.name})
+            return False
+        order_data = json.loads(self.payload)
+        # The deliveries skipped before are flushed, so only this delivery is rolled back on error. The
+        # savepoint is not released, the queue processing of the order commits and ends it.
+        self.flush()
+        self._cr.execute('SAVEPOINT webhook_inbox_order')
+        try:
+            if self.topic == "order.deleted":
+                self.process_deleted_order(order_data)
+            elif sale_order_obj.search_read([("woo_instance_id", "=", instance.id),
+                                             ("woo_order_id", "=", order_data.get("id")),
+                                             ("woo_order_number", "=", order_data.get("number"))], ["id"]):
+                sale_order_obj.process_order_via_webhook(order_data, instance, True)
+            elif order_data.get("status") in instance.import_order_status_ids.mapped("status"):
+                sale_order_obj.process_order_via_webhook(order_data, instance)
+            self.flush()
+        except Exception as error:
+            try:
+                self._cr.execute('ROLLBACK TO SAVEPOINT webhook_inbox_order')
+            except psycopg2.Error:
+                # The order is committed by its queue, with the deliveries skipped before.
+                self._cr.rollback()
+            # The changes of the order are dropped from the cache too.
+            self.env.clear()
+            _logger.exception("Webhook of order %s of %s is not processed.", self.resource_id, instance.name)
+            self.write({"state": "failed", "processed_at": fields.Datetime.now(), "message": str(error)})
+            return False
+        self.write({"state": "done", "processed_at": fields.Datetime.now()})
+        return True
+
+    def process_deleted_order(self, order_data):
+        """
+        Cancels the order deleted in WooCommerce.
+        @param order_data: Data of the order received in the webhook.
+        """
+        instance = self.woo_instance_id
+        order_data.update({"number": order_data.get("id"), "status": "cancelled"})
+        order = self.env["sale.order"].sudo().search([("woo_instance_id", "=", instance.id),
+                                                      ("woo_order_id", "=", order_data.get("id"))])
+        if order:
+            order_data_queue = order.create_woo_order_data_queue(instance, [order_data],
+                                                                 "Order#" + str(order_data.get("id", "")), "webhook")
+            self._cr.commit()
+            order_data_queue.order_data_queue_line_ids.process_order_queue_line(update_order=True)
+            _logger.info("Cancelled order {0} of {1} via Webhook as deleted in Woo Successfully".format(order.name,
+                                                                                                        instance.name))
+        return True
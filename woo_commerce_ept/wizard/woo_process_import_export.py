@@ -378,6 +378,33 @@ class WooProcessImportExport(models.TransientModel):
         self.env['woo.product.template.ept'].update_stock(instance, self.export_stock_from)
         return True
 
+    def woo_selective_product_stock_export(self):
+        """
+        This method is used to export the stock of the selected products in WooCommerce. The quantities
+        are sent even if they are the same as in the last stock export.
+        """
+        woo_product_tmpl_obj = self.env['woo.product.template.ept']
+        woo_template_ids = self._context.get('active_ids')
+        instances = self.env['woo.instance.ept'].search([('state', '=', 'confirmed')])
+
+        if not woo_template_ids:
+            raise Warning("Please select some products to Export Stock in WooCommerce Store.")
+
+        for instance in instances:
+            woo_templates = woo_product_tmpl_obj.search([('id', 'in', woo_template_ids),
+                                                         ('woo_instance_id', '=', instance.id),
+                                                         ('exported_in_woo', '=', True)])
+            if not woo_templates:
+                continue
+            product_ids = woo_templates.woo_product_ids.filtered(lambda x: x.woo_is_manage_stock).product_id.ids
+            woo_tmpl_obj = woo_product_tmpl_obj.with_context(updated_products_in_inventory=product_ids,
+                                                             is_process_from_selected_product=True)
+            if instance.woo_version in ['v3', 'wc/v1']:
+                woo_tmpl_obj.update_stock_old_api(instance, woo_templates)
+            else:
+                woo_tmpl_obj.update_stock_new_api(instance, woo_templates)
+        return True
+
     def get_products_from_woo(self):
         """
         This method used to get products with its variants from woo commerce
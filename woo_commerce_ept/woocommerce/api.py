@@ -9,7 +9,9 @@ __version__ = "2.1.1"
 __author__ = "Claudio Sanches @ Automattic"
 __license__ = "MIT"
 
-from requests import request
+from requests import Session
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from json import dumps as jsonencode
 from time import time
 from .oauth import OAuth
@@ -33,6 +35,26 @@ class API(object):
         self.timeout = kwargs.get("timeout", 60)
         self.verify_ssl = kwargs.get("verify_ssl", True)
         self.query_string_auth = kwargs.get("query_string_auth", False)
+        self.session = self.__get_session(
+            pool_size=kwargs.get("pool_size", 10),
+            max_retries=kwargs.get("max_retries", 0),
+            backoff_factor=kwargs.get("backoff_factor", 0.5)
+        )
+
+    def __get_session(self, pool_size, max_retries, backoff_factor):
+        """ Keep-alive session with a connection pool and an optional retry policy for 429/5xx """
+        session = Session()
+        retries = Retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        ) if max_retries else 0
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
 
     def __is_ssl(self):
         """ Check if url use HTTPS """
@@ -91,7 +113,7 @@ class API(object):
             data = jsonencode(data, ensure_ascii=False).encode('utf-8')
             headers["content-type"] = "application/json;charset=utf-8"
 
-        return request(
+        return self.session.request(
             method=method,
             url=url,
             verify=self.verify_ssl,